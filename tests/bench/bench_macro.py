@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+# ==============================================================================
+# MACRO BENCHMARKS
+# DnsRecord flows on "count" domains through the client given, LocalClient or a node with a giver: deploying
+# domains, claiming sub-domains of an FFA parent and fetching whois of all of them in one bulk call. Accounts
+# are funded and deployed before timing starts, only the flow itself is timed; results are checked afterwards.
+import ever_utils
+from   ever_utils import *
+from   contract_DnsRecord import *
+from   bench_utils import *
+
+# ==============================================================================
+#
+def _newMultisig(everClient: TonClient, value: int):
+    msig = Multisig(everClient=everClient)
+    giverGive(everClient, msig.ADDRESS, value)
+    checkResult(msig.deploy(), "Multisig deploy")
+    return msig
+
+def _newDomains(everClient: TonClient, names, owner: Multisig, deploy: bool):
+    domains = [DnsRecord(everClient=everClient, name=name, ownerAddress=owner.ADDRESS) for name in names]
+    giverGiveMany(everClient, [(domain.ADDRESS, EVER * 2) for domain in domains])
+    if deploy:
+        for domain in domains:
+            checkResult(domain.deploy(), "DnsRecord deploy")
+    return domains
+
+def _checkOwners(everClient: TonClient, domains, ownerAddress: str):
+    records = getWhoisRecords(everClient=everClient, addresses=[domain.ADDRESS for domain in domains], cacheBocs=False)
+    wrong   = [domain.NAME for domain in domains if records.get(domain.ADDRESS) == "" or records.get(domain.ADDRESS).ownerAddress != ownerAddress]
+    if len(wrong) > 0:
+        raise RuntimeError("Unexpected owner of: {}".format(", ".join(wrong)))
+
+# ==============================================================================
+# "prefix" keeps names unique on a node that keeps state between runs
+def benchDeployDomains(everClient: TonClient, count: int, prefix: str):
+    msig    = _newMultisig(everClient, EVER * 2)
+    domains = _newDomains(everClient, getBenchNames(count, prefix + "d"), msig, deploy=False)
+    pending = list(domains)
+
+    def function():
+        checkResult(pending.pop().deploy(), "DnsRecord deploy")
+    return getSpec(function, number=count, repeat=1, warmup=False), lambda: _checkOwners(everClient, domains, msig.ADDRESS)
+
+def benchClaimSubdomains(everClient: TonClient, count: int, prefix: str):
+    msig    = _newMultisig(everClient, EVER * (count * 2 + 2))
+    parent  = _newDomains(everClient, [prefix + "parent"], msig, deploy=True)[0]
+    checkResult(parent.changeRegistrationType(msig=msig, newType=REG_TYPE.FFA), "changeRegistrationType")
+    domains = _newDomains(everClient, [parent.NAME + "/" + name for name in getBenchNames(count, "s")], msig, deploy=True)
+    pending = list(domains)
+
+    def function():
+        checkResult(pending.pop().claimExpired(msig=msig, newOwnerAddress=msig.ADDRESS), "claimExpired")
+    return getSpec(function, number=count, repeat=1, warmup=False), lambda: _checkOwners(everClient, domains, msig.ADDRESS)
+
+def benchGetWhoisRecords(everClient: TonClient, count: int, prefix: str):
+    msig      = _newMultisig(everClient, EVER * 2)
+    domains   = _newDomains(everClient, getBenchNames(count, prefix + "w"), msig, deploy=True)
+    addresses = [domain.ADDRESS for domain in domains]
+
+    def function():
+        records = getWhoisRecords(everClient=everClient, addresses=addresses, cacheBocs=False)
+        if len(records) != count:
+            raise RuntimeError("Whois of {} domains out of {}".format(len(records), count))
+    return getSpec(function, number=1, items=count), lambda: _checkOwners(everClient, domains, msig.ADDRESS)
+
+# Every benchmark returns (spec, check); "check" is run after timing
+MACRO_BENCHMARKS = {
+    "deployDomains":    benchDeployDomains,
+    "claimSubdomains":  benchClaimSubdomains,
+    "getWhoisRecords":  benchGetWhoisRecords,
+}
+
+# ==============================================================================
+#
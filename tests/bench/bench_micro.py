@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+# ==============================================================================
+# MICRO BENCHMARKS
+# ever_utils hot paths. Message bodies are synthetic (encoded locally with fixed inputs) and account BOCs
+# come from a DnsRecord deployed on the in-process LocalNetwork, so no node is needed.
+import itertools
+import ever_utils
+from   ever_utils import *
+from   ever_local import LocalClient
+from   contract_DnsRecord import *
+from   bench_utils import *
+
+# ==============================================================================
+# One LocalNetwork with a Multisig-owned DnsRecord and one "changeComment" call, shared by the benchmarks
+LOCAL_FIXTURES = {}
+
+def getLocalFixtures():
+    if len(LOCAL_FIXTURES) > 0:
+        return LOCAL_FIXTURES
+
+    everClient = LocalClient()
+    msig       = Multisig(everClient=everClient)
+    domain     = DnsRecord(everClient=everClient, name="bench", ownerAddress=msig.ADDRESS)
+    giverGiveMany(everClient, [(msig.ADDRESS, EVER * 10), (domain.ADDRESS, EVER * 2)])
+    checkResult(msig.deploy(),   "Multisig deploy")
+    checkResult(domain.deploy(), "DnsRecord deploy")
+    result = checkResult(domain.changeComment(msig=msig, newComment="benchmark"), "changeComment")
+
+    LOCAL_FIXTURES.update({
+        "CLIENT":  everClient,
+        "MSIG":    msig,
+        "DOMAIN":  domain,
+        "BOC":     getAccountGraphQL(everClient, domain.ADDRESS, "boc")["boc"],
+        "OUT_MSGS": result["result"].transaction["out_msgs"],
+    })
+    return LOCAL_FIXTURES
+
+# ==============================================================================
+#
+def benchGetAddress():
+    code        = getCodeFromTvc("../bin/DnsRecord.tvc")
+    signer      = Signer.Keys(KeyPair(ZERO_PUBKEY, ZERO_PUBKEY))
+    initialData = itertools.cycle([{"_domainName": stringToHex(name), "_domainCode": code} for name in getBenchNames(64)])
+    function    = lambda: getAddress("../bin/DnsRecord.abi.json", "../bin/DnsRecord.tvc", signer, ZERO_PUBKEY, next(initialData))
+    return getSpec(function, number=200)
+
+def benchCalculateDomainAddresses():
+    names    = getBenchNames(256)
+    function = lambda: calculateDomainAddresses(names)
+    return getSpec(function, number=20, items=len(names))
+
+def benchGetCodeFromTvc():
+    getCodeFromTvc("../bin/DnsRecord.tvc")
+    function = lambda: getCodeFromTvc("../bin/DnsRecord.tvc")
+    return getSpec(function, number=5000)
+
+# Every call extracts the code again
+def benchGetCodeFromTvcCold():
+    def function():
+        TVC_CACHE.clear()
+        getCodeFromTvc("../bin/DnsRecord.tvc")
+    return getSpec(function, number=50)
+
+def benchDecodeMessageBody():
+    bodies = [
+        prepareMessageBoc(abiPath="DnsRecord", functionName="claimExpired",           functionParams={"newOwnerAddress": ZERO_ADDRESS, "forceFeeReturnToOwner": False}),
+        prepareMessageBoc(abiPath="DnsRecord", functionName="changeComment",          functionParams={"newComment": stringToHex("benchmark")}),
+        prepareMessageBoc(abiPath="DnsRecord", functionName="changeRegistrationType", functionParams={"newType": 1}),
+        prepareMessageBoc(abiPath="DnsRecord", functionName="prolongate",             functionParams={}),
+        prepareMessageBoc(abiPath="SetcodeMultisigWallet", functionName="sendTransaction",
+                          functionParams={"dest": ZERO_ADDRESS, "value": EVER, "bounce": False, "flags": 1, "payload": ""}),
+    ]
+    abiArray = ever_utils._getAbiArray()
+    bodies   = itertools.cycle(bodies)
+    function = lambda: decodeMessageBody(next(bodies), abiArray)
+    return getSpec(function, number=500)
+
+def benchRunFunctionInternal():
+    fixtures = getLocalFixtures()
+    domain   = fixtures["DOMAIN"]
+    function = lambda: runFunctionInternal(everClient=fixtures["CLIENT"], boc=fixtures["BOC"], abiPath=domain.ABI, contractAddress=domain.ADDRESS, functionName="getWhois", functionParams={})
+    return getSpec(function, number=200)
+
+# Account BOC comes from BOC_CACHE, as with DnsRecord getters
+def benchRunFunction():
+    fixtures = getLocalFixtures()
+    domain   = fixtures["DOMAIN"]
+    function = lambda: runFunction(everClient=fixtures["CLIENT"], abiPath=domain.ABI, contractAddress=domain.ADDRESS, functionName="getWhois", functionParams={})
+    return getSpec(function, number=200)
+
+def benchUnwrapMessagesInternal():
+    fixtures = getLocalFixtures()
+    abiArray = ever_utils._getAbiArray()
+    function = lambda: unwrapMessagesInternal(fixtures["CLIENT"], fixtures["OUT_MSGS"], abiArray)
+    return getSpec(function, number=50)
+
+MICRO_BENCHMARKS = {
+    "getAddress":               benchGetAddress,
+    "calculateDomainAddresses": benchCalculateDomainAddresses,
+    "getCodeFromTvc":           benchGetCodeFromTvc,
+    "getCodeFromTvc.cold":      benchGetCodeFromTvcCold,
+    "decodeMessageBody":        benchDecodeMessageBody,
+    "runFunctionInternal":      benchRunFunctionInternal,
+    "runFunction":              benchRunFunction,
+    "unwrapMessagesInternal":   benchUnwrapMessagesInternal,
+}
+
+# ==============================================================================
+#
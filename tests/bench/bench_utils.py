@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# ==============================================================================
+# BENCHMARK UTILS
+# Timing, JSON results and comparison shared by the micro and macro benchmarks. A benchmark is a dict
+# {"FUNCTION", "NUMBER", "ITEMS", "REPEAT", "WARMUP"}: "FUNCTION" is called "NUMBER" times per round and
+# every call handles "ITEMS" items, all times are seconds per item so runs with different sizes compare.
+import gc
+import sys
+import json
+import time
+import random
+import string
+import platform
+import importlib.metadata
+import statistics
+import subprocess
+
+# ==============================================================================
+#
+BENCH_SEED      = 2022
+RESULTS_VERSION = 1
+
+def getBenchNames(count: int, prefix: str = "", seed: int = BENCH_SEED):
+    rnd = random.Random(seed)
+    return [prefix + "".join(rnd.choice(string.ascii_lowercase + string.digits) for _ in range(rnd.randint(8, 16))) for _ in range(count)]
+
+# Benchmarks must not time failed operations, those are usually much faster
+def checkResult(result, what: str):
+    if result["exception"]["errorCode"] != 0:
+        raise RuntimeError("{} failed: {}".format(what, result["exception"]))
+    return result
+
+def getSpec(function, number: int, items: int = 1, repeat: int = 0, warmup: bool = True):
+    return {"FUNCTION": function, "NUMBER": number, "ITEMS": items, "REPEAT": repeat, "WARMUP": warmup}
+
+# ==============================================================================
+# Same approach as "timeit": garbage collection is off while a round runs
+def measure(spec, repeat: int):
+    repeat = spec["REPEAT"] if spec["REPEAT"] > 0 else repeat
+    if spec["WARMUP"]:
+        spec["FUNCTION"]()
+
+    rounds    = []
+    gcEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(spec["NUMBER"]):
+                spec["FUNCTION"]()
+            rounds.append((time.perf_counter() - start) / (spec["NUMBER"] * spec["ITEMS"]))
+    finally:
+        if gcEnabled:
+            gc.enable()
+
+    return {"NUMBER": spec["NUMBER"], "ITEMS": spec["ITEMS"], "REPEAT": repeat,
+            "MIN": min(rounds), "MEDIAN": statistics.median(rounds), "MEAN": statistics.mean(rounds)}
+
+# ==============================================================================
+#
+def getGitCommit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def getClientVersion():
+    try:
+        return importlib.metadata.version("ton-client-py")
+    except importlib.metadata.PackageNotFoundError:
+        return ""
+
+def getMeta(backend: str):
+    return {"VERSION": RESULTS_VERSION, "COMMIT": getGitCommit(), "TIME": int(time.time()), "BACKEND": backend,
+            "PYTHON": platform.python_version(), "PLATFORM": platform.platform(), "TONCLIENT": getClientVersion()}
+
+def saveResults(path: str, meta, results):
+    with open(path, "w", encoding="utf8") as fp:
+        json.dump({"META": meta, "RESULTS": results}, fp, indent=4, sort_keys=True)
+
+def loadResults(path: str):
+    with open(path, encoding="utf8") as fp:
+        return json.load(fp)
+
+def formatTime(seconds: float):
+    for (unit, scale) in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return "{:.2f}{}".format(seconds / scale, unit)
+    return "{:.0f}ns".format(seconds / 1e-9)
+
+# ==============================================================================
+# Medians are compared; "thresholds" is {name prefix: allowed relative slowdown}, the longest matching prefix wins.
+# Returns names of the benchmarks that regressed
+def compareResults(baseline, current, thresholds, output = sys.stdout):
+    regressions = []
+    output.write("{:<40} {:>10} {:>10} {:>9}\n".format("benchmark", "baseline", "current", "change"))
+    for (name, result) in current.items():
+        if name not in baseline:
+            output.write("{:<40} {:>10} {:>10} {:>9}\n".format(name, "---", formatTime(result["MEDIAN"]), "new"))
+            continue
+
+        prefix    = max([prefix for prefix in thresholds if name.startswith(prefix)], key=len, default="")
+        threshold = thresholds.get(prefix, 0)
+        change    = result["MEDIAN"] / baseline[name]["MEDIAN"] - 1
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        output.write("{:<40} {:>10} {:>10} {:>+8.1f}%{}\n".format(name, formatTime(baseline[name]["MEDIAN"]), formatTime(result["MEDIAN"]), change * 100,
+                                                                  "  REGRESSION (>{:.0f}%)".format(threshold * 100) if regressed else ""))
+    return regressions
+
+def printResults(results, output = sys.stdout):
+    output.write("{:<40} {:>10} {:>10} {:>10}\n".format("benchmark", "min", "median", "mean"))
+    for (name, result) in results.items():
+        output.write("{:<40} {:>10} {:>10} {:>10}\n".format(name, formatTime(result["MIN"]), formatTime(result["MEDIAN"]), formatTime(result["MEAN"])))
+
+# ==============================================================================
+#
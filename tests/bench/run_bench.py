@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# ==============================================================================
+# BENCHMARKS
+# Micro-benchmarks of ever_utils hot paths (bench_micro.py) and macro DnsRecord flows on N domains
+# (bench_macro.py). Macro flows run on the in-process LocalNetwork unless a node address is given, so by
+# default no node is needed. Results can be saved as JSON and compared with the results of another commit;
+# the exit code is 1 when a median got slower than the threshold allows.
+#
+# Usage (from "tests", like run_tests.py):
+#   ./bench/run_bench.py --output=before.json
+#   ./bench/run_bench.py --compare=before.json --output=after.json
+#   ./bench/run_bench.py --macro=50 http://localhost micro.getAddress macro.
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ever_utils
+from   ever_utils import *
+from   ever_local import LocalClient
+from   bench_utils import *
+from   bench_micro import MICRO_BENCHMARKS
+from   bench_macro import MACRO_BENCHMARKS
+
+# ==============================================================================
+#
+SERVER_ADDRESS  = ""
+OUTPUT_PATH     = ""
+COMPARE_PATH    = ""
+REPEAT          = 5
+MACRO_COUNT     = 10
+THRESHOLDS      = {"micro.": 0.20, "macro.": 0.50} # allowed median slowdown, macro flows are noisier
+
+# ==============================================================================
+#
+# Benchmark name prefixes can be given after the arguments to run only those
+for _, arg in enumerate(sys.argv[1:]):
+    if arg.startswith("http"):
+
+        SERVER_ADDRESS = arg
+        sys.argv.remove(arg)
+
+    if arg.startswith("--output"):
+
+        OUTPUT_PATH = arg[9:]
+        sys.argv.remove(arg)
+
+    if arg.startswith("--compare"):
+
+        COMPARE_PATH = arg[10:]
+        sys.argv.remove(arg)
+
+    if arg.startswith("--repeat"):
+
+        REPEAT = int(arg[9:])
+        sys.argv.remove(arg)
+
+    if arg.startswith("--macro"):
+
+        MACRO_COUNT = int(arg[8:])
+        sys.argv.remove(arg)
+
+    if arg.startswith("--threshold"):
+
+        THRESHOLDS = {prefix: float(arg[12:]) for prefix in THRESHOLDS}
+        sys.argv.remove(arg)
+
+    if arg.startswith("--tvc-cache"):
+
+        ever_utils.TVC_CACHE_DIR = arg[12:]
+        sys.argv.remove(arg)
+
+# ==============================================================================
+#
+def isSelected(name: str):
+    return len(sys.argv) == 1 or any(name.startswith(prefix) for prefix in sys.argv[1:])
+
+def runMicro(results):
+    for (name, bench) in MICRO_BENCHMARKS.items():
+        name = "micro." + name
+        if isSelected(name):
+            results[name] = measure(bench(), REPEAT)
+            print("{:<40} {:>10}".format(name, formatTime(results[name]["MEDIAN"])))
+
+def runMacro(results, everClient: TonClient):
+    # Names on a node have to be new every run
+    prefix = "bench" if SERVER_ADDRESS == "" else "b{}".format(getNowTimestamp())
+    for (name, bench) in MACRO_BENCHMARKS.items():
+        name = "macro." + name
+        if isSelected(name):
+            (spec, check) = bench(everClient, MACRO_COUNT, prefix)
+            results[name] = measure(spec, REPEAT)
+            check()
+            print("{:<40} {:>10}".format(name, formatTime(results[name]["MEDIAN"])))
+
+# ==============================================================================
+#
+if __name__ == "__main__":
+    everClient = LocalClient() if SERVER_ADDRESS == "" else getEverClient(testnet=False, customServer=SERVER_ADDRESS)
+    results    = {}
+    runMicro(results)
+    if MACRO_COUNT > 0:
+        runMacro(results, everClient)
+    closeClients()
+
+    print("")
+    printResults(results)
+    if OUTPUT_PATH != "":
+        saveResults(OUTPUT_PATH, getMeta("local" if SERVER_ADDRESS == "" else SERVER_ADDRESS), results)
+
+    if COMPARE_PATH != "":
+        print("")
+        regressions = compareResults(loadResults(COMPARE_PATH)["RESULTS"], results, THRESHOLDS)
+        sys.exit(1 if len(regressions) > 0 else 0)
+
+# ==============================================================================
+#
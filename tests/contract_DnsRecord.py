@@ -2,17 +2,341 @@
 
 # ==============================================================================
 #
+import re
+import sys
+import array
 import ever_utils
+from   enum import IntEnum
 from   ever_utils import *
+from   ever_utils_async import AsyncBaseContract
 
+# ==============================================================================
+# DnsRecord address depends only on "_domainName" and "_domainCode" (see "calculateDomainAddress" in IDnsRecord.sol);
+# one calculator per contract builds StateInit once and derives addresses for any number of names locally.
+DOMAIN_ADDRESS_CALCULATORS = {}
+
+def getDomainAddressCalculator(contractName: str = "DnsRecord"):
+    if contractName not in DOMAIN_ADDRESS_CALCULATORS:
+        tvcPath = "../bin/" + contractName + ".tvc"
+        DOMAIN_ADDRESS_CALCULATORS[contractName] = AddressCalculator(abiPath=contractName, tvcPath=tvcPath, fieldName="_domainName", initialData={"_domainCode":getCodeFromTvc(tvcPath)})
+    return DOMAIN_ADDRESS_CALCULATORS[contractName]
+
+def calculateDomainAddresses(names, contractName: str = "DnsRecord"):
+    calculator = getDomainAddressCalculator(contractName)
+    return calculator.calculate([stringToHex(name) for name in names])
+
+# ==============================================================================
+# DOMAIN NAMES
+# Same rules as "_validateDomainName" and "_parseDomainName" in IDnsRecord.sol: 1 to MAX_SEGMENTS_NUMBER segments
+# separated by "/", each MIN_SEGMENTS_LENGTH to MAX_SEGMENTS_LENGTH of lowercase letters, numbers and "-".
+MAX_SEGMENTS_NUMBER = 4
+MIN_SEGMENTS_LENGTH = 2
+MAX_SEGMENTS_LENGTH = 31
+MAX_DOMAIN_LENGTH   = MAX_SEGMENTS_NUMBER * MAX_SEGMENTS_LENGTH + (MAX_SEGMENTS_NUMBER - 1)
+ERROR_DOMAIN_NAME_NOT_VALID = 200
+
+DOMAIN_SEGMENT_PATTERN = "[0-9a-z\\-]{%d,%d}" % (MIN_SEGMENTS_LENGTH, MAX_SEGMENTS_LENGTH)
+DOMAIN_NAME_REGEX      = re.compile("%s(?:/%s){0,%d}" % (DOMAIN_SEGMENT_PATTERN, DOMAIN_SEGMENT_PATTERN, MAX_SEGMENTS_NUMBER - 1))
+
+def validateDomainName(name: str):
+    return DOMAIN_NAME_REGEX.fullmatch(name) is not None
+
+def validateDomainNames(names):
+    fullmatch = DOMAIN_NAME_REGEX.fullmatch
+    return [fullmatch(name) is not None for name in names]
+
+# Returns (segments, parentName); parent of a top level domain is the domain itself
+def parseDomainName(name: str):
+    segments = [segment for segment in name.split("/") if segment != ""]
+    if len(segments) == 0:
+        return (segments, "")
+    if len(segments) == 1:
+        return (segments, name)
+    return (segments, name[:len(name) - len(segments[-1]) - 1])
+
+# Names from the top level domain down to "name" itself, e.g. "a/b/c" -> ["a", "a/b", "a/b/c"]
+def getDomainAncestors(name: str):
+    (segments, _) = parseDomainName(name)
+    return ["/".join(segments[:i+1]) for i in range(len(segments))]
+
+def getInvalidDomainNameResult(name: str):
+    if ever_utils.THROW:
+        raise ValueError("Domain name \"{}\" is not valid".format(name))
+    return {"result": {}, "exception": {"errorCode":ERROR_DOMAIN_NAME_NOT_VALID, "errorMessage":"Domain name is not valid", "transactionID": "", "errorDesc": ""}}
+
+# ==============================================================================
+# HIERARCHY
+# A sub-domain claim is decided by its parent in "receiveRegistrationRequest" (DnsRecord.sol). Chains are
+# resolved with all ancestor addresses calculated locally, one bulk account query and getters run on the
+# fetched states; each chain element is {"NAME", "ADDRESS", "WHOIS"}, "WHOIS" is "" if not deployed.
+class REG_TYPE(IntEnum):
+    FFA   = 0
+    MONEY = 1
+    OWNER = 2
+    DENY  = 3
+
+class REG_RESULT(IntEnum):
+    NONE             = 0
+    APPROVED         = 1
+    DENIED           = 2
+    NOT_ENOUGH_MONEY = 3
+
+TEN_DAYS    = 60 * 60 * 24 * 10 # "prolongate" is allowed during the last TEN_DAYS before "dtExpires"
+NINETY_DAYS = TEN_DAYS * 9      # "prolongate" and a successful claim add NINETY_DAYS
+
+# "gasToValue(300000, 0)" that the parent adds to "registrationPrice", basechain gas price of 1000 nanoevers
+REGISTRATION_MIN_FEE = 300000 * 1000
+
+# ==============================================================================
+# WHOIS FROM ACCOUNT DATA
+# "getWhois" only returns "_whoisInfo", so it is decoded straight from account data (c4) without running TVM.
+# The ABI has no "fields" section and the compiler does not lay structs out as ABI tuples, so the layout of
+# DnsRecordBase (same for DnsRecord and DnsRecordTEST) is spelled out here:
+#   root:      pubkey, timestamp, constructor flag, ^_domainName, _nameIsValid, ^_domainCode, ^_whoisInfo
+#   whoisInfo: endpointAddress, segmentsCount, ^tail, ^domainName, ^parentDomainName, parentDomainAddress,
+#              ownerAddress, dtLastProlongation, dtExpires
+#   tail:      registrationPrice, registrationType, lastRegResult, ^comment, dtCreated, statistics
+# The result is the same dict of strings "getWhois" returns.
+def _getAbiParams(params):
+    return [AbiParam(name=name, type=paramType) for (name, paramType) in params]
+
+WHOIS_DATA_ROOT = _getAbiParams([("_pubkey", "uint256"), ("_timestamp", "uint64"), ("_constructorFlag", "bool"), ("_domainName", "bytes"),
+                                 ("_nameIsValid", "bool"), ("_domainCode", "cell"), ("_whoisInfo", "cell")])
+WHOIS_DATA_HEAD = _getAbiParams([("endpointAddress", "address"), ("segmentsCount", "uint8"), ("_tail", "cell"), ("domainName", "bytes"), ("parentDomainName", "bytes"),
+                                 ("parentDomainAddress", "address"), ("ownerAddress", "address"), ("dtLastProlongation", "uint32"), ("dtExpires", "uint32")])
+WHOIS_DATA_TAIL = _getAbiParams([("registrationPrice", "uint128"), ("registrationType", "uint8"), ("lastRegResult", "uint8"), ("comment", "bytes"), ("dtCreated", "uint32"),
+                                 ("totalOwnersNum", "uint128"), ("subdomainRegAccepted", "uint128"), ("subdomainRegDenied", "uint128"), ("totalFeesCollected", "uint128")])
+
+def _decodeBoc(everClient: TonClient, params, boc: str):
+    return everClient.abi.decode_boc(params=ParamsOfDecodeBoc(params=params, boc=boc, allow_partial=True)).data
+
+# "data" is the "data" field of an account (not the whole account BOC)
+def decodeWhoisFromData(data: str, everClient: TonClient = None):
+    everClient = getOfflineClient() if everClient is None else everClient
+    root       = _decodeBoc(everClient, WHOIS_DATA_ROOT, data)
+    whois      = _decodeBoc(everClient, WHOIS_DATA_HEAD, root["_whoisInfo"])
+    whois.update(_decodeBoc(everClient, WHOIS_DATA_TAIL, whois.pop("_tail")))
+    return whois
+
+# Whois of many domains from one bulk account query, {address: whois}; "" for accounts that are not active
+# "cacheBocs" = False keeps fetched BOCs out of BOC_CACHE (bulk exports)
+def getWhoisMany(everClient: TonClient, addresses, contractName: str = "DnsRecord", cacheBocs: bool = True):
+
+    fields   = "data, acc_type" + (", boc, last_trans_lt" if cacheBocs else "")
+    accounts = fetchAccounts(contracts=addresses, fields=fields, everClient=everClient)
+
+    result = {}
+    for address in addresses:
+        account = accounts.get(address)
+        if account is None or account["acc_type"] != 1 or account["data"] is None:
+            result[address] = ""
+            continue
+        if cacheBocs:
+            BOC_CACHE.put(address, account["boc"], account["last_trans_lt"])
+        result[address] = decodeWhoisFromData(account["data"])
+    return result
+
+def resolveDomainChains(everClient: TonClient, names, contractName: str = "DnsRecord"):
+
+    ancestors = {name: getDomainAncestors(name) for name in names}
+    allNames  = list(dict.fromkeys(ancestor for chain in ancestors.values() for ancestor in chain))
+    addresses = dict(zip(allNames, calculateDomainAddresses(allNames, contractName)))
+    whois     = getWhoisMany(everClient=everClient, addresses=list(addresses.values()), contractName=contractName)
+
+    return {name: [{"NAME": ancestor, "ADDRESS": addresses[ancestor], "WHOIS": whois[addresses[ancestor]]} for ancestor in chain] for (name, chain) in ancestors.items()}
+
+def resolveDomainChain(everClient: TonClient, name: str, contractName: str = "DnsRecord"):
+    return resolveDomainChains(everClient=everClient, names=[name], contractName=contractName)[name]
+
+# Expected parent decision for "ownerAddress" claiming the last name in "chain" with "value" attached;
+# NONE if the parent is not deployed (registration request bounces). "value" reaching the parent is
+# slightly less than attached to "claimExpired" (forward fees), so MONEY results close to the limit are approximate.
+def predictRegistration(chain, ownerAddress: str, value: int):
+
+    if len(chain) == 1:
+        return REG_RESULT.APPROVED
+
+    parent = chain[-2]["WHOIS"]
+    if parent == "":
+        return REG_RESULT.NONE
+
+    regType = int(parent["registrationType"])
+    if regType == REG_TYPE.FFA:
+        return REG_RESULT.APPROVED
+    if regType == REG_TYPE.MONEY:
+        return REG_RESULT.APPROVED if value >= int(parent["registrationPrice"]) + REGISTRATION_MIN_FEE else REG_RESULT.NOT_ENOUGH_MONEY
+    if regType == REG_TYPE.OWNER:
+        return REG_RESULT.APPROVED if ownerAddress == parent["ownerAddress"] else REG_RESULT.DENIED
+    return REG_RESULT.DENIED
+
+# ==============================================================================
+# WHOIS RECORDS
+# "getWhois" returns the SDK dict of strings; DnsWhois mirrors "struct DnsWhois" in IDnsRecord.sol with ints,
+# REG_TYPE/REG_RESULT enums and raw bytes that are decoded to text only when read. DnsWhoisArray keeps many
+# records in parallel typed arrays (uint128 as two uint64 halves), addresses are interned.
+DNS_WHOIS_ADDRESS_FIELDS = ("endpointAddress", "parentDomainAddress", "ownerAddress")
+DNS_WHOIS_BYTES_FIELDS   = ("domainName", "parentDomainName", "comment")
+DNS_WHOIS_INT_FIELDS     = {"segmentsCount": "B", "dtLastProlongation": "L", "dtExpires": "L", "registrationType": "B", "lastRegResult": "B", "dtCreated": "L"}
+DNS_WHOIS_UINT128_FIELDS = ("registrationPrice", "totalOwnersNum", "subdomainRegAccepted", "subdomainRegDenied", "totalFeesCollected")
+DNS_WHOIS_ENUM_FIELDS    = {"registrationType": REG_TYPE, "lastRegResult": REG_RESULT}
+UINT64_MASK              = (1 << 64) - 1
+
+class DnsWhois(object):
+    __slots__ = ("endpointAddress", "segmentsCount", "_domainName", "_parentDomainName", "parentDomainAddress", "ownerAddress", "dtLastProlongation", "dtExpires",
+                 "registrationPrice", "registrationType", "lastRegResult", "_comment", "dtCreated", "totalOwnersNum", "subdomainRegAccepted", "subdomainRegDenied", "totalFeesCollected")
+
+    def __init__(self, **fields):
+        for field in DNS_WHOIS_ADDRESS_FIELDS:
+            setattr(self, field, sys.intern(fields[field]))
+        for field in DNS_WHOIS_BYTES_FIELDS:
+            setattr(self, "_" + field, fields[field])
+        for field in list(DNS_WHOIS_INT_FIELDS.keys()) + list(DNS_WHOIS_UINT128_FIELDS):
+            setattr(self, field, int(fields[field]))
+        for (field, enum) in DNS_WHOIS_ENUM_FIELDS.items():
+            setattr(self, field, enum(getattr(self, field)))
+
+    # From "getWhois" / "decodeWhoisFromData" output
+    @classmethod
+    def fromDict(cls, whois):
+        fields = dict(whois)
+        for field in DNS_WHOIS_BYTES_FIELDS:
+            fields[field] = bytes.fromhex(whois[field])
+        return cls(**fields)
+
+    # Back to the "getWhois" shape
+    def toDict(self):
+        result = {field: getattr(self, field) for field in DNS_WHOIS_ADDRESS_FIELDS}
+        result.update({field: getattr(self, "_" + field).hex() for field in DNS_WHOIS_BYTES_FIELDS})
+        result.update({field: str(int(getattr(self, field))) for field in list(DNS_WHOIS_INT_FIELDS.keys()) + list(DNS_WHOIS_UINT128_FIELDS)})
+        return {field: result[field] for field in WHOIS_FIELD_NAMES}
+
+    @property
+    def domainName(self):
+        return self._domainName.decode("utf-8", errors="replace")
+
+    @property
+    def parentDomainName(self):
+        return self._parentDomainName.decode("utf-8", errors="replace")
+
+    @property
+    def comment(self):
+        return self._comment.decode("utf-8", errors="replace")
+
+    def getRawBytes(self, field: str):
+        return getattr(self, "_" + field)
+
+    # Same as "isExpired()" and "canProlongate()" in DnsRecordBase.sol for block time "now"
+    def isExpired(self, now: int):
+        return now > self.dtExpires
+
+    def canProlongate(self, now: int):
+        return self.dtExpires - TEN_DAYS <= now <= self.dtExpires
+
+    def __eq__(self, other):
+        return isinstance(other, DnsWhois) and all(getattr(self, field) == getattr(other, field) for field in DnsWhois.__slots__)
+
+    def __repr__(self):
+        return "DnsWhois({})".format(", ".join("{}={!r}".format(field, getattr(self, field)) for field in WHOIS_FIELD_NAMES))
+
+WHOIS_FIELD_NAMES = [field.lstrip("_") for field in DnsWhois.__slots__]
+
+class DnsWhoisArray(object):
+    def __init__(self):
+        self.ADDRESSES = []
+        self.INDEX     = {} # address -> position
+        self.COLUMNS   = {}
+        for field in DNS_WHOIS_ADDRESS_FIELDS + DNS_WHOIS_BYTES_FIELDS:
+            self.COLUMNS[field] = []
+        for (field, typeCode) in DNS_WHOIS_INT_FIELDS.items():
+            self.COLUMNS[field] = array.array(typeCode)
+        for field in DNS_WHOIS_UINT128_FIELDS:
+            self.COLUMNS[field] = (array.array("Q"), array.array("Q"))
+
+    def __len__(self):
+        return len(self.ADDRESSES)
+
+    def __contains__(self, address: str):
+        return address in self.INDEX
+
+    # "whois" is DnsWhois or a "getWhois" dict; an address that is already there is overwritten
+    def append(self, address: str, whois):
+        whois = whois if isinstance(whois, DnsWhois) else DnsWhois.fromDict(whois)
+        if address in self.INDEX:
+            self._set(self.INDEX[address], whois)
+            return
+        self.INDEX[address] = len(self.ADDRESSES)
+        self.ADDRESSES.append(sys.intern(address))
+        for field in DNS_WHOIS_ADDRESS_FIELDS:
+            self.COLUMNS[field].append(getattr(whois, field))
+        for field in DNS_WHOIS_BYTES_FIELDS:
+            self.COLUMNS[field].append(whois.getRawBytes(field))
+        for field in DNS_WHOIS_INT_FIELDS.keys():
+            self.COLUMNS[field].append(getattr(whois, field))
+        for field in DNS_WHOIS_UINT128_FIELDS:
+            value = getattr(whois, field)
+            self.COLUMNS[field][0].append(value >> 64)
+            self.COLUMNS[field][1].append(value & UINT64_MASK)
+
+    def _set(self, i: int, whois: DnsWhois):
+        for field in DNS_WHOIS_ADDRESS_FIELDS:
+            self.COLUMNS[field][i] = getattr(whois, field)
+        for field in DNS_WHOIS_BYTES_FIELDS:
+            self.COLUMNS[field][i] = whois.getRawBytes(field)
+        for field in DNS_WHOIS_INT_FIELDS.keys():
+            self.COLUMNS[field][i] = getattr(whois, field)
+        for field in DNS_WHOIS_UINT128_FIELDS:
+            value = getattr(whois, field)
+            self.COLUMNS[field][0][i] = value >> 64
+            self.COLUMNS[field][1][i] = value & UINT64_MASK
+
+    def __getitem__(self, i: int):
+        fields = {field: self.COLUMNS[field][i] for field in DNS_WHOIS_ADDRESS_FIELDS + DNS_WHOIS_BYTES_FIELDS + tuple(DNS_WHOIS_INT_FIELDS.keys())}
+        for field in DNS_WHOIS_UINT128_FIELDS:
+            (high, low)   = self.COLUMNS[field]
+            fields[field] = (high[i] << 64) | low[i]
+        return DnsWhois(**fields)
+
+    def __iter__(self):
+        for i in range(len(self.ADDRESSES)):
+            yield self[i]
+
+    # DnsWhois of "address" or "" if it is not there
+    def get(self, address: str):
+        return self[self.INDEX[address]] if address in self.INDEX else ""
+
+    # All values of one field in insertion order; ints for number fields, raw bytes for bytes fields
+    def getColumn(self, field: str):
+        if field in DNS_WHOIS_UINT128_FIELDS:
+            (high, low) = self.COLUMNS[field]
+            return [(h << 64) | l for (h, l) in zip(high, low)]
+        return list(self.COLUMNS[field])
+
+# DnsWhoisArray of the deployed domains among "addresses"
+def getWhoisRecords(everClient: TonClient, addresses, contractName: str = "DnsRecord", cacheBocs: bool = True):
+    records = DnsWhoisArray()
+    for (address, whois) in getWhoisMany(everClient=everClient, addresses=addresses, contractName=contractName, cacheBocs=cacheBocs).items():
+        if whois != "":
+            records.append(address, whois)
+    return records
+
+# ==============================================================================
+#
 class DnsRecord(BaseContract):
     
     def __init__(self, everClient: TonClient, name: str, ownerAddress: str, forceFeeReturnToOwner: bool = False, signer: Signer = None):
         genSigner = generateSigner() if signer is None else signer
         self.CONSTRUCTOR = {"ownerAddress": ownerAddress, "forceFeeReturnToOwner":forceFeeReturnToOwner}
         self.INITDATA    = {"_domainName":stringToHex(name), "_domainCode":getCodeFromTvc("../bin/DnsRecord.tvc")}
+        self.ADDRESS     = calculateDomainAddresses([name])[0]
+        self.NAME        = name
         BaseContract.__init__(self, everClient=everClient, contractName="DnsRecord", pubkey=ZERO_PUBKEY, signer=genSigner)
 
+    # Invalid names are refused locally, contract would fail with the same error code anyway
+    def deploy(self):
+        if not validateDomainName(self.NAME):
+            return getInvalidDomainNameResult(self.NAME)
+        return BaseContract.deploy(self)
+
     #========================================
     #
     def changeEndpointAddress(self, msig: Multisig, newAddress: str):
@@ -40,6 +364,8 @@ class DnsRecord(BaseContract):
         return result
 
     def claimExpired(self, msig: Multisig, newOwnerAddress: str, forceFeeReturnToOwner: bool = False, value: int = EVER):
+        if not validateDomainName(self.NAME):
+            return getInvalidDomainNameResult(self.NAME)
         result = self._callFromMultisig(msig=msig, functionName="claimExpired", functionParams={"newOwnerAddress":newOwnerAddress, "forceFeeReturnToOwner":forceFeeReturnToOwner}, value=value, flags=1)
         return result
 
@@ -65,9 +391,37 @@ class DnsRecord(BaseContract):
         result = self._run(functionName="getWhois", functionParams={})
         return result
 
+    # DnsWhois instead of the dict of strings, "" if the domain is not deployed
+    def getWhoisRecord(self):
+        result = self.getWhois()
+        return result if result == "" else DnsWhois.fromDict(result)
+
     def getEndpointAddress(self):
         result = self._run(functionName="getEndpointAddress", functionParams={})
         return result
 
+    # Whois, endpoint and expiration state from a single account state
+    def getSnapshot(self):
+        result = self.runMany(functionsArray=[("getWhois", {}), ("getEndpointAddress", {}), ("isExpired", {}), ("canProlongate", {})])
+        return result
+
+# ==============================================================================
+# Same API with coroutines, "msig" is AsyncMultisig
+class AsyncDnsRecord(AsyncBaseContract, DnsRecord):
+
+    async def deploy(self):
+        if not validateDomainName(self.NAME):
+            return getInvalidDomainNameResult(self.NAME)
+        return await AsyncBaseContract.deploy(self)
+
+    async def claimExpired(self, msig: Multisig, newOwnerAddress: str, forceFeeReturnToOwner: bool = False, value: int = EVER):
+        if not validateDomainName(self.NAME):
+            return getInvalidDomainNameResult(self.NAME)
+        return await self._callFromMultisig(msig=msig, functionName="claimExpired", functionParams={"newOwnerAddress":newOwnerAddress, "forceFeeReturnToOwner":forceFeeReturnToOwner}, value=value, flags=1)
+
+    async def getWhoisRecord(self):
+        result = await self.getWhois()
+        return result if result == "" else DnsWhois.fromDict(result)
+
 # ==============================================================================
 # 
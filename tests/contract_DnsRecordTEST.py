@@ -4,6 +4,8 @@
 #
 import ever_utils
 from   ever_utils import *
+from   contract_DnsRecord import calculateDomainAddresses, DnsWhois
+from   ever_utils_async import AsyncBaseContract
 
 class DnsRecordTEST(BaseContract):
     
@@ -11,6 +13,7 @@ class DnsRecordTEST(BaseContract):
         genSigner = generateSigner() if signer is None else signer
         self.CONSTRUCTOR = {"ownerAddress": ownerAddress, "forceFeeReturnToOwner":forceFeeReturnToOwner}
         self.INITDATA    = {"_domainName":stringToHex(name), "_domainCode":getCodeFromTvc("../bin/DnsRecordTEST.tvc")}
+        self.ADDRESS     = calculateDomainAddresses([name], contractName="DnsRecordTEST")[0]
         BaseContract.__init__(self, everClient=everClient, contractName="DnsRecordTEST", pubkey=ZERO_PUBKEY, signer=genSigner)
 
     #========================================
@@ -73,9 +76,27 @@ class DnsRecordTEST(BaseContract):
         result = self._run(functionName="getWhois", functionParams={})
         return result
 
+    # DnsWhois instead of the dict of strings, "" if the domain is not deployed
+    def getWhoisRecord(self):
+        result = self.getWhois()
+        return result if result == "" else DnsWhois.fromDict(result)
+
     def getEndpointAddress(self):
         result = self._run(functionName="getEndpointAddress", functionParams={})
         return result
 
+    # Whois, endpoint and expiration state from a single account state
+    def getSnapshot(self):
+        result = self.runMany(functionsArray=[("getWhois", {}), ("getEndpointAddress", {}), ("isExpired", {}), ("canProlongate", {})])
+        return result
+
+# ==============================================================================
+# Same API with coroutines, "msig" is AsyncMultisig
+class AsyncDnsRecordTEST(AsyncBaseContract, DnsRecordTEST):
+
+    async def getWhoisRecord(self):
+        result = await self.getWhois()
+        return result if result == "" else DnsWhois.fromDict(result)
+
 # ==============================================================================
 # 
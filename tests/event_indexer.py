@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+# ==============================================================================
+# EVENT INDEXER
+# Streams external outbound messages of known DnsRecord addresses through a "messages" subscription, decodes
+# events with the DnsRecord ABI and stores them in SQLite. Every address keeps the "lt" of its own last indexed
+# message and every chunk of addresses a "created_at" cursor, so after a restart "poll" catches up from where
+# indexing stopped before streaming goes on.
+#
+# Usage:
+#   indexer = EventIndexer(everClient=getEverClient(testnet=False), dbPath="events.db")
+#   indexer.addDomains(["org", "org/kek"])
+#   indexer.run(interval=5)
+import sqlite3
+import threading
+import json
+import ever_utils
+from   ever_utils import *
+from   contract_DnsRecord import calculateDomainAddresses
+
+# ==============================================================================
+#
+EVENT_TABLES = """
+CREATE TABLE IF NOT EXISTS domains (
+    address    TEXT PRIMARY KEY,
+    domain     TEXT,
+    last_lt    INTEGER NOT NULL DEFAULT 0,
+    scanned_at INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS events (
+    id         TEXT PRIMARY KEY,
+    address    TEXT    NOT NULL,
+    domain     TEXT,
+    event      TEXT    NOT NULL,
+    lt         INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    dt         INTEGER,
+    owner      TEXT,
+    params     TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_domain  ON events(domain, lt);
+CREATE INDEX IF NOT EXISTS events_address ON events(address, lt);
+CREATE INDEX IF NOT EXISTS events_owner   ON events(owner, dt);
+CREATE INDEX IF NOT EXISTS events_dt      ON events(dt);
+"""
+
+# Events that carry an owner address and the parameter holding it
+EVENT_OWNER_PARAMS = {"registrationResult": "ownerAddress", "ownerChanged": "newOwner"}
+MESSAGE_FIELDS     = "id, src, body, created_at, created_lt(format:DEC)"
+SCAN_MARGIN        = 60 # seconds re-read before a chunk cursor, blocks of other shards can come in late
+
+# ==============================================================================
+#
+class EventIndexer(object):
+    def __init__(self, everClient: TonClient, dbPath: str, contractName: str = "DnsRecord"):
+        self.EVERCLIENT    = everClient
+        self.CONTRACT_NAME = contractName
+        self.DB            = sqlite3.connect(dbPath)
+        self.DB.executescript(EVENT_TABLES)
+        self.PENDING       = []   # messages from the subscription, indexed by "processPending"
+        self.CHUNKS        = []   # address chunks, one subscription each
+        self.SUBSCRIPTIONS = []
+        self.LOCK          = threading.Lock()
+        self.WAKEUP        = threading.Event()
+
+    def close(self):
+        self.unsubscribe()
+        self.DB.close()
+
+    # ========================================
+    #
+    def addAddresses(self, addresses, domain: str = None):
+        self.DB.executemany("INSERT OR IGNORE INTO domains(address, domain) VALUES (?, ?)", [(address, domain) for address in addresses])
+        self.DB.commit()
+        self._onAdded()
+
+    def addDomains(self, names):
+        addresses = calculateDomainAddresses(names, self.CONTRACT_NAME)
+        self.DB.executemany("INSERT OR IGNORE INTO domains(address, domain) VALUES (?, ?)", list(zip(addresses, names)))
+        self.DB.commit()
+        self._onAdded()
+
+    # Addresses added while streaming are subscribed to and their history is read right away
+    def _onAdded(self):
+        if len(self.SUBSCRIPTIONS) > 0:
+            self.subscribe()
+            self.poll()
+
+    def _getDomains(self):
+        rows = self.DB.execute("SELECT address, domain, last_lt, scanned_at FROM domains ORDER BY address").fetchall()
+        return {address: {"DOMAIN": domain, "LT": lastLt, "SCANNED_AT": scannedAt} for (address, domain, lastLt, scannedAt) in rows}
+
+    # ========================================
+    # Catch-up reads messages of one chunk of addresses created since the chunk cursor (minus SCAN_MARGIN) by
+    # "created_lt" pages; messages at or below the last "lt" of their own address are skipped. "lt" is counted per
+    # account, so it only orders messages of one address and is never compared across addresses. Different accounts
+    # can share an "lt", so a full page of one "lt" is re-read with a bigger limit. Once the last page is read, the
+    # chunk cursor of all its addresses moves to the newest "created_at" seen, quiet addresses included.
+    def _fetchMessages(self, addresses, since: int, fromLt: int, limit: int):
+        paramsCollection = ParamsOfQueryCollection(
+        collection="messages", result=MESSAGE_FIELDS, limit=limit,
+        filter={"src":{"in":addresses}, "msg_type":{"eq":2}, "created_at":{"ge":since}, "created_lt":{"ge":hex(fromLt)}},
+        order=[OrderBy(path="created_lt", direction=SortDirection.ASC)])
+
+        result = self.EVERCLIENT.net.query_collection(params=paramsCollection)
+        return result.result
+
+    def _decodeEvent(self, msg):
+        (abi, decoded) = decodeMessageBody(msg["body"], [self.CONTRACT_NAME])
+        if decoded == "" or decoded.body_type != MessageBodyType.EVENT:
+            return None
+        return decoded
+
+    # Messages of one address have to come in "lt" order, the catch-up pages and the subscription both keep it
+    def _indexMessages(self, domains, messages):
+        rows = []
+        for msg in messages:
+            lt     = int(msg["created_lt"])
+            domain = domains[msg["src"]]
+            if lt <= domain["LT"]:
+                continue
+            domain["LT"] = lt
+
+            decoded = self._decodeEvent(msg)
+            if decoded is None:
+                continue
+            owner = decoded.value.get(EVENT_OWNER_PARAMS[decoded.name]) if decoded.name in EVENT_OWNER_PARAMS else None
+            dt    = int(decoded.value["dt"]) if "dt" in decoded.value else None
+            rows.append((msg["id"], msg["src"], domain["DOMAIN"], decoded.name, lt, msg["created_at"], dt, owner, json.dumps(decoded.value)))
+        return rows
+
+    def _save(self, domains, rows):
+        self.DB.executemany("INSERT OR IGNORE INTO events(id, address, domain, event, lt, created_at, dt, owner, params) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.DB.executemany("UPDATE domains SET last_lt = ?, scanned_at = ? WHERE address = ?", [(domain["LT"], domain["SCANNED_AT"], address) for (address, domain) in domains.items()])
+        self.DB.commit()
+
+    def _indexChunk(self, domains):
+        addresses = list(domains.keys())
+        since     = max(min(domains[address]["SCANNED_AT"] for address in addresses) - SCAN_MARGIN, 0)
+        scannedAt = 0
+        fromLt    = 0
+        limit     = ever_utils.GRAPHQL_CHUNK
+        indexed   = 0
+
+        while True:
+            messages = self._fetchMessages(addresses, since, fromLt, limit)
+            if len(messages) == limit and int(messages[0]["created_lt"]) == int(messages[-1]["created_lt"]):
+                limit *= 2
+                continue
+
+            rows      = self._indexMessages(domains, messages)
+            scannedAt = max([scannedAt] + [int(msg["created_at"]) for msg in messages])
+            if len(messages) < limit:
+                for address in addresses:
+                    domains[address]["SCANNED_AT"] = max(domains[address]["SCANNED_AT"], scannedAt)
+
+            self._save(domains, rows)
+            indexed += len(rows)
+
+            if len(messages) < limit:
+                return indexed
+            fromLt = int(messages[-1]["created_lt"])
+            limit  = ever_utils.GRAPHQL_CHUNK
+
+    # Catches up with everything since the last call (or since the last run with the same database), returns number of events
+    def poll(self):
+        domains = self._getDomains()
+
+        indexed = 0
+        for chunk in ever_utils._splitChunks(list(domains.keys())):
+            indexed += self._indexChunk({address: domains[address] for address in chunk})
+        return indexed
+
+    # ========================================
+    # Subscription callbacks come from SDK threads, messages are only queued here and indexed in "processPending"
+    def _onMessage(self, responseData, responseType, loop):
+        if responseType != SubscriptionResponseType.OK:
+            return
+        with self.LOCK:
+            self.PENDING.append(responseData["result"])
+        self.WAKEUP.set()
+
+    def subscribe(self):
+        self.unsubscribe()
+        self.CHUNKS = ever_utils._splitChunks(list(self._getDomains().keys()))
+        for chunk in self.CHUNKS:
+            params = ParamsOfSubscribeCollection(collection="messages", filter={"src":{"in":chunk}, "msg_type":{"eq":2}}, result=MESSAGE_FIELDS)
+            self.SUBSCRIPTIONS.append(self.EVERCLIENT.net.subscribe_collection(params=params, callback=self._onMessage))
+
+    def unsubscribe(self):
+        for subscription in self.SUBSCRIPTIONS:
+            self.EVERCLIENT.net.unsubscribe(params=subscription)
+        self.SUBSCRIPTIONS = []
+
+    # Indexes queued messages; a streamed message moves the cursor of its whole chunk, like the last catch-up page
+    def processPending(self):
+        with self.LOCK:
+            messages     = self.PENDING
+            self.PENDING = []
+
+        domains  = self._getDomains()
+        messages = [msg for msg in messages if msg["src"] in domains]
+        if len(messages) == 0:
+            return 0
+
+        rows    = self._indexMessages(domains, messages)
+        created = {}
+        for msg in messages:
+            created[msg["src"]] = max(created.get(msg["src"], 0), int(msg["created_at"]))
+        for chunk in self.CHUNKS:
+            scannedAt = max([created.get(address, 0) for address in chunk])
+            for address in chunk:
+                domains[address]["SCANNED_AT"] = max(domains[address]["SCANNED_AT"], scannedAt)
+
+        self._save(domains, rows)
+        return len(rows)
+
+    # Subscribes first so nothing is missed while catching up, then indexes streamed messages as they come
+    def run(self, interval: float = 5, iterations: int = 0):
+        self.subscribe()
+        self.poll()
+
+        iteration = 0
+        while iterations <= 0 or iteration < iterations:
+            self.WAKEUP.wait(interval)
+            self.WAKEUP.clear()
+            self.processPending()
+            iteration += 1
+
+    # ========================================
+    # Events ordered by "lt", all filters are optional; "since"/"until" are event "dt" timestamps
+    def getEvents(self, domain: str = None, owner: str = None, event: str = None, since: int = None, until: int = None):
+        conditions = []
+        values     = []
+        for (condition, value) in (("domain = ?", domain), ("owner = ?", owner), ("event = ?", event), ("dt >= ?", since), ("dt <= ?", until)):
+            if value is not None:
+                conditions.append(condition)
+                values.append(value)
+
+        query = "SELECT id, address, domain, event, lt, created_at, dt, owner, params FROM events"
+        query = query + (" WHERE " + " AND ".join(conditions) if len(conditions) > 0 else "") + " ORDER BY lt"
+
+        result = []
+        for (msgId, address, domain, eventName, lt, createdAt, dt, owner, params) in self.DB.execute(query, values):
+            result.append({"ID": msgId, "ADDRESS": address, "DOMAIN": domain, "EVENT": eventName, "LT": lt, "CREATED_AT": createdAt, "DT": dt, "OWNER": owner, "PARAMS": json.loads(params)})
+        return result
+
+# ==============================================================================
+#
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+
+# ==============================================================================
+# LOCAL NETWORK
+# In-process replacement for a node. Account BOCs are kept in memory, every message is run with
+# "tvm.run_executor" and internal out-messages are routed between local accounts until the queue drains,
+# so "send_message" returns with the whole message tree already processed. LocalClient offers the parts
+# of TonClient that ever_utils uses ("processing", "net" queries and transaction trees, "tvm" with local
+# block time) on top of LocalNetwork, so BaseContract and the contract wrappers work unchanged.
+# External messages to the TON OS SE giver address are served locally, "giverGive" works as usual.
+# "net.subscribe_collection" is emulated for messages and accounts: callbacks run on the sending thread
+# once the message tree is processed. LocalAsyncClient is the same client for "ever_utils_async".
+#
+# Usage:
+#   everClient = LocalClient()
+#   msig       = Multisig(everClient=everClient)
+#   giverGive(everClient, msig.ADDRESS, EVER)
+#   msig.deploy()
+import re
+import time
+import hashlib
+import threading
+import collections
+import operator
+import ever_utils
+from   ever_utils import *
+
+# ==============================================================================
+#
+LOCAL_SHARD_BLOCK_ID = "local"
+LOCAL_LT_STEP        = 1000 # lt distance between transactions, leaves room for out-messages
+LOCAL_MESSAGE_EXPIRE = 40   # seconds, SDK default "message_expiration_timeout"
+
+MSG_TYPE_INTERNAL    = 0
+MSG_TYPE_EXTERNAL_IN = 1
+ACC_TYPE_NON_EXIST   = 3
+SKIPPED_EXIT_CODE    = -10 # "exit_code" a node reports for a skipped compute phase (e.g. no state), executor leaves it null
+
+# ==============================================================================
+# Just enough of GraphQL for ever_utils: "result" field lists with "{}" sub-selections and "(format:DEC)",
+# filters with comparison operators (numbers can be given as "0x..." strings), "order" and "limit".
+FIELD_REGEX   = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)\s*(?:\(\s*format\s*:\s*(\w+)\s*\))?")
+FILTER_OPS    = {"eq": operator.eq, "ne": operator.ne, "gt": operator.gt, "ge": operator.ge, "lt": operator.lt, "le": operator.le,
+                 "in": lambda value, expected: value in expected, "notIn": lambda value, expected: value not in expected}
+
+def _parseFields(fields: str, pos: int = 0):
+    result = []
+    while pos < len(fields):
+        if fields[pos] in " ,\t\r\n":
+            pos += 1
+        elif fields[pos] == "}":
+            return (result, pos + 1)
+        else:
+            match     = FIELD_REGEX.match(fields, pos)
+            pos       = match.end()
+            subFields = None
+            while pos < len(fields) and fields[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(fields) and fields[pos] == "{":
+                (subFields, pos) = _parseFields(fields, pos + 1)
+            result.append((match.group(1), match.group(2), subFields))
+    return (result, pos)
+
+def _projectRecord(record, fieldsTree):
+    result = {}
+    for (name, fieldFormat, subFields) in fieldsTree:
+        value = record.get(name)
+        if subFields is not None and value is not None:
+            value = [_projectRecord(item, subFields) for item in value] if isinstance(value, list) else _projectRecord(value, subFields)
+        elif fieldFormat == "DEC" and isinstance(value, str) and value.lstrip("-").startswith("0x"):
+            value = str(int(value, 16))
+        result[name] = value
+    return result
+
+def _getComparable(value):
+    if isinstance(value, str) and value.lstrip("-").startswith("0x"):
+        return int(value, 16)
+    return value
+
+def _matchesFilter(record, filterDict):
+    for (field, conditions) in filterDict.items():
+        value = record.get(field) if record is not None else None
+        if not all(op in FILTER_OPS for op in conditions.keys()):
+            if not _matchesFilter(value, conditions):
+                return False
+            continue
+        for (op, expected) in conditions.items():
+            expected = [_getComparable(item) for item in expected] if op in ("in", "notIn") else _getComparable(expected)
+            if value is None or not FILTER_OPS[op](_getComparable(value), expected):
+                return False
+    return True
+
+# ==============================================================================
+#
+class LocalNetwork(object):
+    def __init__(self):
+        # No network in the config: signing doesn't ask for a signature ID and the default blockchain config is used
+        self.CLIENT        = TonClient(config=ClientConfig(network=NetworkConfig()))
+        self.GIVER_ADDRESS = Giver(everClient=None).ADDRESS
+        self.ACCOUNTS      = {} # address -> {"BOC", "PARSED"}
+        self.MESSAGES      = {} # id -> parsed message + "boc", "src_transaction", "dst_transaction"
+        self.TRANSACTIONS  = {} # id -> transaction from "run_executor"
+        self.TX_BY_IN_MSG  = {} # message id -> transaction id
+        self.RESULTS       = {} # external message id -> ResultOfRunExecutor or TonException
+        self.LT            = 0
+        self.TIME_SHIFT    = 0
+        self.SUBSCRIPTIONS = {} # handle -> (collection, fields tree, filter, callback)
+        self.HANDLE        = 0
+        self.CHANGES       = [] # (collection, message or account address) of the message tree being processed
+        self.LOCK          = threading.RLock()
+
+    # ========================================
+    # Block time of new transactions and getters; "advanceTime" moves it without waiting
+    def getNow(self):
+        return int(time.time()) + self.TIME_SHIFT
+
+    def advanceTime(self, seconds: int):
+        with self.LOCK:
+            self.TIME_SHIFT += seconds
+
+    # ========================================
+    #
+    def _addMessage(self, boc: str, srcTransactionId: str = None):
+        message = self.CLIENT.boc.parse_message(params=ParamsOfParse(boc=boc)).parsed
+        message["boc"]             = boc
+        message["src_transaction"] = {"id": srcTransactionId} if srcTransactionId is not None else None
+        message["dst_transaction"] = None
+        self.MESSAGES[message["id"]] = message
+        self.CHANGES.append(("messages", message))
+        return message
+
+    def _getAccount(self, address: str):
+        account = self.ACCOUNTS.get(address)
+        if account is None:
+            return None
+        if account["PARSED"] is None:
+            account["PARSED"] = self.CLIENT.boc.parse_account(params=ParamsOfParse(boc=account["BOC"])).parsed
+        return account["PARSED"]
+
+    def _execute(self, message, abi):
+        account = self.ACCOUNTS.get(message["dst"])
+        self.LT += LOCAL_LT_STEP
+
+        params = ParamsOfRunExecutor(
+            message=message["boc"], account=AccountForExecutor.Account(boc=account["BOC"]) if account is not None else AccountForExecutor.NoAccount(),
+            execution_options=ExecutionOptions(block_time=self.getNow(), block_lt=self.LT, transaction_lt=self.LT), abi=abi,
+            # Failed external messages are rejected like on a node (TonException), failed internal ones are aborted transactions
+            skip_transaction_check=message["msg_type"] != MSG_TYPE_EXTERNAL_IN, return_updated_account=True)
+        result  = self.CLIENT.tvm.run_executor(params=params)
+        compute = result.transaction.get("compute") or {}
+        if compute.get("skipped_reason") is not None and compute.get("exit_code") is None:
+            compute["exit_code"] = SKIPPED_EXIT_CODE
+
+        if result.transaction["end_status"] == ACC_TYPE_NON_EXIST:
+            self.ACCOUNTS.pop(message["dst"], None)
+        else:
+            self.ACCOUNTS[message["dst"]] = {"BOC": result.account, "PARSED": None}
+        self.CHANGES.append(("accounts", message["dst"]))
+        return result
+
+    # "sendGrams" of the giver becomes a non-bounceable internal transfer from the giver address
+    def _executeGiver(self, message):
+        decoded = self.CLIENT.abi.decode_message(params=ParamsOfDecodeMessage(abi=getAbi("local_giver"), message=message["boc"]))
+        params  = ParamsOfEncodeInternalMessage(value=str(decoded.value["amount"]), address=decoded.value["dest"], src_address=self.GIVER_ADDRESS, bounce=False)
+        credit  = self.CLIENT.abi.encode_internal_message(params=params).message
+        self.LT += LOCAL_LT_STEP
+
+        transaction = {"id": hashlib.sha256(message["id"].encode()).hexdigest(), "in_msg": message["id"], "out_msgs": [], "outmsg_cnt": 1, "account_addr": self.GIVER_ADDRESS,
+                       "aborted": False, "status": 3, "status_name": "Finalized", "end_status": 1, "end_status_name": "Active", "lt": hex(self.LT), "now": self.getNow(),
+                       "compute": {"success": True, "exit_code": 0, "exit_arg": None, "skipped_reason": None, "skipped_reason_name": None, "gas_fees": "0x0"},
+                       "total_fees": "0x0", "storage": {"storage_fees_collected": "0x0"}}
+        fees = TransactionFees(in_msg_fwd_fee=0, storage_fee=0, gas_fee=0, out_msgs_fwd_fee=0, total_account_fees=0, total_output=int(decoded.value["amount"]), ext_in_msg_fee=0, total_fwd_fees=0, account_fees=0)
+        return ResultOfRunExecutor(transaction=transaction, out_messages=[credit], account="", fees=fees)
+
+    # Runs an external message and every internal message it causes; the external message result
+    # (or its TonException) is kept for "waitForTransaction". Subscribers are notified after the lock is released
+    def sendMessage(self, boc: str, abi = None):
+        with self.LOCK:
+            messageId    = self._runMessageTree(boc, abi)
+            changes      = self.CHANGES
+            self.CHANGES = []
+        self._notify(changes)
+        return messageId
+
+    def _runMessageTree(self, boc: str, abi):
+        root  = self._addMessage(boc)
+        queue = collections.deque([root])
+        while len(queue) > 0:
+            message = queue.popleft()
+            try:
+                if message["msg_type"] == MSG_TYPE_EXTERNAL_IN and message["dst"] == self.GIVER_ADDRESS:
+                    result = self._executeGiver(message)
+                else:
+                    result = self._execute(message, abi if message is root else None)
+            except TonException as ever:
+                self.RESULTS[root["id"]] = ever
+                return root["id"]
+
+            transaction = result.transaction
+            self.TRANSACTIONS[transaction["id"]] = transaction
+            self.TX_BY_IN_MSG[message["id"]]     = transaction["id"]
+            message["dst_transaction"]           = {"id": transaction["id"]}
+            if message is root:
+                self.RESULTS[root["id"]] = result
+
+            outMessages = [self._addMessage(outBoc, transaction["id"]) for outBoc in result.out_messages]
+            transaction["out_msgs"] = [outMessage["id"] for outMessage in outMessages]
+            queue.extend(outMessage for outMessage in outMessages if outMessage["msg_type"] == MSG_TYPE_INTERNAL)
+        return root["id"]
+
+    def waitForTransaction(self, boc: str):
+        messageId = self.CLIENT.boc.get_boc_hash(params=ParamsOfGetBocHash(boc=boc)).hash
+        with self.LOCK:
+            result = self.RESULTS[messageId]
+        if isinstance(result, TonException):
+            raise result
+        return ResultOfProcessMessage(transaction=result.transaction, out_messages=result.out_messages, fees=result.fees, decoded=result.decoded)
+
+    # ========================================
+    #
+    def _getRecords(self, collection: str, filterDict):
+        if collection == "accounts":
+            ids = None
+            if "id" in filterDict and set(filterDict["id"].keys()) <= {"eq", "in"}:
+                ids = filterDict["id"]["in"] if "in" in filterDict["id"] else [filterDict["id"]["eq"]]
+            return [self._getAccount(address) for address in (ids if ids is not None else list(self.ACCOUNTS.keys())) if address in self.ACCOUNTS]
+        if collection == "messages":
+            return list(self.MESSAGES.values())
+        if collection == "transactions":
+            return list(self.TRANSACTIONS.values())
+        raise ValueError("Unknown collection: {}".format(collection))
+
+    def queryCollection(self, collection: str, fields: str, filterDict = None, order = None, limit: int = None):
+        filterDict = {} if filterDict is None else filterDict
+        with self.LOCK:
+            records = [record for record in self._getRecords(collection, filterDict) if _matchesFilter(record, filterDict)]
+        for orderBy in reversed(order if order is not None else []):
+            records.sort(key=lambda record: _getComparable(record.get(orderBy.path)), reverse=orderBy.direction == SortDirection.DESC)
+
+        (fieldsTree, _) = _parseFields(fields)
+        return [_projectRecord(record, fieldsTree) for record in records[:limit if limit else None]]
+
+    # Every account is sent once per message tree, with its state after the whole tree
+    def subscribe(self, collection: str, fields: str, filterDict, callback):
+        (fieldsTree, _) = _parseFields(fields)
+        with self.LOCK:
+            self.HANDLE += 1
+            self.SUBSCRIPTIONS[self.HANDLE] = (collection, fieldsTree, {} if filterDict is None else filterDict, callback)
+            return self.HANDLE
+
+    def unsubscribe(self, handle: int):
+        with self.LOCK:
+            self.SUBSCRIPTIONS.pop(handle, None)
+
+    def _notify(self, changes):
+        with self.LOCK:
+            subscriptions = list(self.SUBSCRIPTIONS.values())
+            addresses     = dict.fromkeys(address for (collection, address) in changes if collection == "accounts")
+            records       = [("messages", message) for (collection, message) in changes if collection == "messages"]
+            records      += [("accounts", self._getAccount(address)) for address in addresses if address in self.ACCOUNTS]
+
+        for (collection, record) in records:
+            for (subscriptionCollection, fieldsTree, filterDict, callback) in subscriptions:
+                if subscriptionCollection == collection and _matchesFilter(record, filterDict):
+                    callback({"result": _projectRecord(record, fieldsTree)}, SubscriptionResponseType.OK, None)
+
+    def queryTransactionTree(self, inMsg: str):
+        messages     = []
+        transactions = []
+        with self.LOCK:
+            queue = collections.deque([inMsg])
+            while len(queue) > 0:
+                message       = self.MESSAGES[queue.popleft()]
+                transactionId = self.TX_BY_IN_MSG.get(message["id"])
+                messages.append(MessageNode(id=message["id"], bounce=message.get("bounce", False), src=message.get("src"), dst=message.get("dst"), value=message.get("value"),
+                                            src_transaction_id=message["src_transaction"]["id"] if message["src_transaction"] is not None else None, dst_transaction_id=transactionId))
+                if transactionId is None:
+                    continue
+                transaction = self.TRANSACTIONS[transactionId]
+                transactions.append(TransactionNode(id=transaction["id"], in_msg=message["id"], out_msgs=transaction["out_msgs"], account_addr=transaction["account_addr"],
+                                                    total_fees=transaction["total_fees"], aborted=transaction["aborted"], exit_code=transaction["compute"].get("exit_code")))
+                queue.extend(transaction["out_msgs"])
+        return ResultOfQueryTransactionTree(messages=messages, transactions=transactions)
+
+# ==============================================================================
+#
+class LocalProcessing(object):
+    def __init__(self, network: LocalNetwork):
+        self.NETWORK = network
+
+    def send_message(self, params: ParamsOfSendMessage):
+        self.NETWORK.sendMessage(params.message, params.abi)
+        return ResultOfSendMessage(shard_block_id=LOCAL_SHARD_BLOCK_ID, sending_endpoints=[])
+
+    def wait_for_transaction(self, params: ParamsOfWaitForTransaction):
+        return self.NETWORK.waitForTransaction(params.message)
+
+class LocalNet(object):
+    def __init__(self, network: LocalNetwork):
+        self.NETWORK = network
+
+    def query_collection(self, params: ParamsOfQueryCollection):
+        return ResultOfQueryCollection(result=self.NETWORK.queryCollection(params.collection, params.result, params.filter, params.order, params.limit))
+
+    def query_transaction_tree(self, params: ParamsOfQueryTransactionTree):
+        return self.NETWORK.queryTransactionTree(params.in_msg)
+
+    def subscribe_collection(self, params: ParamsOfSubscribeCollection, callback = None):
+        return ResultOfSubscribeCollection(handle=self.NETWORK.subscribe(params.collection, params.result, params.filter, callback))
+
+    def unsubscribe(self, params: ResultOfSubscribeCollection):
+        self.NETWORK.unsubscribe(params.handle)
+
+# Message headers follow the local block time: "time" and "expire" (given, or the ones SDK would take) are moved by TIME_SHIFT
+class LocalAbi(object):
+    def __init__(self, network: LocalNetwork):
+        self.NETWORK = network
+
+    def encode_message(self, params: ParamsOfEncodeMessage):
+        shift = self.NETWORK.TIME_SHIFT
+        if shift != 0 and params.call_set is not None:
+            header = params.call_set.header if params.call_set.header is not None else FunctionHeader()
+            now    = time.time()
+            header = FunctionHeader(time=(header.time if header.time is not None else int(now * 1000)) + shift * 1000,
+                                    expire=(header.expire if header.expire is not None else int(now) + LOCAL_MESSAGE_EXPIRE) + shift, pubkey=header.pubkey)
+            params = ParamsOfEncodeMessage(abi=params.abi, address=params.address, deploy_set=params.deploy_set, signer=params.signer, processing_try_index=params.processing_try_index,
+                                           call_set=CallSet(function_name=params.call_set.function_name, header=header, input=params.call_set.input))
+        return self.NETWORK.CLIENT.abi.encode_message(params=params)
+
+    def __getattr__(self, name):
+        return getattr(self.NETWORK.CLIENT.abi, name)
+
+# Getters see the local block time
+class LocalTvm(object):
+    def __init__(self, network: LocalNetwork):
+        self.NETWORK = network
+
+    def run_tvm(self, params: ParamsOfRunTvm):
+        if params.execution_options is None:
+            params.execution_options = ExecutionOptions(block_time=self.NETWORK.getNow())
+        return self.NETWORK.CLIENT.tvm.run_tvm(params=params)
+
+    def __getattr__(self, name):
+        return getattr(self.NETWORK.CLIENT.tvm, name)
+
+class LocalClient(object):
+    def __init__(self, network: LocalNetwork = None):
+        self.NETWORK    = LocalNetwork() if network is None else network
+        self.abi        = LocalAbi(self.NETWORK)
+        self.boc        = self.NETWORK.CLIENT.boc
+        self.crypto     = self.NETWORK.CLIENT.crypto
+        self.utils      = self.NETWORK.CLIENT.utils
+        self.tvm        = LocalTvm(self.NETWORK)
+        self.processing = LocalProcessing(self.NETWORK)
+        self.net        = LocalNet(self.NETWORK)
+
+    def destroy_context(self):
+        pass
+
+# Same modules with coroutine methods, like TonClient(is_async=True)
+class LocalAsyncModule(object):
+    def __init__(self, module):
+        self.MODULE = module
+
+    def __getattr__(self, name):
+        function = getattr(self.MODULE, name)
+        async def _call(*args, **kwargs):
+            return function(*args, **kwargs)
+        return _call
+
+class LocalAsyncClient(object):
+    def __init__(self, network: LocalNetwork = None):
+        client       = LocalClient(network)
+        self.NETWORK = client.NETWORK
+        for name in ("abi", "boc", "crypto", "utils", "tvm", "processing", "net"):
+            setattr(self, name, LocalAsyncModule(getattr(client, name)))
+
+    def destroy_context(self):
+        pass
+
+# ==============================================================================
+#
@@ -6,6 +6,11 @@ import base64
 import time
 import ast
 import os
+import json
+import threading
+import hashlib
+import collections
+from   concurrent.futures import ThreadPoolExecutor
 from   tonclient.client import *
 from   tonclient.types  import *
 from   datetime import datetime
@@ -13,34 +18,88 @@ from   pprint import pprint
 
 # ==============================================================================
 # 
-ZERO_PUBKEY   =   "0000000000000000000000000000000000000000000000000000000000000000"
-ZERO_ADDRESS  = "0:0000000000000000000000000000000000000000000000000000000000000000"
-EVER          = 1000000000
-DIME          =  100000000
-MSIG_GIVER    = ""
-USE_GIVER     = True
-THROW         = False
+ZERO_PUBKEY     =   "0000000000000000000000000000000000000000000000000000000000000000"
+ZERO_ADDRESS    = "0:0000000000000000000000000000000000000000000000000000000000000000"
+EVER            = 1000000000
+DIME            =  100000000
+MSIG_GIVER      = ""
+TVC_CACHE_DIR   = ""
+USE_GIVER       = True
+THROW           = False
+GRAPHQL_CHUNK   = 50
+BOC_CACHE_TTL   = 5
+BODY_CACHE_SIZE = 1024
+
+REPLAY_PROTECTION_EXIT_CODE = 52 # external message "time" header is not newer than the last accepted one
 
 # ==============================================================================
 # 
 def getApiEndpoints(testnet: bool):
     return ["https://net1.ton.dev", "https://net5.ton.dev"] if testnet else ["https://main2.ton.dev", "https://main3.ton.dev", "https://main4.ton.dev"]
 
-def getEverClient(testnet: bool, customServer: str = None):
+def getEverClient(testnet: bool, customServer: str = None, isAsync: bool = False):
     if customServer is not None:
-        return TonClient(config=ClientConfig(network=NetworkConfig(server_address=customServer)))
+        return CLIENT_MANAGER.getClient(serverAddress=customServer, isAsync=isAsync)
     
-    return TonClient(config=ClientConfig(network=NetworkConfig(endpoints=getApiEndpoints(testnet))))
+    return CLIENT_MANAGER.getClient(endpoints=getApiEndpoints(testnet), isAsync=isAsync)
+
+# ==============================================================================
+# CLIENT MANAGER
+# One long-lived offline client for local-only work (encoding, decoding, TVM) and a small
+# round-robin pool of network clients per endpoint; contexts live until "closeClients()".
+class ClientManager(object):
+    def __init__(self, poolSize: int = 4):
+        self.POOL_SIZE = poolSize
+        self.OFFLINE   = None
+        self.POOLS     = {} # endpoint key -> {"CLIENTS": [], "NEXT": 0}
+        self.LOCK      = threading.RLock()
+
+    def getOfflineClient(self):
+        with self.LOCK:
+            if self.OFFLINE is None:
+                self.OFFLINE = TonClient(config=ClientConfig())
+            return self.OFFLINE
+
+    # "isAsync" clients return awaitables from every SDK call (see "ever_utils_async")
+    def getClient(self, serverAddress: str = None, endpoints: list = None, isAsync: bool = False):
+        key = (serverAddress if serverAddress is not None else tuple(endpoints), isAsync)
+        with self.LOCK:
+            pool = self.POOLS.setdefault(key, {"CLIENTS": [], "NEXT": 0})
+            if len(pool["CLIENTS"]) < self.POOL_SIZE:
+                if serverAddress is not None:
+                    network = NetworkConfig(server_address=serverAddress)
+                else:
+                    network = NetworkConfig(endpoints=list(endpoints))
+                pool["CLIENTS"].append(TonClient(config=ClientConfig(network=network), is_async=isAsync))
+                return pool["CLIENTS"][-1]
+
+            client       = pool["CLIENTS"][pool["NEXT"] % len(pool["CLIENTS"])]
+            pool["NEXT"] = (pool["NEXT"] + 1) % len(pool["CLIENTS"])
+            return client
+
+    def close(self):
+        with self.LOCK:
+            clients = [client for pool in self.POOLS.values() for client in pool["CLIENTS"]]
+            if self.OFFLINE is not None:
+                clients.append(self.OFFLINE)
+            self.OFFLINE = None
+            self.POOLS   = {}
+        for client in clients:
+            client.destroy_context()
+
+CLIENT_MANAGER = ClientManager()
+
+def getOfflineClient():
+    return CLIENT_MANAGER.getOfflineClient()
+
+def closeClients():
+    CLIENT_MANAGER.close()
 
 # ==============================================================================
 # EXIT CODE FOR SINGLE-MESSAGE OPERATIONS
 # we know we have only 1 internal message, that's why this wrapper has no filters
 def _getAbiArray():
-    files = []
-    for file in os.listdir("../bin"):
-        if file.endswith(".abi.json"):
-            files.append(os.path.join("../bin", file))
-    return files
+    return ABI_REGISTRY.getPaths()
 
 def unwrapMessages(result, everClient: TonClient):
     if result["exception"]["errorCode"] == 0:
@@ -59,17 +118,164 @@ def getExitCode(msgIdArray, everClient: TonClient):
         realExitCode = -1
     return realExitCode   
 
+# ==============================================================================
+# ABI REGISTRY
+# Every ABI from "../bin" is read and parsed once per process and handed out by path or by contract name;
+# a file is re-read only when its mtime changes.
+class AbiRegistry(object):
+    def __init__(self, binPath: str = "../bin"):
+        self.BIN_PATH = binPath
+        self.ENTRIES  = {} # normalized path -> {"MTIME", "ABI", "JSON"}
+        self.NAMES    = {} # contract name   -> normalized path
+        self.LOCK     = threading.RLock()
+        self.LOADED   = False
+
+    def _getPath(self, abiPathOrName: str):
+        if abiPathOrName.endswith(".abi.json"):
+            return os.path.normpath(abiPathOrName)
+        with self.LOCK:
+            if abiPathOrName in self.NAMES:
+                return self.NAMES[abiPathOrName]
+        return os.path.normpath(os.path.join(self.BIN_PATH, abiPathOrName + ".abi.json"))
+
+    def _load(self, path: str):
+        mtime = os.stat(path).st_mtime_ns
+        with self.LOCK:
+            entry = self.ENTRIES.get(path)
+            if entry is not None and entry["MTIME"] == mtime:
+                return entry
+
+        with open(path, encoding="utf8") as fp:
+            text = fp.read()
+
+        entry = {"MTIME": mtime, "ABI": Abi.Json(value=text), "JSON": json.loads(text)}
+        with self.LOCK:
+            self.ENTRIES[path] = entry
+            self.NAMES[os.path.basename(path)[:-len(".abi.json")]] = path
+        return entry
+
+    def loadAll(self):
+        for file in sorted(os.listdir(self.BIN_PATH)):
+            if file.endswith(".abi.json"):
+                self._load(os.path.normpath(os.path.join(self.BIN_PATH, file)))
+        self.LOADED = True
+
+    def getPaths(self):
+        if not self.LOADED:
+            self.loadAll()
+        with self.LOCK:
+            return sorted(self.ENTRIES.keys())
+
+    def get(self, abiPathOrName: str):
+        return self._load(self._getPath(abiPathOrName))["ABI"]
+
+    def getJson(self, abiPathOrName: str):
+        return self._load(self._getPath(abiPathOrName))["JSON"]
+
+    def getMtime(self, abiPathOrName: str):
+        return self._load(self._getPath(abiPathOrName))["MTIME"]
+
+    def clear(self):
+        with self.LOCK:
+            self.ENTRIES = {}
+            self.NAMES   = {}
+            self.LOADED  = False
+
+ABI_REGISTRY = AbiRegistry()
+
 # ==============================================================================
 # 
 def getAbi(abiPath):
-    abi = Abi.from_path(path=abiPath)
-    return abi
+    # Already parsed ABIs (from the registry or elsewhere) are passed through as-is
+    if not isinstance(abiPath, str):
+        return abiPath
+    return ABI_REGISTRY.get(abiPath)
 
+# ==============================================================================
+# TVC CACHE
+# TVC images are content-addressed by sha256 of the file; each image is read, encoded and
+# has its code extracted once per process. If TVC_CACHE_DIR is set extracted code is also
+# kept on disk as "<sha256>.json" so it survives restarts.
+class TvcCache(object):
+    def __init__(self):
+        self.FILES  = {} # normalized path -> {"STAT", "HASH"}
+        self.IMAGES = {} # sha256          -> {"TVC", "CODE"}
+        self.LOCK   = threading.RLock()
+
+    def getHash(self, tvcPath: str):
+        path = os.path.normpath(tvcPath)
+        st   = os.stat(path)
+        stat = (st.st_mtime_ns, st.st_size)
+        with self.LOCK:
+            entry = self.FILES.get(path)
+            if entry is not None and entry["STAT"] == stat:
+                return entry["HASH"]
+
+        with open(path, "rb") as fp:
+            data = fp.read()
+
+        tvcHash = hashlib.sha256(data).hexdigest()
+        with self.LOCK:
+            self.FILES[path] = {"STAT": stat, "HASH": tvcHash}
+            if tvcHash not in self.IMAGES:
+                self.IMAGES[tvcHash] = {"TVC": base64.b64encode(data).decode(), "CODE": None}
+        return tvcHash
+
+    def _getImage(self, tvcPath: str):
+        tvcHash = self.getHash(tvcPath)
+        with self.LOCK:
+            image = self.IMAGES.get(tvcHash)
+        if image is None:
+            # Image was dropped with "clear()" in between, re-read it
+            with self.LOCK:
+                self.FILES.pop(os.path.normpath(tvcPath), None)
+            return self._getImage(tvcPath)
+        return (tvcHash, image)
+
+    def _getDiskPath(self, tvcHash: str):
+        if TVC_CACHE_DIR == "":
+            return ""
+        return os.path.join(TVC_CACHE_DIR, tvcHash + ".json")
+
+    def getTvc(self, tvcPath: str):
+        (_, image) = self._getImage(tvcPath)
+        return image["TVC"]
+
+    def getCode(self, tvcPath: str):
+        (tvcHash, image) = self._getImage(tvcPath)
+        if image["CODE"] is not None:
+            return image["CODE"]
+
+        diskPath = self._getDiskPath(tvcHash)
+        if diskPath != "" and os.path.exists(diskPath):
+            with open(diskPath, encoding="utf8") as fp:
+                image["CODE"] = json.load(fp)["code"]
+            return image["CODE"]
+
+        everClient    = getOfflineClient()
+        tvcCodeParams = ParamsOfGetCodeFromTvc(tvc=image["TVC"])
+        image["CODE"] = everClient.boc.get_code_from_tvc(params=tvcCodeParams).code
+
+        if diskPath != "":
+            os.makedirs(TVC_CACHE_DIR, exist_ok=True)
+            tmpPath = diskPath + ".tmp" + str(os.getpid())
+            with open(tmpPath, "w", encoding="utf8") as fp:
+                json.dump({"code": image["CODE"]}, fp)
+            os.replace(tmpPath, diskPath)
+
+        return image["CODE"]
+
+    def clear(self):
+        with self.LOCK:
+            self.FILES  = {}
+            self.IMAGES = {}
+
+TVC_CACHE = TvcCache()
+
+# ==============================================================================
+# 
 def getTvc(tvcPath):
-    fp  = open(tvcPath, 'rb')
-    tvc = base64.b64encode(fp.read()).decode()
-    fp.close()
-    return tvc
+    return TVC_CACHE.getTvc(tvcPath)
 
 def getAbiTvc(abiPath, tvcPath):
     return (getAbi(abiPath), getTvc(tvcPath))
@@ -129,12 +335,7 @@ def getValuesFromException(everException: TonException):
 # ==============================================================================
 #
 def getCodeFromTvc(tvcPath):
-
-    everClient     = TonClient(config=ClientConfig())
-    tvc           = getTvc(tvcPath)
-    tvcCodeParams = ParamsOfGetCodeFromTvc(tvc=tvc)
-    tvcCodeResult = everClient.boc.get_code_from_tvc(params=tvcCodeParams).code
-    return tvcCodeResult
+    return TVC_CACHE.getCode(tvcPath)
 
 # ==============================================================================
 #
@@ -146,7 +347,7 @@ def loadSigner(keysFile):
     return signer
 
 def generateSigner():
-    keypair = TonClient(config=ClientConfig()).crypto.generate_random_sign_keys()
+    keypair = getOfflineClient().crypto.generate_random_sign_keys()
     signer  = Signer.Keys(keys=keypair)
     return signer
 
@@ -154,7 +355,7 @@ def generateSigner():
 #
 def getAddress(abiPath, tvcPath, signer, initialPubkey, initialData):
 
-    everClient  = TonClient(config=ClientConfig())
+    everClient  = getOfflineClient()
     (abi, tvc) = getAbiTvc(abiPath, tvcPath)
     deploySet  = DeploySet(tvc=tvc, initial_pubkey=initialPubkey, initial_data=initialData)
 
@@ -171,15 +372,212 @@ def getAddressZeroPubkey(abiPath, tvcPath, initialData):
     signer = Signer.Keys(keys)
     return getAddress(abiPath, tvcPath, signer, ZERO_PUBKEY, initialData)
 
+# ==============================================================================
+# CELLS
+# Minimal BOC reader and cell representation hashing (ordinary cells only), enough to
+# re-hash a StateInit locally when only one leaf of its data changes.
+def readBocCells(boc: str, computeHashes: bool = True):
+    raw = base64.b64decode(boc)
+    if raw[0:4] != bytes.fromhex("b5ee9c72"):
+        raise ValueError("Unsupported BOC magic")
+
+    flags    = raw[4]
+    hasIdx   = (flags & 0x80) != 0
+    size     = (flags & 0x07)
+    offBytes = raw[5]
+    pos      = 6
+
+    def readInt(length):
+        nonlocal pos
+        value = int.from_bytes(raw[pos:pos+length], "big")
+        pos  += length
+        return value
+
+    cellsNum = readInt(size)
+    rootsNum = readInt(size)
+    readInt(size)     # absent
+    readInt(offBytes) # total cells size
+    roots    = [readInt(size) for _ in range(rootsNum)]
+    if hasIdx:
+        pos += cellsNum * offBytes
+
+    cells = []
+    for _ in range(cellsNum):
+        d1 = raw[pos]
+        d2 = raw[pos+1]
+        pos += 2
+        if (d1 & 0x10) != 0:
+            pos += ((d1 >> 5) + 1) * (32 + 2) # stored hashes and depths
+        dataLen = (d2 + 1) // 2
+        data    = raw[pos:pos+dataLen]
+        pos    += dataLen
+        refs    = [readInt(size) for _ in range(d1 & 0x07)]
+        cells.append({"D1": d1, "D2": d2, "DATA": data, "REFS": refs, "HASH": b"", "DEPTH": 0})
+
+    if not computeHashes:
+        return (cells, roots)
+
+    # Children always go after parents in a BOC, hash from the end
+    for cell in reversed(cells):
+        if (cell["D1"] & 0xE8) != 0:
+            raise ValueError("Only ordinary level-0 cells are supported")
+        children      = [cells[ref] for ref in cell["REFS"]]
+        cell["DEPTH"] = (max(child["DEPTH"] for child in children) + 1) if children else 0
+        cell["HASH"]  = hashlib.sha256(getCellReprPrefix(cell, children) + b"".join(child["HASH"] for child in children)).digest()
+
+    return (cells, roots)
+
+def getCellReprPrefix(cell, children):
+    prefix = bytes([len(children), cell["D2"]]) + cell["DATA"]
+    for child in children:
+        prefix += child["DEPTH"].to_bytes(2, "big")
+    return prefix
+
+def getBocHashLocal(boc: str):
+    (cells, roots) = readBocCells(boc)
+    return cells[roots[0]]["HASH"].hex()
+
+# ==============================================================================
+# ADDRESS CALCULATOR
+# Derives addresses of contracts that differ only by one "bytes" static variable (e.g. DnsRecord
+# "_domainName"). StateInit is built once with a marker value; for every value only the path
+# from the marker leaf to the data root is re-hashed locally. Values that don't fit one cell
+# (more than 127 bytes) fall back to "getAddress".
+ADDRESS_TEMPLATE_MARKER = hashlib.sha256(b"ever_utils address template").hexdigest()
+
+class AddressCalculator(object):
+    def __init__(self, abiPath, tvcPath, fieldName: str, initialData: dict, initialPubkey: str = ZERO_PUBKEY):
+        self.ABI         = getAbi(abiPath)
+        self.TVC         = tvcPath
+        self.FIELD       = fieldName
+        self.INITDATA    = initialData
+        self.PUBKEY      = initialPubkey
+        self.SIGNER      = Signer.Keys(KeyPair(ZERO_PUBKEY, ZERO_PUBKEY))
+        self.PATH        = None # list of {"BEFORE", "AFTER"}, from the marker parent up to the data root
+        self.ROOT_PREFIX = b""
+        self._buildTemplate()
+
+    def _getInitialData(self, valueHex: str):
+        initialData = dict(self.INITDATA)
+        initialData[self.FIELD] = valueHex
+        return initialData
+
+    def _buildTemplate(self):
+        everClient = getOfflineClient()
+        deploySet  = DeploySet(tvc=getTvc(self.TVC), initial_pubkey=self.PUBKEY, initial_data=self._getInitialData(ADDRESS_TEMPLATE_MARKER))
+        params     = ParamsOfEncodeMessage(abi=self.ABI, signer=self.SIGNER, deploy_set=deploySet)
+        encoded    = everClient.abi.encode_message(params=params)
+        parsed     = everClient.boc.parse_message(params=ParamsOfParse(boc=encoded.message)).parsed
+
+        try:
+            (codeCells, codeRoots) = readBocCells(parsed["code"])
+            (dataCells, dataRoots) = readBocCells(parsed["data"])
+        except ValueError:
+            return
+
+        marker  = bytes.fromhex(ADDRESS_TEMPLATE_MARKER)
+        leaves  = [i for i, cell in enumerate(dataCells) if cell["DATA"] == marker and cell["D2"] == len(marker) * 2 and len(cell["REFS"]) == 0]
+        parents = {}
+        for i, cell in enumerate(dataCells):
+            for ref in cell["REFS"]:
+                parents.setdefault(ref, []).append(i)
+
+        # The marker has to be reachable by exactly one path, otherwise several cells change at once
+        if len(leaves) != 1:
+            return
+        path = []
+        node = leaves[0]
+        while node != dataRoots[0]:
+            if len(parents.get(node, [])) != 1:
+                return
+            parent   = parents[node][0]
+            cell     = dataCells[parent]
+            children = [dataCells[ref] for ref in cell["REFS"]]
+            if cell["REFS"].count(node) != 1:
+                return
+            index = cell["REFS"].index(node)
+            path.append({
+                "BEFORE": getCellReprPrefix(cell, children) + b"".join(child["HASH"] for child in children[:index]),
+                "AFTER":  b"".join(child["HASH"] for child in children[index+1:])
+            })
+            node = parent
+
+        codeRoot = codeCells[codeRoots[0]]
+        dataRoot = dataCells[dataRoots[0]]
+        # StateInit: split_depth:nothing, special:nothing, code:just, data:just, library:empty -> "00110" + completion tag
+        self.ROOT_PREFIX = bytes([2, 1, 0x34]) + codeRoot["DEPTH"].to_bytes(2, "big") + dataRoot["DEPTH"].to_bytes(2, "big") + codeRoot["HASH"]
+        self.PATH        = path
+
+        # Sanity check against the SDK result, never trust the fast path blindly
+        if self.calculateOne(ADDRESS_TEMPLATE_MARKER) != encoded.address:
+            self.PATH = None
+
+    def calculateOne(self, valueHex: str):
+        data = bytes.fromhex(valueHex)
+        if self.PATH is None or len(data) > 127:
+            return getAddress(abiPath=self.ABI, tvcPath=self.TVC, signer=self.SIGNER, initialPubkey=self.PUBKEY, initialData=self._getInitialData(valueHex))
+
+        sha256 = hashlib.sha256
+        digest = sha256(bytes([0, len(data) * 2]) + data).digest()
+        for level in self.PATH:
+            digest = sha256(level["BEFORE"] + digest + level["AFTER"]).digest()
+        return "0:" + sha256(self.ROOT_PREFIX + digest).hexdigest()
+
+    def calculate(self, valuesHex):
+        return [self.calculateOne(valueHex) for valueHex in valuesHex]
+
 # ==============================================================================
 #
 def prepareMessageBoc(abiPath, functionName, functionParams):
+    return BODY_CACHE.getBody(abiPath, functionName, functionParams)
 
-    everClient = TonClient(config=ClientConfig())
-    callSet   = CallSet(function_name=functionName, input=functionParams)
-    params    = ParamsOfEncodeMessageBody(abi=getAbi(abiPath), signer=Signer.NoSigner(), is_internal=True, call_set=callSet)
-    encoded   = everClient.abi.encode_message_body(params=params)
-    return encoded.body
+# ==============================================================================
+# BODY CACHE
+# Unsigned internal message bodies depend only on ABI, function and parameters, so they are encoded
+# once and kept in an LRU of BODY_CACHE_SIZE entries. Parameters are canonicalised with sorted keys;
+# parameterless calls ("prolongate", "releaseDomain") always hit.
+class BodyCache(object):
+    def __init__(self):
+        self.ENTRIES = collections.OrderedDict() # (abi, functionName, params) -> body
+        self.LOCK    = threading.Lock()
+        self.HITS    = 0
+        self.MISSES  = 0
+
+    def _getKey(self, abiPath, functionName, functionParams):
+        # Keyed by ABI text, so paths, names and parsed ABIs of the same contract share entries
+        return (getAbi(abiPath).value, functionName, json.dumps(functionParams, sort_keys=True, separators=(",", ":")))
+
+    def _encode(self, abiPath, functionName, functionParams):
+        everClient = getOfflineClient()
+        callSet    = CallSet(function_name=functionName, input=functionParams)
+        params     = ParamsOfEncodeMessageBody(abi=getAbi(abiPath), signer=Signer.NoSigner(), is_internal=True, call_set=callSet)
+        encoded    = everClient.abi.encode_message_body(params=params)
+        return encoded.body
+
+    def getBody(self, abiPath, functionName, functionParams):
+        key = self._getKey(abiPath, functionName, functionParams)
+        with self.LOCK:
+            body = self.ENTRIES.get(key)
+            if body is not None:
+                self.ENTRIES.move_to_end(key)
+                self.HITS += 1
+                return body
+
+        body = self._encode(abiPath, functionName, functionParams)
+        with self.LOCK:
+            self.MISSES += 1
+            self.ENTRIES[key] = body
+            while len(self.ENTRIES) > BODY_CACHE_SIZE:
+                self.ENTRIES.popitem(last=False)
+        return body
+
+    def clear(self):
+        with self.LOCK:
+            self.ENTRIES = collections.OrderedDict()
+            self.HITS    = 0
+            self.MISSES  = 0
+
+BODY_CACHE = BodyCache()
 
 # ==============================================================================
 # 
@@ -187,7 +585,7 @@ def deployContract(everClient: TonClient, abiPath, tvcPath, constructorInput, in
 
     try:
         (abi, tvc)    = getAbiTvc(abiPath, tvcPath)
-        callSet       = CallSet(function_name='constructor', input=constructorInput)
+        callSet       = CallSet(function_name='constructor', input=constructorInput, header=getCallHeader(signer))
         deploySet     = DeploySet(tvc=tvc, initial_pubkey=initialPubkey, initial_data=initialData)
         params        = ParamsOfEncodeMessage(abi=abi, signer=signer, call_set=callSet, deploy_set=deploySet)
         encoded       = everClient.abi.encode_message(params=params)
@@ -197,14 +595,72 @@ def deployContract(everClient: TonClient, abiPath, tvcPath, constructorInput, in
         waitParams    = ParamsOfWaitForTransaction(message=encoded.message, shard_block_id=messageResult.shard_block_id, send_events=False, abi=abi)
         result        = everClient.processing.wait_for_transaction(params=waitParams)
 
+        _invalidateAfterSend(encoded.address, result)
         return {"result": result, "exception": emptyException}
 
     except TonException as ever:
+        BOC_CACHE.invalidate()
         if THROW:
             raise ever
         exceptionDetails = getValuesFromException(ever)
         return {"result": {}, "exception": exceptionDetails}
 
+# ==============================================================================
+# BOC CACHE
+# Account BOCs for getters, keyed by address and "last_trans_lt". Within BOC_CACHE_TTL seconds a
+# cached BOC is used as-is; after that only "last_trans_lt" is queried and the BOC is downloaded
+# again only if it changed. Sending messages invalidates the accounts involved.
+class BocCache(object):
+    def __init__(self):
+        self.ENTRIES = {} # address -> {"BOC", "LT", "TIME"}
+        self.LOCK    = threading.RLock()
+
+    def _fetch(self, everClient: TonClient, address: str):
+        result = getAccountGraphQL(everClient, address, "boc, last_trans_lt")
+        if result == "" or result["boc"] is None:
+            self.invalidate([address])
+            return ""
+        with self.LOCK:
+            self.ENTRIES[address] = {"BOC": result["boc"], "LT": result["last_trans_lt"], "TIME": time.monotonic()}
+        return result["boc"]
+
+    def getBoc(self, everClient: TonClient, address: str):
+        with self.LOCK:
+            entry = self.ENTRIES.get(address)
+        if entry is None:
+            return self._fetch(everClient, address)
+        if time.monotonic() - entry["TIME"] < BOC_CACHE_TTL:
+            return entry["BOC"]
+
+        result = getAccountGraphQL(everClient, address, "last_trans_lt")
+        if result != "" and result["last_trans_lt"] == entry["LT"]:
+            with self.LOCK:
+                entry["TIME"] = time.monotonic()
+            return entry["BOC"]
+        return self._fetch(everClient, address)
+
+    def put(self, address: str, boc: str, lt: str):
+        with self.LOCK:
+            self.ENTRIES[address] = {"BOC": boc, "LT": lt, "TIME": time.monotonic()}
+
+    # No addresses means everything
+    def invalidate(self, addresses = None):
+        with self.LOCK:
+            if addresses is None:
+                self.ENTRIES = {}
+                return
+            for address in addresses:
+                self.ENTRIES.pop(address, None)
+
+BOC_CACHE = BocCache()
+
+def _invalidateAfterSend(address: str, result):
+    # Outbound messages can change any other account (callbacks, sub-domain requests), drop everything then
+    if result != "" and result != {} and len(result.transaction.get("out_msgs", [])) == 0:
+        BOC_CACHE.invalidate([address])
+    else:
+        BOC_CACHE.invalidate()
+
 # ==============================================================================
 #
 def runFunctionInternal(everClient: TonClient, boc: str, abiPath: str, contractAddress: str, functionName: str, functionParams):
@@ -229,68 +685,265 @@ def runFunctionInternal(everClient: TonClient, boc: str, abiPath: str, contractA
 
 def runFunction(everClient: TonClient, abiPath, contractAddress, functionName, functionParams):
 
-    result = getAccountGraphQL(everClient, contractAddress, "boc")
-    if result == "":
-        return ""
-    if result["boc"] is None:
+    boc = BOC_CACHE.getBoc(everClient, contractAddress)
+    if boc == "":
         return ""
 
-    return (runFunctionInternal(everClient=everClient, boc=result["boc"], abiPath=abiPath, contractAddress=contractAddress, functionName=functionName, functionParams=functionParams))
+    return (runFunctionInternal(everClient=everClient, boc=boc, abiPath=abiPath, contractAddress=contractAddress, functionName=functionName, functionParams=functionParams))
+
+# Results are keyed by function name, so one getter can't be run twice with different parameters in one call
+def _checkFunctionNames(functionsArray):
+    names = [functionName for (functionName, _) in functionsArray]
+    if len(set(names)) != len(names):
+        raise ValueError("duplicate function names in functionsArray: {}".format(", ".join(sorted({name for name in names if names.count(name) > 1}))))
+
+# Runs several getters against one fetched account state; "functionsArray" is [(functionName, functionParams), ...],
+# result is {functionName: result}
+def runManyFunctions(everClient: TonClient, abiPath, contractAddress, functionsArray):
+
+    _checkFunctionNames(functionsArray)
+    boc = BOC_CACHE.getBoc(everClient, contractAddress)
+    if boc == "":
+        return {}
+
+    result = {}
+    for (functionName, functionParams) in functionsArray:
+        result[functionName] = runFunctionInternal(everClient=everClient, boc=boc, abiPath=abiPath, contractAddress=contractAddress, functionName=functionName, functionParams=functionParams)
+    return result
 
 # ==============================================================================
 #
 def callFunction(everClient: TonClient, abiPath, contractAddress, functionName, functionParams, signer, waitForTransaction: bool = True):
 
+    handle = sendFunction(everClient=everClient, abiPath=abiPath, contractAddress=contractAddress, functionName=functionName, functionParams=functionParams, signer=signer)
+    if handle["MESSAGE"] == "":
+        #return ({}, exceptionDetails)
+        return {"result": {}, "exception": handle["EXCEPTION"]}
+
+    if not waitForTransaction:
+        _invalidateAfterSend(contractAddress, "")
+        return {"result": "", "exception": emptyException}
+
+    #return (result, emptyException)
+    return waitFunction(everClient=everClient, handle=handle)
+
+# ==============================================================================
+# PIPELINING
+# "sendFunction" only encodes and sends the message and returns a handle; "waitFunction" later waits
+# for its transaction with the same result shape as "callFunction". "waitAll" waits for many handles
+# at once, so N calls cost about one block latency instead of N.
+def sendFunction(everClient: TonClient, abiPath, contractAddress, functionName, functionParams, signer):
+
     try:
-        abi           = getAbi(abiPath)
-        callSet       = CallSet(function_name=functionName, input=functionParams)
-        params        = ParamsOfEncodeMessage(abi=abi, address=contractAddress, signer=signer, call_set=callSet)
-        encoded       = everClient.abi.encode_message(params=params)
+        message = encodeCallMessage(everClient=everClient, abiPath=abiPath, contractAddress=contractAddress, functionName=functionName, functionParams=functionParams, signer=signer)
+    except TonException as ever:
+        return _getFailedHandle(contractAddress, ever)
 
-        messageParams = ParamsOfSendMessage(message=encoded.message, send_events=False, abi=abi)
+    handle = sendMessage(everClient=everClient, abiPath=abiPath, contractAddress=contractAddress, message=message)
+    # Kept so "waitAll" can encode the call again with a fresh header
+    handle["CALL"] = {"abiPath": abiPath, "contractAddress": contractAddress, "functionName": functionName, "functionParams": functionParams, "signer": signer}
+    return handle
+
+# Replay protection needs "time" headers of one key to grow in the order messages are sent, SDK takes the current
+# time in ms and two messages encoded in the same ms (or on a clock that went back) get the same or older time.
+# Every message signed with keys gets the next time of its public key, so a pipelined batch lands in send order.
+MESSAGE_TIMES      = {} # public key -> last "time" header, ms
+MESSAGE_TIMES_LOCK = threading.Lock()
+
+def getMessageTime(signer):
+    if not isinstance(signer, Signer.Keys):
+        return 0
+
+    with MESSAGE_TIMES_LOCK:
+        messageTime = max(int(time.time() * 1000), MESSAGE_TIMES.get(signer.keys.public, 0) + 1)
+        MESSAGE_TIMES[signer.keys.public] = messageTime
+    return messageTime
+
+def getCallHeader(signer, expire: int = 0):
+    messageTime = getMessageTime(signer)
+    if messageTime == 0 and expire == 0:
+        return None
+    return FunctionHeader(time=messageTime if messageTime > 0 else None, expire=expire if expire > 0 else None)
+
+# Signed external message that can be sent later with "sendMessage"; "expire" > 0 overrides SDK message lifetime
+def encodeCallMessage(everClient: TonClient, abiPath, contractAddress, functionName, functionParams, signer, expire: int = 0):
+
+    header  = getCallHeader(signer, expire)
+    callSet = CallSet(function_name=functionName, input=functionParams, header=header)
+    params  = ParamsOfEncodeMessage(abi=getAbi(abiPath), address=contractAddress, signer=signer, call_set=callSet)
+    encoded = everClient.abi.encode_message(params=params)
+    return encoded.message
+
+def sendMessage(everClient: TonClient, abiPath, contractAddress, message):
+
+    try:
+        abi           = getAbi(abiPath)
+        messageParams = ParamsOfSendMessage(message=message, send_events=False, abi=abi)
         messageResult = everClient.processing.send_message(params=messageParams)
 
-        if waitForTransaction:
-            waitParams    = ParamsOfWaitForTransaction(message=encoded.message, shard_block_id=messageResult.shard_block_id, send_events=False, abi=abi)
-            result        = everClient.processing.wait_for_transaction(params=waitParams)
-        else:
-            result = ""
+        BOC_CACHE.invalidate([contractAddress])
+        return {"ADDRESS": contractAddress, "ABI": abi, "MESSAGE": message, "SHARD_BLOCK_ID": messageResult.shard_block_id, "EXCEPTION": emptyException}
+
+    except TonException as ever:
+        return _getFailedHandle(contractAddress, ever)
+
+def _getFailedHandle(contractAddress, ever: TonException):
+    BOC_CACHE.invalidate([contractAddress])
+    if THROW:
+        raise ever
+    exceptionDetails = getValuesFromException(ever)
+    return {"ADDRESS": contractAddress, "ABI": None, "MESSAGE": "", "SHARD_BLOCK_ID": "", "EXCEPTION": exceptionDetails}
+
+def waitFunction(everClient: TonClient, handle):
+
+    if handle["MESSAGE"] == "":
+        return {"result": {}, "exception": handle["EXCEPTION"]}
+
+    try:
+        waitParams = ParamsOfWaitForTransaction(message=handle["MESSAGE"], shard_block_id=handle["SHARD_BLOCK_ID"], send_events=False, abi=handle["ABI"])
+        result     = everClient.processing.wait_for_transaction(params=waitParams)
 
-        #return (result, emptyException)
+        _invalidateAfterSend(handle["ADDRESS"], result)
         return {"result": result, "exception": emptyException}
 
     except TonException as ever:
+        BOC_CACHE.invalidate([handle["ADDRESS"]])
         if THROW:
             raise ever
         exceptionDetails = getValuesFromException(ever)
-        #return ({}, exceptionDetails)
         return {"result": {}, "exception": exceptionDetails}
 
+# Results are in the same order as "handles".
+# Multisig replay protection only accepts a "time" header newer than the last accepted one; "getMessageTime" keeps
+# headers of one key growing, but another process signing with the same key can still make calls fail with
+# REPLAY_PROTECTION_EXIT_CODE. Those calls (handles of "sendFunction") are encoded again and sent one by one
+# in "handles" order, each waited for before the next one is sent.
+def waitAll(everClient: TonClient, handles, maxWorkers: int = 32):
+
+    handles = list(handles)
+    if len(handles) == 0:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(maxWorkers, len(handles))) as executor:
+        results = list(executor.map(lambda handle: waitFunction(everClient=everClient, handle=handle), handles))
+
+    for (i, handle) in enumerate(handles):
+        if results[i]["exception"]["errorCode"] == REPLAY_PROTECTION_EXIT_CODE and handle.get("CALL") is not None:
+            results[i] = callFunction(everClient=everClient, **handle["CALL"])
+    return results
+
 # ==============================================================================
-#
+# MESSAGE DECODER
+# Function/event IDs of all given ABIs are indexed once, so a body is decoded by its 32-bit
+# selector instead of trying every ABI; only unknown selectors (e.g. external inbound
+# messages where signature and headers go first) fall back to trying every ABI.
+def _getAbiTypeSignature(param):
+    paramType = param["type"]
+    if paramType.startswith("tuple"):
+        return "(" + ",".join(_getAbiTypeSignature(component) for component in param["components"]) + ")" + paramType[len("tuple"):]
+    return paramType
+
+def _getAbiSignatureId(signature: str):
+    return int.from_bytes(hashlib.sha256(signature.encode("utf-8")).digest()[:4], "big")
+
+def calcFunctionId(abiJson, function, output: bool = False):
+    if "id" in function:
+        return int(function["id"], 16) if isinstance(function["id"], str) else int(function["id"])
+
+    version = abiJson.get("ABI version", 1)
+    inputs  = [_getAbiTypeSignature(param) for param in function["inputs"]]
+    outputs = [_getAbiTypeSignature(param) for param in function.get("outputs", [])]
+    if version == 1:
+        inputs = ["time"] + inputs
+
+    functionId = _getAbiSignatureId("{}({})({})v{}".format(function["name"], ",".join(inputs), ",".join(outputs), version))
+    return (functionId | 0x80000000) if output else (functionId & 0x7FFFFFFF)
+
+def calcEventId(abiJson, event):
+    if "id" in event:
+        return int(event["id"], 16) if isinstance(event["id"], str) else int(event["id"])
+
+    version = abiJson.get("ABI version", 1)
+    inputs  = [_getAbiTypeSignature(param) for param in event["inputs"]]
+    return _getAbiSignatureId("{}({})v{}".format(event["name"], ",".join(inputs), version)) & 0x7FFFFFFF
+
+def getBodySelector(boc: str):
+    try:
+        (cells, roots) = readBocCells(boc, computeHashes=False)
+    except (ValueError, IndexError):
+        return None
+    root = cells[roots[0]]
+    if root["D2"] < 8:
+        return None
+    return int.from_bytes(root["DATA"][0:4], "big")
+
+class MessageDecoder(object):
+    def __init__(self):
+        self.INDEXES = {} # tuple of ABI paths -> {"VERSION", "INDEX"}
+        self.LOCK    = threading.RLock()
+
+    def getIndex(self, abiFiles):
+        key     = tuple(abiFiles)
+        jsons   = [ABI_REGISTRY.getJson(abi) for abi in key]
+        version = tuple(ABI_REGISTRY.getMtime(abi) for abi in key) # ids of reloaded dicts can be reused
+        with self.LOCK:
+            entry = self.INDEXES.get(key)
+            if entry is not None and entry["VERSION"] == version:
+                return entry["INDEX"]
+
+        # selector -> [(abiPath, isInternal), ...] in "abiFiles" order
+        index = {}
+        for (abi, abiJson) in zip(key, jsons):
+            for function in abiJson.get("functions", []):
+                index.setdefault(calcFunctionId(abiJson, function, output=False), []).append((abi, True ))
+                index.setdefault(calcFunctionId(abiJson, function, output=True ), []).append((abi, False))
+            for event in abiJson.get("events", []):
+                index.setdefault(calcEventId(abiJson, event), []).append((abi, False))
+
+        with self.LOCK:
+            self.INDEXES[key] = {"VERSION": version, "INDEX": index}
+        return index
+
+    def getCandidates(self, boc: str, abiFiles):
+        selector = getBodySelector(boc)
+        if selector is None:
+            return []
+        return list(dict.fromkeys(self.getIndex(abiFiles).get(selector, [])))
+
+MESSAGE_DECODER = MessageDecoder()
+
+def _decodeMessageBodyWith(everClient: TonClient, boc, abi, isInternal: bool):
+    try:
+        params = ParamsOfDecodeMessageBody(abi=getAbi(abi), body=boc, is_internal=isInternal)
+        return everClient.abi.decode_message_body(params=params)
+    except TonException as ever:
+        return ""
+
 def decodeMessageBody(boc, possibleAbiFiles):
 
-    everClient = TonClient(config=ClientConfig())
+    everClient = getOfflineClient()
+    if boc is None or boc == "":
+        return ("", "")
 
-    # EXTERNAL
-    for abi in possibleAbiFiles:
-        try:
-            params = ParamsOfDecodeMessageBody(abi=getAbi(abi), body=boc, is_internal=False)
-            result = everClient.abi.decode_message_body(params=params)
+    candidates = MESSAGE_DECODER.getCandidates(boc, possibleAbiFiles)
+    for (abi, isInternal) in candidates:
+        result = _decodeMessageBodyWith(everClient, boc, abi, isInternal)
+        if result != "":
             return (abi, result)
 
-        except TonException as ever:
-            pass
+    # EXTERNAL
+    for abi in possibleAbiFiles:
+        if (abi, False) not in candidates:
+            result = _decodeMessageBodyWith(everClient, boc, abi, False)
+            if result != "":
+                return (abi, result)
 
     # INTERNAL
     for abi in possibleAbiFiles:
-        try:
-            params = ParamsOfDecodeMessageBody(abi=getAbi(abi), body=boc, is_internal=True)
-            result = everClient.abi.decode_message_body(params=params)
-            return (abi, result)
-
-        except TonException as ever:
-            pass
+        if (abi, True) not in candidates:
+            result = _decodeMessageBodyWith(everClient, boc, abi, True)
+            if result != "":
+                return (abi, result)
 
     return ("", "")
 
@@ -314,6 +967,47 @@ def getAccountGraphQL(everClient: TonClient, accountID, fields):
     else:
         return ""
 
+# ==============================================================================
+# BULK ACCOUNTS
+# "contracts" can be BaseContract objects or plain addresses (then "everClient" is required); accounts are
+# requested with "id in [...]" queries of GRAPHQL_CHUNK addresses each. Missing accounts are absent from the result.
+def _getContractAddress(contract):
+    return contract if isinstance(contract, str) else contract.ADDRESS
+
+def fetchAccounts(contracts, fields: str, everClient: TonClient = None):
+
+    contracts = list(contracts)
+    if everClient is None:
+        everClient = next((contract.EVERCLIENT for contract in contracts if not isinstance(contract, str)), None)
+        if everClient is None:
+            raise ValueError("everClient is required when no contract objects are given")
+
+    fieldNames = [field.strip().split("(")[0] for field in fields.split(",")]
+    if "id" not in fieldNames:
+        fields = "id, " + fields
+
+    result    = {}
+    addresses = list(dict.fromkeys(_getContractAddress(contract) for contract in contracts))
+    for chunk in _splitChunks(addresses):
+        for account in getAccountsInternalGraphQL(everClient=everClient, accountIDsArray=chunk, fields=fields, limit=len(chunk)):
+            result[account["id"]] = account
+    return result
+
+def _getAccountsIntField(contracts, field: str, fieldFormat: str, everClient: TonClient):
+    addresses = [_getContractAddress(contract) for contract in contracts]
+    accounts  = fetchAccounts(contracts=contracts, fields=field + fieldFormat, everClient=everClient)
+
+    result = {}
+    for address in addresses:
+        result[address] = int(accounts[address][field]) if address in accounts else 0
+    return result
+
+def getBalances(contracts, everClient: TonClient = None):
+    return _getAccountsIntField(list(contracts), "balance", "(format:DEC)", everClient)
+
+def getAccTypes(contracts, everClient: TonClient = None):
+    return _getAccountsIntField(list(contracts), "acc_type", "", everClient)
+
 # ==============================================================================
 #
 def getMessageGraphQL(everClient: TonClient, messageID, fields):
@@ -365,42 +1059,76 @@ def getExitCodeFromMessageID(everClient: TonClient, messageID, fields):
 
 # ==============================================================================
 #
+def _splitChunks(array, chunkSize: int = 0):
+    chunkSize = GRAPHQL_CHUNK if chunkSize <= 0 else chunkSize
+    return [array[i:i+chunkSize] for i in range(0, len(array), chunkSize)]
+
+def getMessagesGraphQL(everClient: TonClient, messageIDsArray, fields):
+
+    result = {}
+    for chunk in _splitChunks(list(dict.fromkeys(messageIDsArray))):
+        paramsCollection = ParamsOfQueryCollection(collection="messages", result=fields, limit=len(chunk), filter={"id":{"in":chunk}})
+        for msg in everClient.net.query_collection(params=paramsCollection).result:
+            result[msg["id"]] = msg
+    return result
+
+def getTransactionsByInMsgGraphQL(everClient: TonClient, messageIDsArray, fields):
+
+    result = {}
+    for chunk in _splitChunks(list(dict.fromkeys(messageIDsArray))):
+        paramsCollection = ParamsOfQueryCollection(collection="transactions", result=fields, limit=len(chunk), filter={"in_msg":{"in":chunk}})
+        for tx in everClient.net.query_collection(params=paramsCollection).result:
+            result[tx["in_msg"]] = tx
+    return result
+
+# ==============================================================================
+# Trees are queried first, then all their messages and destination transactions are fetched
+# with one "id in [...]" and one "in_msg in [...]" query (per GRAPHQL_CHUNK ids).
+UNWRAP_MSG_FIELDS = "id, src, dst, body, dst_transaction{id}, value(format:DEC), ihr_fee(format:DEC), import_fee(format:DEC), fwd_fee(format:DEC)"
+UNWRAP_TX_FIELDS  = "id, in_msg, status, status_name, end_status, out_msgs, outmsg_cnt, aborted, compute{exit_arg, exit_code, skipped_reason, skipped_reason_name, gas_fees(format:DEC)}, total_fees(format:DEC), storage{storage_fees_collected(format:DEC)}"
+
 def unwrapMessagesInternal(everClient: TonClient, messageIdArray, abiFilesArray):
 
-    arrayMsg    = []
     abiRegistry = []
-    msgFilters  = "id, src, dst, body, dst_transaction{id}, value(format:DEC), ihr_fee(format:DEC), import_fee(format:DEC), fwd_fee(format:DEC)"
-    txFilters   = "id, status, status_name, end_status, out_msgs, outmsg_cnt, aborted, compute{exit_arg, exit_code, skipped_reason, skipped_reason_name, gas_fees(format:DEC)}, total_fees(format:DEC), storage{storage_fees_collected(format:DEC)}"
-
     for abi in abiFilesArray:
         abiRegistry.append(getAbi(abi))
 
+    treeMessages = []
     for initialMsg in messageIdArray:
-        treeParams = ParamsOfQueryTransactionTree(in_msg=initialMsg, abi_registry=abiRegistry)
-        treeResult = everClient.net.query_transaction_tree(params=treeParams)
-
-        for msg in treeResult.messages:
-            resultMsg            = getMessageGraphQL(everClient, msg.id, msgFilters)
-            resultTx             = getTransactionGraphQL(everClient, msg.id, txFilters)
-            (abi, resultMsgBody) = decodeMessageBody(resultMsg["body"], abiFilesArray)
-
-            elm = [{
-                "SOURCE":             resultMsg["src"],
-                "DEST":               resultMsg["dst"] if resultMsg["dst"] != "" else "---",
-                "VALUE":              resultMsg["value"],
-                "FEES":               {"ihr_fee":resultMsg["ihr_fee"], "import_fee":resultMsg["import_fee"], "fwd_fee":resultMsg["fwd_fee"]},
-                "MESSAGE_ID:":        msg.id,
-                "PARENT_TX_ID:":      msg.src_transaction_id,
-                "TARGET_ABI":         abi,
-                "CALL_TYPE":          resultMsgBody.body_type if resultMsgBody != "" else "---",
-                "FUNCTION_NAME":      resultMsgBody.name      if resultMsgBody != "" else "---",
-                "FUNCTION_PARAMS":    resultMsgBody.value     if resultMsgBody != "" else "---",
-                "MSG_HEADER":         resultMsgBody.header    if resultMsgBody != "" else "---",
-                "OUT_MSGS":           resultTx["out_msgs"]    if resultTx      != "" else [],
-                "OUT_MSG_CNT":        resultTx["outmsg_cnt"]  if resultTx      != "" else 0,
-                "TX_DETAILS":         resultTx                if resultTx      != "" else "---"
-            }]
-            arrayMsg += elm
+        treeParams    = ParamsOfQueryTransactionTree(in_msg=initialMsg, abi_registry=abiRegistry)
+        treeResult    = everClient.net.query_transaction_tree(params=treeParams)
+        treeMessages += treeResult.messages
+
+    messageIDs = [msg.id for msg in treeMessages]
+    messages   = getMessagesGraphQL(everClient, messageIDs, UNWRAP_MSG_FIELDS)
+    txs        = getTransactionsByInMsgGraphQL(everClient, messageIDs, UNWRAP_TX_FIELDS)
+    return buildUnwrappedMessages(treeMessages, messages, txs, abiFilesArray)
+
+def buildUnwrappedMessages(treeMessages, messages, txs, abiFilesArray):
+
+    arrayMsg = []
+    for msg in treeMessages:
+        resultMsg            = messages.get(msg.id, "")
+        resultTx             = txs.get(msg.id, "")
+        (abi, resultMsgBody) = decodeMessageBody(resultMsg["body"], abiFilesArray)
+
+        elm = [{
+            "SOURCE":             resultMsg["src"],
+            "DEST":               resultMsg["dst"] if resultMsg["dst"] != "" else "---",
+            "VALUE":              resultMsg["value"],
+            "FEES":               {"ihr_fee":resultMsg["ihr_fee"], "import_fee":resultMsg["import_fee"], "fwd_fee":resultMsg["fwd_fee"]},
+            "MESSAGE_ID:":        msg.id,
+            "PARENT_TX_ID:":      msg.src_transaction_id,
+            "TARGET_ABI":         abi,
+            "CALL_TYPE":          resultMsgBody.body_type if resultMsgBody != "" else "---",
+            "FUNCTION_NAME":      resultMsgBody.name      if resultMsgBody != "" else "---",
+            "FUNCTION_PARAMS":    resultMsgBody.value     if resultMsgBody != "" else "---",
+            "MSG_HEADER":         resultMsgBody.header    if resultMsgBody != "" else "---",
+            "OUT_MSGS":           resultTx["out_msgs"]    if resultTx      != "" else [],
+            "OUT_MSG_CNT":        resultTx["outmsg_cnt"]  if resultTx      != "" else 0,
+            "TX_DETAILS":         resultTx                if resultTx      != "" else "---"
+        }]
+        arrayMsg += elm
 
     return arrayMsg
 
@@ -410,12 +1138,12 @@ class BaseContract(object):
     def __init__(self, everClient: TonClient, contractName: str, signer: Signer, pubkey: str = ZERO_PUBKEY):
         self.SIGNER      = signer
         self.EVERCLIENT  = everClient
-        self.ABI         = "../bin/" + contractName + ".abi.json"
+        self.ABI         = contractName # resolved by ABI_REGISTRY on every use, so an ABI reloaded from disk reaches existing contracts
         self.TVC         = "../bin/" + contractName + ".tvc"
         self.CONSTRUCTOR = {} if not hasattr(self, "CONSTRUCTOR") else self.CONSTRUCTOR
         self.INITDATA    = {} if not hasattr(self, "INITDATA")    else self.INITDATA
         self.PUBKEY      = pubkey
-        self.ADDRESS     = getAddress(abiPath=self.ABI, tvcPath=self.TVC, signer=self.SIGNER, initialPubkey=self.PUBKEY, initialData=self.INITDATA)
+        self.ADDRESS     = getAddress(abiPath=self.ABI, tvcPath=self.TVC, signer=self.SIGNER, initialPubkey=self.PUBKEY, initialData=self.INITDATA) if not hasattr(self, "ADDRESS") else self.ADDRESS
     
     # ========================================
     #
@@ -423,17 +1151,37 @@ class BaseContract(object):
         result = deployContract(everClient=self.EVERCLIENT, abiPath=self.ABI, tvcPath=self.TVC, constructorInput=self.CONSTRUCTOR, initialData=self.INITDATA, signer=self.SIGNER, initialPubkey=self.PUBKEY)
         return result
 
+    # Between "beginPipeline()" and "waitPipeline()" calls are only sent and return handles; calls of a contract
+    # with timestamp replay protection (Multisig) that land out of order are sent again by "waitAll", in call order
     def _call(self, functionName, functionParams, signer):
+        if getattr(self, "HANDLES", None) is not None:
+            handle = sendFunction(everClient=self.EVERCLIENT, abiPath=self.ABI, contractAddress=self.ADDRESS, functionName=functionName, functionParams=functionParams, signer=signer)
+            self.HANDLES.append(handle)
+            return handle
+
         result = callFunction(everClient=self.EVERCLIENT, abiPath=self.ABI, contractAddress=self.ADDRESS, functionName=functionName, functionParams=functionParams, signer=signer)
         return result
 
+    def beginPipeline(self):
+        self.HANDLES = []
+
+    def waitPipeline(self):
+        handles      = self.HANDLES if getattr(self, "HANDLES", None) is not None else []
+        self.HANDLES = None
+        return waitAll(everClient=self.EVERCLIENT, handles=handles)
+
     def _run(self, functionName, functionParams):
         result = runFunction(everClient=self.EVERCLIENT, abiPath=self.ABI, contractAddress=self.ADDRESS, functionName=functionName, functionParams=functionParams)
         return result
 
+    def runMany(self, functionsArray):
+        result = runManyFunctions(everClient=self.EVERCLIENT, abiPath=self.ABI, contractAddress=self.ADDRESS, functionsArray=functionsArray)
+        return result
+
     def _callFromMultisig(self, msig, functionName, functionParams, value, flags, bounce=True):
         messageBoc = prepareMessageBoc(abiPath=self.ABI, functionName=functionName, functionParams=functionParams)
         result     = msig.sendTransaction(addressDest=self.ADDRESS, value=value, bounce=bounce, payload=messageBoc, flags=flags)
+        BOC_CACHE.invalidate([self.ADDRESS, msig.ADDRESS])
         return result
 
     def getBalance(self):
@@ -466,7 +1214,7 @@ class Multisig(BaseContract):
 class Giver(BaseContract):
     def __init__(self, everClient: TonClient):
         self.ADDRESS = "0:841288ed3b55d9cdafa806807f02a0ae0c169aa5edfe88a789a6482429756a94"
-        self.ABI     = "../bin/local_giver.abi.json"
+        self.ABI     = "local_giver"
         self.SIGNER  = Signer.NoSigner()
 
     def sendGrams(self, dest, amount):
@@ -481,7 +1229,7 @@ class SetcodeMultisig(object):
     def __init__(self, everClient: TonClient, signer: Signer = None):
         self.SIGNER      = generateSigner() if signer is None else signer
         self.EVERCLIENT   = everClient
-        self.ABI         = "../bin/SetcodeMultisigWallet.abi.json"
+        self.ABI         = "SetcodeMultisigWallet"
         self.TVC         = "../bin/SetcodeMultisigWallet.tvc"
         self.CONSTRUCTOR = {"owners":["0x" + self.SIGNER.keys.public],"reqConfirms":"1"}
         self.INITDATA    = {}
@@ -511,6 +1259,18 @@ class SetcodeMultisig(object):
 
 # ==============================================================================
 #
+# Giver multisig (keys from MSIG_GIVER) is built once per process and keys file
+GIVER_MSIGS      = {}
+GIVER_LOCK       = threading.Lock()
+GIVER_BATCH_LOCK = threading.Lock() # one Multisig giver batch at a time, threads would interleave their transfers
+
+def giverGetMsig():
+
+    with GIVER_LOCK:
+        if MSIG_GIVER not in GIVER_MSIGS:
+            GIVER_MSIGS[MSIG_GIVER] = SetcodeMultisig(everClient=getOfflineClient(), signer=loadSigner(MSIG_GIVER))
+        return GIVER_MSIGS[MSIG_GIVER]
+
 def giverGetAddress():
 
     global MSIG_GIVER
@@ -518,25 +1278,35 @@ def giverGetAddress():
     if MSIG_GIVER == "":
         return "0:841288ed3b55d9cdafa806807f02a0ae0c169aa5edfe88a789a6482429756a94"
     else:
-        signer = loadSigner(MSIG_GIVER)
-        msig   = SetcodeMultisig(everClient=TonClient(config=ClientConfig()), signer=signer)
-        return msig.ADDRESS
+        return giverGetMsig().ADDRESS
 
 def giverGive(everClient: TonClient, contractAddress, amountEvers):
-    
+    giverGiveMany(everClient=everClient, transfers=[(contractAddress, amountEvers)])
+
+# "transfers" is [(address, amount), ...]; results are in the same order (empty when USE_GIVER is off).
+# Local giver transfers are sent first and then waited for together; Multisig giver transfers are sent one
+# by one, because its replay protection rejects messages that land after a newer one from the same key; the whole
+# batch holds GIVER_BATCH_LOCK so batches of other threads don't interleave.
+def giverGiveMany(everClient: TonClient, transfers):
+
+    transfers = list(transfers)
     if not USE_GIVER:
-        print("\nNow GIVER expects to give {} TONs to address {};".format(amountEvers, contractAddress))
+        for (contractAddress, amountEvers) in transfers:
+            print("\nNow GIVER expects to give {} TONs to address {};".format(amountEvers, contractAddress))
         input("Please, do it manually and then press ENTER to continue...")
-        return
-
-    global MSIG_GIVER
-    if MSIG_GIVER == "":
-        giverAddress = giverGetAddress()
-        callFunction(everClient, "../bin/local_giver.abi.json", giverAddress, "sendGrams", {"dest":contractAddress,"amount":amountEvers}, Signer.NoSigner())
-    else:
-        signer = loadSigner(MSIG_GIVER)
-        msig   = SetcodeMultisig(signer=signer)
-        msig.callTransfer(addressDest=contractAddress, value=amountEvers, payload="", flags=1)
+        return []
+
+    if MSIG_GIVER != "":
+        msig = giverGetMsig()
+        with GIVER_BATCH_LOCK:
+            return [callFunction(everClient, msig.ABI, msig.ADDRESS, "sendTransaction", {"dest":contractAddress, "value":amountEvers, "bounce":False, "flags":1, "payload":""}, msig.SIGNER)
+                    for (contractAddress, amountEvers) in transfers]
+
+    handles      = []
+    giverAddress = giverGetAddress()
+    for (contractAddress, amountEvers) in transfers:
+        handles.append(sendFunction(everClient, getAbi("local_giver"), giverAddress, "sendGrams", {"dest":contractAddress,"amount":amountEvers}, Signer.NoSigner()))
+    return waitAll(everClient=everClient, handles=handles)
 
 # ==============================================================================
 #
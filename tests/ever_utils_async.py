@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+# ==============================================================================
+# ASYNCIO API
+# Same calls and result shapes as "ever_utils", but every network operation is a coroutine
+# running on an async TonClient ("getEverClientAsync()"), so any number of pending
+# transactions can be awaited from one event loop. Local-only work (ABI/TVC loading,
+# addresses, body encoding, decoding) is shared with "ever_utils".
+import asyncio
+import time
+import weakref
+import ever_utils
+from   ever_utils import *
+
+# ==============================================================================
+#
+def getEverClientAsync(testnet: bool, customServer: str = None):
+    return getEverClient(testnet=testnet, customServer=customServer, isAsync=True)
+
+# Awaits all coroutines keeping their order; "limit" > 0 caps how many run at once
+async def gatherLimited(coroutines, limit: int = 0):
+    if limit <= 0:
+        return await asyncio.gather(*coroutines)
+
+    semaphore = asyncio.Semaphore(limit)
+    async def _limited(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*[_limited(coroutine) for coroutine in coroutines])
+
+# ==============================================================================
+#
+async def _sendAndWaitAsync(everClient: TonClient, abi, message):
+    messageParams = ParamsOfSendMessage(message=message, send_events=False, abi=abi)
+    messageResult = await everClient.processing.send_message(params=messageParams)
+    waitParams    = ParamsOfWaitForTransaction(message=message, shard_block_id=messageResult.shard_block_id, send_events=False, abi=abi)
+    result        = await everClient.processing.wait_for_transaction(params=waitParams)
+    return result
+
+async def deployContractAsync(everClient: TonClient, abiPath, tvcPath, constructorInput, initialData, signer, initialPubkey):
+
+    try:
+        (abi, tvc)    = getAbiTvc(abiPath, tvcPath)
+        callSet       = CallSet(function_name='constructor', input=constructorInput, header=ever_utils.getCallHeader(signer))
+        deploySet     = DeploySet(tvc=tvc, initial_pubkey=initialPubkey, initial_data=initialData)
+        params        = ParamsOfEncodeMessage(abi=abi, signer=signer, call_set=callSet, deploy_set=deploySet)
+        encoded       = await everClient.abi.encode_message(params=params)
+        result        = await _sendAndWaitAsync(everClient, abi, encoded.message)
+
+        ever_utils._invalidateAfterSend(encoded.address, result)
+        return {"result": result, "exception": emptyException}
+
+    except TonException as ever:
+        BOC_CACHE.invalidate()
+        if ever_utils.THROW:
+            raise ever
+        exceptionDetails = getValuesFromException(ever)
+        return {"result": {}, "exception": exceptionDetails}
+
+async def callFunctionAsync(everClient: TonClient, abiPath, contractAddress, functionName, functionParams, signer, waitForTransaction: bool = True):
+
+    handle = await sendFunctionAsync(everClient=everClient, abiPath=abiPath, contractAddress=contractAddress, functionName=functionName, functionParams=functionParams, signer=signer)
+    if handle["MESSAGE"] == "":
+        return {"result": {}, "exception": handle["EXCEPTION"]}
+
+    if not waitForTransaction:
+        ever_utils._invalidateAfterSend(contractAddress, "")
+        return {"result": "", "exception": emptyException}
+
+    return await waitFunctionAsync(everClient=everClient, handle=handle)
+
+# Handles are the same as in "sendFunction"/"waitFunction"
+async def sendFunctionAsync(everClient: TonClient, abiPath, contractAddress, functionName, functionParams, signer):
+
+    try:
+        abi           = getAbi(abiPath)
+        callSet       = CallSet(function_name=functionName, input=functionParams, header=ever_utils.getCallHeader(signer))
+        params        = ParamsOfEncodeMessage(abi=abi, address=contractAddress, signer=signer, call_set=callSet)
+        encoded       = await everClient.abi.encode_message(params=params)
+
+        messageParams = ParamsOfSendMessage(message=encoded.message, send_events=False, abi=abi)
+        messageResult = await everClient.processing.send_message(params=messageParams)
+
+        BOC_CACHE.invalidate([contractAddress])
+        return {"ADDRESS": contractAddress, "ABI": abi, "MESSAGE": encoded.message, "SHARD_BLOCK_ID": messageResult.shard_block_id, "EXCEPTION": emptyException,
+                "CALL": {"abiPath": abiPath, "contractAddress": contractAddress, "functionName": functionName, "functionParams": functionParams, "signer": signer}}
+
+    except TonException as ever:
+        BOC_CACHE.invalidate([contractAddress])
+        if ever_utils.THROW:
+            raise ever
+        exceptionDetails = getValuesFromException(ever)
+        return {"ADDRESS": contractAddress, "ABI": None, "MESSAGE": "", "SHARD_BLOCK_ID": "", "EXCEPTION": exceptionDetails}
+
+async def waitFunctionAsync(everClient: TonClient, handle):
+
+    if handle["MESSAGE"] == "":
+        return {"result": {}, "exception": handle["EXCEPTION"]}
+
+    try:
+        waitParams = ParamsOfWaitForTransaction(message=handle["MESSAGE"], shard_block_id=handle["SHARD_BLOCK_ID"], send_events=False, abi=handle["ABI"])
+        result     = await everClient.processing.wait_for_transaction(params=waitParams)
+
+        ever_utils._invalidateAfterSend(handle["ADDRESS"], result)
+        return {"result": result, "exception": emptyException}
+
+    except TonException as ever:
+        BOC_CACHE.invalidate([handle["ADDRESS"]])
+        if ever_utils.THROW:
+            raise ever
+        exceptionDetails = getValuesFromException(ever)
+        return {"result": {}, "exception": exceptionDetails}
+
+# Calls rejected by replay protection are sent again one by one, like in "waitAll"
+async def waitAllAsync(everClient: TonClient, handles):
+    handles = list(handles)
+    results = await asyncio.gather(*[waitFunctionAsync(everClient=everClient, handle=handle) for handle in handles])
+
+    for (i, handle) in enumerate(handles):
+        if results[i]["exception"]["errorCode"] == REPLAY_PROTECTION_EXIT_CODE and handle.get("CALL") is not None:
+            results[i] = await callFunctionAsync(everClient=everClient, **handle["CALL"])
+    return results
+
+# ==============================================================================
+#
+async def getAccountsInternalGraphQLAsync(everClient: TonClient, accountIDsArray, fields: str, limit: int):
+
+    paramsCollection = ParamsOfQueryCollection(
+    collection="accounts", result=fields, limit=limit,
+    filter={"id":{"in":accountIDsArray}},
+    order=[OrderBy(path='id', direction=SortDirection.DESC)])
+
+    result = await everClient.net.query_collection(params=paramsCollection)
+    return result.result
+
+async def getAccountGraphQLAsync(everClient: TonClient, accountID, fields):
+
+    result = await getAccountsInternalGraphQLAsync(everClient=everClient, accountIDsArray=[accountID], fields=fields, limit=1)
+    if len(result) > 0:
+        return result[0]
+    else:
+        return ""
+
+# Same rules as "BocCache.getBoc", sharing BOC_CACHE with the synchronous API
+async def getBocAsync(everClient: TonClient, address: str):
+
+    with BOC_CACHE.LOCK:
+        entry = BOC_CACHE.ENTRIES.get(address)
+
+    if entry is not None:
+        if time.monotonic() - entry["TIME"] < ever_utils.BOC_CACHE_TTL:
+            return entry["BOC"]
+
+        result = await getAccountGraphQLAsync(everClient, address, "last_trans_lt")
+        if result != "" and result["last_trans_lt"] == entry["LT"]:
+            with BOC_CACHE.LOCK:
+                entry["TIME"] = time.monotonic()
+            return entry["BOC"]
+
+    result = await getAccountGraphQLAsync(everClient, address, "boc, last_trans_lt")
+    if result == "" or result["boc"] is None:
+        BOC_CACHE.invalidate([address])
+        return ""
+
+    BOC_CACHE.put(address, result["boc"], result["last_trans_lt"])
+    return result["boc"]
+
+async def runFunctionInternalAsync(everClient: TonClient, boc: str, abiPath: str, contractAddress: str, functionName: str, functionParams):
+
+    abi          = getAbi(abiPath)
+    callSet      = CallSet(function_name=functionName, input=functionParams)
+    params       = ParamsOfEncodeMessage(abi=abi, address=contractAddress, signer=Signer.NoSigner(), call_set=callSet)
+    encoded      = await everClient.abi.encode_message(params=params)
+
+    paramsRun    = ParamsOfRunTvm(message=encoded.message, account=boc, abi=abi)
+    result       = await everClient.tvm.run_tvm(params=paramsRun)
+
+    paramsDecode = ParamsOfDecodeMessage(abi=abi, message=result.out_messages[0])
+    decoded      = await everClient.abi.decode_message(params=paramsDecode)
+
+    if len(decoded.value) == 1 and list(decoded.value.keys())[0] == "value0":
+        result = decoded.value["value0"]
+    else:
+        result = decoded.value
+
+    return result
+
+async def runFunctionAsync(everClient: TonClient, abiPath, contractAddress, functionName, functionParams):
+
+    boc = await getBocAsync(everClient, contractAddress)
+    if boc == "":
+        return ""
+
+    return (await runFunctionInternalAsync(everClient=everClient, boc=boc, abiPath=abiPath, contractAddress=contractAddress, functionName=functionName, functionParams=functionParams))
+
+async def runManyFunctionsAsync(everClient: TonClient, abiPath, contractAddress, functionsArray):
+
+    ever_utils._checkFunctionNames(functionsArray)
+    boc = await getBocAsync(everClient, contractAddress)
+    if boc == "":
+        return {}
+
+    results = await asyncio.gather(*[runFunctionInternalAsync(everClient=everClient, boc=boc, abiPath=abiPath, contractAddress=contractAddress, functionName=functionName, functionParams=functionParams)
+                                     for (functionName, functionParams) in functionsArray])
+    return {functionName: result for ((functionName, _), result) in zip(functionsArray, results)}
+
+# ==============================================================================
+# Transaction trees are queried concurrently, then messages and transactions in batches as in "unwrapMessagesInternal"
+async def getMessagesGraphQLAsync(everClient: TonClient, messageIDsArray, fields):
+
+    chunks  = ever_utils._splitChunks(list(dict.fromkeys(messageIDsArray)))
+    results = await asyncio.gather(*[everClient.net.query_collection(params=ParamsOfQueryCollection(collection="messages", result=fields, limit=len(chunk), filter={"id":{"in":chunk}})) for chunk in chunks])
+    return {msg["id"]: msg for result in results for msg in result.result}
+
+async def getTransactionsByInMsgGraphQLAsync(everClient: TonClient, messageIDsArray, fields):
+
+    chunks  = ever_utils._splitChunks(list(dict.fromkeys(messageIDsArray)))
+    results = await asyncio.gather(*[everClient.net.query_collection(params=ParamsOfQueryCollection(collection="transactions", result=fields, limit=len(chunk), filter={"in_msg":{"in":chunk}})) for chunk in chunks])
+    return {tx["in_msg"]: tx for result in results for tx in result.result}
+
+async def unwrapMessagesInternalAsync(everClient: TonClient, messageIdArray, abiFilesArray):
+
+    abiRegistry  = [getAbi(abi) for abi in abiFilesArray]
+    treeResults  = await asyncio.gather(*[everClient.net.query_transaction_tree(params=ParamsOfQueryTransactionTree(in_msg=initialMsg, abi_registry=abiRegistry)) for initialMsg in messageIdArray])
+    treeMessages = [msg for treeResult in treeResults for msg in treeResult.messages]
+
+    messageIDs      = [msg.id for msg in treeMessages]
+    (messages, txs) = await asyncio.gather(getMessagesGraphQLAsync(everClient, messageIDs, UNWRAP_MSG_FIELDS), getTransactionsByInMsgGraphQLAsync(everClient, messageIDs, UNWRAP_TX_FIELDS))
+    return buildUnwrappedMessages(treeMessages, messages, txs, abiFilesArray)
+
+async def unwrapMessagesAsync(result, everClient: TonClient):
+    if result["exception"]["errorCode"] == 0:
+        return await unwrapMessagesInternalAsync(everClient, result["result"].transaction["out_msgs"], ever_utils._getAbiArray())
+    return ""
+
+# ==============================================================================
+# Drop-in base for contract wrappers: mutators that end in "_call"/"_callFromMultisig" and getters that
+# end in "_run" return coroutines, e.g. "class AsyncDnsRecord(AsyncBaseContract, DnsRecord)".
+class AsyncBaseContract(BaseContract):
+
+    async def deploy(self):
+        result = await deployContractAsync(everClient=self.EVERCLIENT, abiPath=self.ABI, tvcPath=self.TVC, constructorInput=self.CONSTRUCTOR, initialData=self.INITDATA, signer=self.SIGNER, initialPubkey=self.PUBKEY)
+        return result
+
+    async def _call(self, functionName, functionParams, signer):
+        result = await callFunctionAsync(everClient=self.EVERCLIENT, abiPath=self.ABI, contractAddress=self.ADDRESS, functionName=functionName, functionParams=functionParams, signer=signer)
+        return result
+
+    async def _run(self, functionName, functionParams):
+        result = await runFunctionAsync(everClient=self.EVERCLIENT, abiPath=self.ABI, contractAddress=self.ADDRESS, functionName=functionName, functionParams=functionParams)
+        return result
+
+    async def runMany(self, functionsArray):
+        result = await runManyFunctionsAsync(everClient=self.EVERCLIENT, abiPath=self.ABI, contractAddress=self.ADDRESS, functionsArray=functionsArray)
+        return result
+
+    # "msig" needs to be asynchronous as well (AsyncMultisig)
+    async def _callFromMultisig(self, msig, functionName, functionParams, value, flags, bounce=True):
+        messageBoc = prepareMessageBoc(abiPath=self.ABI, functionName=functionName, functionParams=functionParams)
+        result     = await msig.sendTransaction(addressDest=self.ADDRESS, value=value, bounce=bounce, payload=messageBoc, flags=flags)
+        BOC_CACHE.invalidate([self.ADDRESS, msig.ADDRESS])
+        return result
+
+    async def getBalance(self):
+        result = await getAccountGraphQLAsync(everClient=self.EVERCLIENT, accountID=self.ADDRESS, fields="balance(format:DEC)")
+        return int(result["balance"]) if result != "" else 0
+
+    async def getAccType(self):
+        result = await getAccountGraphQLAsync(everClient=self.EVERCLIENT, accountID=self.ADDRESS, fields="acc_type")
+        return int(result["acc_type"]) if result != "" else 0
+
+# ==============================================================================
+#
+class AsyncMultisig(AsyncBaseContract, Multisig):
+    pass
+
+class AsyncGiver(AsyncBaseContract, Giver):
+    def __init__(self, everClient: TonClient):
+        Giver.__init__(self, everClient=everClient)
+        self.EVERCLIENT = everClient
+
+# ==============================================================================
+# asyncio locks belong to one event loop, so every loop gets its own Multisig giver batch lock
+GIVER_BATCH_LOCKS = weakref.WeakKeyDictionary()
+
+def _getGiverBatchLock():
+    loop = asyncio.get_running_loop()
+    if loop not in GIVER_BATCH_LOCKS:
+        GIVER_BATCH_LOCKS[loop] = asyncio.Lock()
+    return GIVER_BATCH_LOCKS[loop]
+
+async def giverGiveAsync(everClient: TonClient, contractAddress, amountEvers):
+    await giverGiveManyAsync(everClient=everClient, transfers=[(contractAddress, amountEvers)])
+
+async def giverGiveManyAsync(everClient: TonClient, transfers):
+
+    transfers = list(transfers)
+    if not ever_utils.USE_GIVER:
+        for (contractAddress, amountEvers) in transfers:
+            print("\nNow GIVER expects to give {} TONs to address {};".format(amountEvers, contractAddress))
+        await asyncio.get_running_loop().run_in_executor(None, input, "Please, do it manually and then press ENTER to continue...")
+        return []
+
+    # Multisig giver transfers go one by one, see "giverGiveMany"
+    if ever_utils.MSIG_GIVER != "":
+        msig = giverGetMsig()
+        async with _getGiverBatchLock():
+            return [await callFunctionAsync(everClient, msig.ABI, msig.ADDRESS, "sendTransaction", {"dest":contractAddress, "value":amountEvers, "bounce":False, "flags":1, "payload":""}, msig.SIGNER)
+                    for (contractAddress, amountEvers) in transfers]
+
+    giverAddress = giverGetAddress()
+    sends        = [sendFunctionAsync(everClient, getAbi("local_giver"), giverAddress, "sendGrams", {"dest":contractAddress,"amount":amountEvers}, Signer.NoSigner()) for (contractAddress, amountEvers) in transfers]
+    handles      = await asyncio.gather(*sends)
+    return await waitAllAsync(everClient=everClient, handles=handles)
+
+# ==============================================================================
+#
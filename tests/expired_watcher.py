@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+# ==============================================================================
+# EXPIRED WATCHER
+# Claims domains through one Multisig the moment they expire. Candidates are kept in a priority queue by
+# "dtExpires" and their accounts are subscribed to, so prolongations and claims by others re-order the queue
+# without polling. The "claimExpired" payload is encoded once, and the signed Multisig message for a domain is
+# prepared PREPARE_AHEAD seconds before expiry, so reacting to an expiry is a single "send_message". Any newer
+# call of the same Multisig makes a prepared message fail replay protection; it is then signed again and resent.
+#
+# Usage:
+#   watcher = ExpiredWatcher(everClient=getEverClient(testnet=False), msig=msig)
+#   watcher.watch(["org", "net/kek"])
+#   watcher.run()
+import heapq
+import threading
+import ever_utils
+from   ever_utils import *
+from   contract_DnsRecord import *
+
+# ==============================================================================
+#
+PREPARE_AHEAD    = 30 # seconds before expiry the Multisig message is encoded and signed
+MESSAGE_LIFETIME = 60 # seconds after expiry a prepared message stays valid
+CLAIM_DELAY      = 1  # "isExpired()" is "now > dtExpires" in block time
+RETRY_DELAY      = 5  # seconds before a claim that failed is sent again
+
+class ExpiredWatcher(object):
+    def __init__(self, everClient: TonClient, msig: Multisig, newOwnerAddress: str = None, value: int = EVER, forceFeeReturnToOwner: bool = False, contractName: str = "DnsRecord"):
+        self.EVERCLIENT    = everClient
+        self.MSIG          = msig
+        self.VALUE         = value
+        self.CONTRACT_NAME = contractName
+        self.PAYLOAD       = prepareMessageBoc(abiPath=contractName, functionName="claimExpired",
+                                               functionParams={"newOwnerAddress": msig.ADDRESS if newOwnerAddress is None else newOwnerAddress, "forceFeeReturnToOwner": forceFeeReturnToOwner})
+        self.HEAP          = []   # (dtExpires, address)
+        self.READY         = {}   # address -> dtExpires, popped from HEAP with a prepared message
+        self.DOMAINS       = {}   # address -> {"NAME", "EXPIRES", "OWNER", "MESSAGE", "MESSAGE_EXPIRE", "FIRED", "RETRY_AT"}
+        self.CHANGES       = {}   # address -> account {"boc", "data", "last_trans_lt"} from the subscription
+        self.LOCK          = threading.Lock()
+        self.WAKEUP        = threading.Event()
+        self.SUBSCRIPTION  = None
+
+    # ========================================
+    #
+    def _update(self, address: str, whois):
+        entry = self.DOMAINS.get(address)
+        if entry is None or whois == "":
+            return
+        expires        = int(whois["dtExpires"])
+        entry["OWNER"] = whois["ownerAddress"]
+        if expires != entry["EXPIRES"]:
+            entry["EXPIRES"]  = expires
+            entry["MESSAGE"]  = ""
+            entry["RETRY_AT"] = 0
+            heapq.heappush(self.HEAP, (expires, address))
+
+    def watch(self, names):
+        names     = list(names)
+        addresses = calculateDomainAddresses(names, self.CONTRACT_NAME)
+        whois     = getWhoisMany(everClient=self.EVERCLIENT, addresses=addresses, contractName=self.CONTRACT_NAME)
+
+        with self.LOCK:
+            for (name, address) in zip(names, addresses):
+                self.DOMAINS.setdefault(address, {"NAME": name, "EXPIRES": -1, "OWNER": "", "MESSAGE": "", "MESSAGE_EXPIRE": 0, "FIRED": None, "RETRY_AT": 0})
+                self._update(address, whois[address])
+        self.subscribe()
+
+    def unwatch(self, address: str):
+        # Heap entries are dropped lazily when they come up
+        with self.LOCK:
+            self.DOMAINS.pop(address, None)
+
+    # ========================================
+    # Subscription callbacks come from SDK threads, the account is only stored here and decoded in "runPending"
+    def _onAccount(self, responseData, responseType, loop):
+        if responseType != SubscriptionResponseType.OK:
+            return
+        account = responseData["result"]
+        with self.LOCK:
+            self.CHANGES[account["id"]] = account
+        self.WAKEUP.set()
+
+    def subscribe(self):
+        self.unsubscribe()
+        with self.LOCK:
+            addresses = list(self.DOMAINS.keys())
+        params            = ParamsOfSubscribeCollection(collection="accounts", filter={"id":{"in":addresses}}, result="id, boc, data, last_trans_lt")
+        self.SUBSCRIPTION = self.EVERCLIENT.net.subscribe_collection(params=params, callback=self._onAccount)
+
+    def unsubscribe(self):
+        if self.SUBSCRIPTION is not None:
+            self.EVERCLIENT.net.unsubscribe(params=self.SUBSCRIPTION)
+            self.SUBSCRIPTION = None
+
+    def _processChanges(self):
+        with self.LOCK:
+            changes      = self.CHANGES
+            self.CHANGES = {}
+
+        for (address, account) in changes.items():
+            if account.get("data") is None or address not in self.DOMAINS:
+                continue
+            BOC_CACHE.put(address, account["boc"], account["last_trans_lt"])
+            whois = decodeWhoisFromData(account["data"])
+            with self.LOCK:
+                self._update(address, whois)
+
+    # ========================================
+    #
+    def _isCurrent(self, item):
+        (expires, address) = item
+        entry = self.DOMAINS.get(address)
+        return entry is not None and entry["EXPIRES"] == expires and entry["FIRED"] != expires and entry["OWNER"] != self.MSIG.ADDRESS
+
+    def _popSoon(self, until: int):
+        soon = []
+        with self.LOCK:
+            while len(self.HEAP) > 0 and self.HEAP[0][0] <= until:
+                item = heapq.heappop(self.HEAP)
+                if self._isCurrent(item):
+                    soon.append(item)
+        return soon
+
+    def _getSendTime(self, address: str, expires: int):
+        return max(expires + CLAIM_DELAY, self.DOMAINS[address]["RETRY_AT"])
+
+    # Next time something has to be done: a ready domain expires (or is retried) or the next one needs its message prepared
+    def getNextTime(self):
+        with self.LOCK:
+            ready = [self._getSendTime(address, expires) for (address, expires) in self.READY.items() if address in self.DOMAINS]
+            if len(ready) > 0:
+                return min(ready)
+            while len(self.HEAP) > 0 and not self._isCurrent(self.HEAP[0]):
+                heapq.heappop(self.HEAP)
+            return self.HEAP[0][0] - PREPARE_AHEAD if len(self.HEAP) > 0 else None
+
+    def _prepare(self, address: str, expires: int):
+        entry = self.DOMAINS[address]
+        if entry["MESSAGE"] != "" and entry["MESSAGE_EXPIRE"] > getNowTimestamp() + 1:
+            return entry["MESSAGE"]
+
+        entry["MESSAGE_EXPIRE"] = max(expires, getNowTimestamp()) + MESSAGE_LIFETIME
+        entry["MESSAGE"]        = encodeCallMessage(everClient=self.EVERCLIENT, abiPath=self.MSIG.ABI, contractAddress=self.MSIG.ADDRESS, functionName="sendTransaction",
+                                                    functionParams={"dest":address, "value":self.VALUE, "bounce":True, "flags":1, "payload":self.PAYLOAD}, signer=self.MSIG.SIGNER, expire=entry["MESSAGE_EXPIRE"])
+        return entry["MESSAGE"]
+
+    # Prepares messages for domains expiring soon and sends the ones that have expired; returns {address: callFunction-style result}.
+    # "unwatch" can drop domains from another thread, so DOMAINS and READY are only used under LOCK and sending is done outside of it
+    def runPending(self, now: int = None):
+        self._processChanges()
+        now = getNowTimestamp() if now is None else now
+
+        for (expires, address) in self._popSoon(now + PREPARE_AHEAD):
+            with self.LOCK:
+                if address in self.DOMAINS:
+                    self._prepare(address, expires)
+                    self.READY[address] = expires
+
+        messages = {}
+        with self.LOCK:
+            for (address, expires) in sorted(self.READY.items(), key=lambda item: item[1]):
+                if not self._isCurrent((expires, address)):
+                    del self.READY[address]
+                elif now >= self._getSendTime(address, expires):
+                    messages[address] = self._prepare(address, expires)
+
+        handles = {address: self._send(message) for (address, message) in messages.items()}
+        results = dict(zip(handles.keys(), waitAll(everClient=self.EVERCLIENT, handles=list(handles.values()))))
+        for address in results.keys():
+            if results[address]["exception"]["errorCode"] == REPLAY_PROTECTION_EXIT_CODE:
+                with self.LOCK:
+                    message = self._prepareAgain(address)
+                if message != "":
+                    results[address] = waitFunction(everClient=self.EVERCLIENT, handle=self._send(message))
+
+            # Only a claim the Multisig accepted is done, anything else is sent again after RETRY_DELAY
+            with self.LOCK:
+                entry   = self.DOMAINS.get(address)
+                expires = self.READY.get(address)
+                if entry is None or expires is None:
+                    self.READY.pop(address, None)
+                elif results[address]["exception"]["errorCode"] == 0:
+                    entry["FIRED"] = expires
+                    del self.READY[address]
+                else:
+                    entry["RETRY_AT"] = getNowTimestamp() + RETRY_DELAY
+
+        BOC_CACHE.invalidate(list(handles.keys()))
+        return results
+
+    # Signs the message of a ready domain again with a fresh header, "" when the domain is not watched anymore
+    def _prepareAgain(self, address: str):
+        if address not in self.DOMAINS or address not in self.READY:
+            return ""
+        self.DOMAINS[address]["MESSAGE"] = ""
+        return self._prepare(address, self.READY[address])
+
+    def _send(self, message: str):
+        return sendMessage(everClient=self.EVERCLIENT, abiPath=self.MSIG.ABI, contractAddress=self.MSIG.ADDRESS, message=message)
+
+    def run(self, maxSleep: int = 60, iterations: int = 0):
+        iteration = 0
+        while iterations <= 0 or iteration < iterations:
+            self.runPending()
+            iteration += 1
+
+            nextTime = self.getNextTime()
+            sleep    = maxSleep if nextTime is None else min(max(nextTime - getNowTimestamp(), 0), maxSleep)
+            self.WAKEUP.wait(sleep)
+            self.WAKEUP.clear()
+
+    def close(self):
+        self.unsubscribe()
+
+# ==============================================================================
+#
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+# ==============================================================================
+# EXPIRY SCHEDULER
+# Keeps owned domains in a min-heap keyed by the time their prolongation window opens ("dtExpires" - TEN_DAYS)
+# and sends "prolongate" through the owning Multisig when it does. Only due domains are touched: their whois
+# is re-read in one bulk query right before sending, so prolongations done elsewhere are picked up, not repeated.
+#
+# Usage:
+#   scheduler = ExpiryScheduler(everClient=getEverClient(testnet=False))
+#   scheduler.track([(DnsRecord(everClient, "org", msig.ADDRESS), msig), ...])
+#   scheduler.run()
+import heapq
+import time
+import ever_utils
+from   ever_utils import *
+from   contract_DnsRecord import *
+
+# ==============================================================================
+#
+PROLONGATE_MARGIN = 10 # seconds after the window opens, block time may lag behind local time
+RETRY_DELAY       = 60 # seconds before a sent "prolongate" is checked (and re-sent if needed)
+
+class ExpiryScheduler(object):
+    def __init__(self, everClient: TonClient, contractName: str = "DnsRecord", margin: int = PROLONGATE_MARGIN):
+        self.EVERCLIENT    = everClient
+        self.CONTRACT_NAME = contractName
+        self.MARGIN        = margin
+        self.HEAP          = [] # (time, address, dtExpires)
+        self.DOMAINS       = {} # address -> {"DOMAIN", "MSIG", "EXPIRES"}
+
+    def _schedule(self, address: str, expires: int, at: int):
+        self.DOMAINS[address]["EXPIRES"] = expires
+        heapq.heappush(self.HEAP, (at, address, expires))
+
+    def _scheduleWindow(self, address: str, expires: int):
+        self._schedule(address, expires, expires - TEN_DAYS + self.MARGIN)
+
+    # Domains that can be prolongated by their Multisig, to keep going
+    def _isProlongable(self, address: str, whois, now: int):
+        entry = self.DOMAINS[address]
+        return whois != "" and whois["ownerAddress"] == entry["MSIG"].ADDRESS and int(whois["dtExpires"]) >= now
+
+    # ========================================
+    # "domains" is [(DnsRecord, Multisig), ...]; returns addresses that are not tracked (not deployed,
+    # owned by someone else or already expired). Tracking a domain again keeps its heap entry if "dtExpires" is the same
+    def track(self, domains):
+        domains = list(domains)
+        for (domain, msig) in domains:
+            expires = self.DOMAINS[domain.ADDRESS]["EXPIRES"] if domain.ADDRESS in self.DOMAINS else 0
+            self.DOMAINS[domain.ADDRESS] = {"DOMAIN": domain, "MSIG": msig, "EXPIRES": expires}
+
+        now     = getNowTimestamp()
+        whois   = getWhoisMany(everClient=self.EVERCLIENT, addresses=[domain.ADDRESS for (domain, _) in domains], contractName=self.CONTRACT_NAME)
+        skipped = []
+        for (domain, _) in domains:
+            if self._isProlongable(domain.ADDRESS, whois[domain.ADDRESS], now):
+                if int(whois[domain.ADDRESS]["dtExpires"]) != self.DOMAINS[domain.ADDRESS]["EXPIRES"]:
+                    self._scheduleWindow(domain.ADDRESS, int(whois[domain.ADDRESS]["dtExpires"]))
+            else:
+                self.untrack(domain.ADDRESS)
+                skipped.append(domain.ADDRESS)
+        return skipped
+
+    def untrack(self, address: str):
+        # Heap entries are dropped lazily when they come up
+        self.DOMAINS.pop(address, None)
+
+    def getNextTime(self):
+        while len(self.HEAP) > 0 and not self._isCurrent(self.HEAP[0]):
+            heapq.heappop(self.HEAP)
+        return self.HEAP[0][0] if len(self.HEAP) > 0 else None
+
+    def _isCurrent(self, item):
+        (_, address, expires) = item
+        return address in self.DOMAINS and self.DOMAINS[address]["EXPIRES"] == expires
+
+    # ========================================
+    # Sends "prolongate" for every domain whose window is open, one pipelined batch per Multisig;
+    # returns {address: callFunction-style result}
+    def runPending(self, now: int = None):
+        now = getNowTimestamp() if now is None else now
+
+        # One address can have several current entries (e.g. a retry and its window), it is sent only once
+        due = []
+        while len(self.HEAP) > 0 and self.HEAP[0][0] <= now:
+            item = heapq.heappop(self.HEAP)
+            if self._isCurrent(item) and item[1] not in due:
+                due.append(item[1])
+        if len(due) == 0:
+            return {}
+
+        whois = getWhoisMany(everClient=self.EVERCLIENT, addresses=due, contractName=self.CONTRACT_NAME)
+        batches = {}
+        for address in due:
+            if not self._isProlongable(address, whois[address], now):
+                self.untrack(address)
+                continue
+            expires = int(whois[address]["dtExpires"])
+            if expires != self.DOMAINS[address]["EXPIRES"] or now < expires - TEN_DAYS:
+                self._scheduleWindow(address, expires)
+                continue
+            msig = self.DOMAINS[address]["MSIG"]
+            batches.setdefault(msig.ADDRESS, (msig, []))[1].append(address)
+
+        results = {}
+        for (msig, addresses) in batches.values():
+            msig.beginPipeline()
+            for address in addresses:
+                self.DOMAINS[address]["DOMAIN"].prolongate(msig=msig)
+            for (address, result) in zip(addresses, msig.waitPipeline()):
+                results[address] = result
+                # Checked again (new "dtExpires" is picked up from whois) after RETRY_DELAY
+                self._schedule(address, self.DOMAINS[address]["EXPIRES"], now + RETRY_DELAY)
+        return results
+
+    def run(self, maxSleep: int = 60, iterations: int = 0):
+        iteration = 0
+        while iterations <= 0 or iteration < iterations:
+            self.runPending()
+            iteration += 1
+            nextTime = self.getNextTime()
+            sleep    = maxSleep if nextTime is None else min(max(nextTime - getNowTimestamp(), 0), maxSleep)
+            time.sleep(sleep)
+
+# ==============================================================================
+#
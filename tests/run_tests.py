@@ -5,23 +5,45 @@
 import ever_utils
 from   ever_utils import *
 import unittest
+import asyncio
 import time
 import sys
+import os
+import io
+import csv
+import tempfile
+import importlib.util
 from   pprint import pprint
-from   contract_DnsRecord         import DnsRecord
-from   contract_DnsRecordTEST     import DnsRecordTEST
+from   concurrent.futures import ThreadPoolExecutor
+from   contract_DnsRecord         import DnsRecord, calculateDomainAddresses, validateDomainName, decodeWhoisFromData, DnsWhois, getWhoisRecords, resolveDomainChain, resolveDomainChains, predictRegistration, REG_RESULT, TEN_DAYS, NINETY_DAYS
+from   contract_DnsRecordTEST     import DnsRecordTEST, AsyncDnsRecordTEST
 from   contract_DnsDebotTEST      import DnsDebotTEST
 from   contract_DnsDebot          import DnsDebot
+from   ever_utils_async           import getEverClientAsync, giverGiveManyAsync, sendFunctionAsync, waitAllAsync, unwrapMessagesAsync, AsyncMultisig
+from   ever_local                 import LocalClient, LocalAsyncClient
+from   event_indexer              import EventIndexer
+from   expiry_scheduler           import ExpiryScheduler, PROLONGATE_MARGIN, RETRY_DELAY
+from   expired_watcher            import ExpiredWatcher, PREPARE_AHEAD
+from   whois_exporter             import exportWhois, WHOIS_COLUMNS
 
 # ==============================================================================
 #
 SERVER_ADDRESS = "https://net.ton.dev"
+PARALLEL       = 0
+LOCAL_CLIENT   = None
 
 # ==============================================================================
 #
 def getClient():
+    if LOCAL_CLIENT is not None:
+        return LOCAL_CLIENT
     return getEverClient(testnet=False, customServer=SERVER_ADDRESS)
 
+def getAsyncClient():
+    if LOCAL_CLIENT is not None:
+        return LocalAsyncClient(LOCAL_CLIENT.NETWORK)
+    return getEverClientAsync(testnet=False, customServer=SERVER_ADDRESS)
+
 # ==============================================================================
 # 
 # Parse arguments and then clear them because UnitTest will @#$~!
@@ -46,6 +68,21 @@ for _, arg in enumerate(sys.argv[1:]):
         ever_utils.MSIG_GIVER = arg[13:]
         sys.argv.remove(arg)
 
+    if arg.startswith("--tvc-cache"):
+        
+        ever_utils.TVC_CACHE_DIR = arg[12:]
+        sys.argv.remove(arg)
+
+    if arg.startswith("--parallel"):
+        
+        PARALLEL = int(arg[11:])
+        sys.argv.remove(arg)
+
+    if arg == "--local":
+        
+        LOCAL_CLIENT = LocalClient()
+        sys.argv.remove(arg)
+
 # ==============================================================================
 # EXIT CODE FOR SINGLE-MESSAGE OPERATIONS
 # we know we have only 1 internal message, that's why this wrapper has no filters
@@ -62,12 +99,36 @@ def _getExitCode(msgIdArray):
         realExitCode = -1
     return realExitCode   
 """
+# ==============================================================================
+# FIXTURES
+# Contracts of a TestCase are created in "createFixtures()" once, on "setUpClass" (or when the
+# parallel runner needs their addresses), so only the classes that actually run build anything.
+class FixtureTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        if "FIXTURES_READY" not in cls.__dict__:
+            cls.createFixtures()
+            cls.FIXTURES_READY = True
+
+    @classmethod
+    def createFixtures(cls):
+        pass
+
+def newMultisig():
+    return Multisig(everClient=getClient())
+
+def newDomain(name: str, owner: Multisig):
+    return DnsRecordTEST(everClient=getClient(), name=name, ownerAddress=owner.ADDRESS)
+
 # ==============================================================================
 # 
-class Test_01_SameNameDeploy(unittest.TestCase):
+class Test_01_SameNameDeploy(FixtureTestCase):
 
-    msig   = Multisig(everClient=getClient())
-    domain = DnsRecordTEST(everClient=getClient(), name="org", ownerAddress=msig.ADDRESS)
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="org", owner=cls.msig)
     
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
@@ -75,8 +136,10 @@ class Test_01_SameNameDeploy(unittest.TestCase):
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain.ADDRESS, EVER * 1)
-        giverGive(getClient(), self.msig.ADDRESS,   EVER * 1)
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 1),
+            (self.msig.ADDRESS,   EVER * 1)
+        ])
 
     # 2. Deploy multisig
     def test_2(self):
@@ -102,10 +165,12 @@ class Test_01_SameNameDeploy(unittest.TestCase):
 
 # ==============================================================================
 #
-class Test_02_DeployWithMultisigOwner(unittest.TestCase):
+class Test_02_DeployWithMultisigOwner(FixtureTestCase):
     
-    msig   = Multisig(everClient=getClient())
-    domain = DnsRecordTEST(everClient=getClient(), name="net", ownerAddress=msig.ADDRESS)
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="net", owner=cls.msig)
     
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
@@ -113,8 +178,10 @@ class Test_02_DeployWithMultisigOwner(unittest.TestCase):
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain.ADDRESS, EVER * 1)
-        giverGive(getClient(), self.msig.ADDRESS,   EVER * 1)
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 1),
+            (self.msig.ADDRESS,   EVER * 1)
+        ])
         
     # 2. Deploy multisig
     def test_2(self):
@@ -143,36 +210,37 @@ class Test_02_DeployWithMultisigOwner(unittest.TestCase):
         self.assertEqual(result["exception"]["errorCode"], 0)
 
 # ==============================================================================
-#
-class Test_03_WrongNames(unittest.TestCase):
+# (name, deploy error code), used by Test_03_WrongNames and Test_16_ClientSide
+DOMAIN_NAME_CODES = [
+    ("org-org",                                                            0),
+    ("ORG",                                                              200),
+    ("F@!#ING",                                                          200),
+    ("ddd//dd",                                                          200),
+    ("ff/ff",                                                              0),
+    ("//",                                                               200),
+    ("",                                                                 200),
+    ("under_score",                                                      200),
+    ("good-domain-name-with-31-letter",                                    0),
+    ("perfectly000fine000domain000name000with63letters000inside000kek",  200),
+    ("one/two/three/four",                                                 0),
+    ("one/two/three/four/five",                                          200),
+    ("too000long000domain000name000with64letters000inside000kekekelolz", 200),
+]
+
+class Test_03_WrongNames(FixtureTestCase):
+    
+    @classmethod
+    def createFixtures(cls):
+        cls.msig = newMultisig()
+        cls.domainDictList = [{"CODE": code, "DOMAIN": newDomain(name=name, owner=cls.msig)} for (name, code) in DOMAIN_NAME_CODES]
     
-    msig = Multisig(everClient=getClient())
-    domainDictList = [
-        {"CODE": 0,   "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "org-org",                                                          ownerAddress=msig.ADDRESS)},
-        {"CODE": 200, "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "ORG",                                                              ownerAddress=msig.ADDRESS)},
-        {"CODE": 200, "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "F@!#ING",                                                          ownerAddress=msig.ADDRESS)},
-        {"CODE": 200, "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "ddd//dd",                                                          ownerAddress=msig.ADDRESS)},
-        {"CODE": 0,   "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "ff/ff",                                                            ownerAddress=msig.ADDRESS)},
-        {"CODE": 200, "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "//",                                                               ownerAddress=msig.ADDRESS)},
-        {"CODE": 200, "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "",                                                                 ownerAddress=msig.ADDRESS)},
-        {"CODE": 200, "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "under_score",                                                      ownerAddress=msig.ADDRESS)},
-        {"CODE": 0,   "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "good-domain-name-with-31-letter",                                  ownerAddress=msig.ADDRESS)},
-        {"CODE": 200, "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "perfectly000fine000domain000name000with63letters000inside000kek",  ownerAddress=msig.ADDRESS)},
-        {"CODE": 0,   "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "one/two/three/four",                                               ownerAddress=msig.ADDRESS)},
-        {"CODE": 200, "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "one/two/three/four/five",                                          ownerAddress=msig.ADDRESS)},
-        {"CODE": 200, "DOMAIN": DnsRecordTEST(everClient=getClient(), name = "too000long000domain000name000with64letters000inside000kekekelolz", ownerAddress=msig.ADDRESS)},
-    ]
-
-
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
         print("Running:", self.__class__.__name__)
 
     # 1. Giver
     def test_1(self):
-        for rec in self.domainDictList:
-            giverGive(getClient(), rec["DOMAIN"].ADDRESS, EVER * 1)
-        giverGive(getClient(), self.msig.ADDRESS, EVER * 1)
+        giverGiveMany(getClient(), [(rec["DOMAIN"].ADDRESS, EVER * 1) for rec in self.domainDictList] + [(self.msig.ADDRESS, EVER * 1)])
 
     # 2. Deploy multisig
     def test_2(self):
@@ -196,19 +264,23 @@ class Test_03_WrongNames(unittest.TestCase):
 
 # ==============================================================================
 #
-class Test_04_Prolongate(unittest.TestCase):
+class Test_04_Prolongate(FixtureTestCase):
+    
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="net", owner=cls.msig)
     
-    msig   = Multisig(everClient=getClient())
-    domain = DnsRecordTEST(everClient=getClient(), name="net", ownerAddress=msig.ADDRESS)
-
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
         print("Running:", self.__class__.__name__)
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig.ADDRESS,   EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
 
     # 2. Deploy multisig
     def test_2(self):
@@ -267,23 +339,27 @@ class Test_04_Prolongate(unittest.TestCase):
 
 # ==============================================================================
 #
-class Test_05_ClaimFFA(unittest.TestCase):
+class Test_05_ClaimFFA(FixtureTestCase):
+    
+    @classmethod
+    def createFixtures(cls):
+        cls.msig1          = newMultisig()
+        cls.msig2          = newMultisig()
+        cls.domain_net     = newDomain(name="net",     owner=cls.msig1)
+        cls.domain_net_kek = newDomain(name="net/kek", owner=cls.msig2)
     
-    msig1          = Multisig(everClient=getClient())
-    msig2          = Multisig(everClient=getClient())
-    domain_net     = DnsRecordTEST(everClient=getClient(), name="net",     ownerAddress=msig1.ADDRESS)
-    domain_net_kek = DnsRecordTEST(everClient=getClient(), name="net/kek", ownerAddress=msig2.ADDRESS)
-
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
         print("Running:", self.__class__.__name__)
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain_net.ADDRESS,     EVER * 2)
-        giverGive(getClient(), self.domain_net_kek.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig1.ADDRESS,          EVER * 2)
-        giverGive(getClient(), self.msig2.ADDRESS,          EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain_net.ADDRESS,     EVER * 2),
+            (self.domain_net_kek.ADDRESS, EVER * 2),
+            (self.msig1.ADDRESS,          EVER * 2),
+            (self.msig2.ADDRESS,          EVER * 2)
+        ])
 
     # 2. Deploy multisig
     def test_2(self):
@@ -333,12 +409,14 @@ class Test_05_ClaimFFA(unittest.TestCase):
 
 # ==============================================================================
 # 
-class Test_06_ClaimMoney(unittest.TestCase):
-
-    msig1              = Multisig(everClient=getClient())
-    msig2              = Multisig(everClient=getClient())
-    domain_domaino     = DnsRecordTEST(everClient=getClient(), name="domaino",     ownerAddress=msig1.ADDRESS)
-    domain_domaino_kek = DnsRecordTEST(everClient=getClient(), name="domaino/kek", ownerAddress=msig2.ADDRESS)
+class Test_06_ClaimMoney(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig1              = newMultisig()
+        cls.msig2              = newMultisig()
+        cls.domain_domaino     = newDomain(name="domaino",     owner=cls.msig1)
+        cls.domain_domaino_kek = newDomain(name="domaino/kek", owner=cls.msig2)
     
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
@@ -346,10 +424,12 @@ class Test_06_ClaimMoney(unittest.TestCase):
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain_domaino.ADDRESS,     EVER * 2)
-        giverGive(getClient(), self.domain_domaino_kek.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig1.ADDRESS,              EVER * 2)
-        giverGive(getClient(), self.msig2.ADDRESS,              EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain_domaino.ADDRESS,     EVER * 2),
+            (self.domain_domaino_kek.ADDRESS, EVER * 2),
+            (self.msig1.ADDRESS,              EVER * 2),
+            (self.msig2.ADDRESS,              EVER * 2)
+        ])
         
     # 2. Deploy multisig
     def test_2(self):
@@ -412,12 +492,14 @@ class Test_06_ClaimMoney(unittest.TestCase):
 
 # ==============================================================================
 # 
-class Test_07_ClaimOwner(unittest.TestCase):
-
-    msig1              = Multisig(everClient=getClient())
-    msig2              = Multisig(everClient=getClient())
-    domain_domaino     = DnsRecordTEST(everClient=getClient(), name="domaino",     ownerAddress=msig1.ADDRESS)
-    domain_domaino_kek = DnsRecordTEST(everClient=getClient(), name="domaino/kek", ownerAddress=msig2.ADDRESS)
+class Test_07_ClaimOwner(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig1              = newMultisig()
+        cls.msig2              = newMultisig()
+        cls.domain_domaino     = newDomain(name="domaino",     owner=cls.msig1)
+        cls.domain_domaino_kek = newDomain(name="domaino/kek", owner=cls.msig2)
     
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
@@ -425,10 +507,12 @@ class Test_07_ClaimOwner(unittest.TestCase):
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain_domaino.ADDRESS,     EVER * 2)
-        giverGive(getClient(), self.domain_domaino_kek.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig1.ADDRESS,              EVER * 2)
-        giverGive(getClient(), self.msig2.ADDRESS,              EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain_domaino.ADDRESS,     EVER * 2),
+            (self.domain_domaino_kek.ADDRESS, EVER * 2),
+            (self.msig1.ADDRESS,              EVER * 2),
+            (self.msig2.ADDRESS,              EVER * 2)
+        ])
         
     # 2. Deploy multisig
     def test_2(self):
@@ -487,23 +571,27 @@ class Test_07_ClaimOwner(unittest.TestCase):
 
 # ==============================================================================
 # 
-class Test_08_ClaimDeny(unittest.TestCase):       
-
-    msig1          = Multisig(everClient=getClient())
-    msig2          = Multisig(everClient=getClient())
-    domain_net     = DnsRecordTEST(everClient=getClient(), name="net",     ownerAddress=msig1.ADDRESS)
-    domain_net_kek = DnsRecordTEST(everClient=getClient(), name="net/kek", ownerAddress=msig2.ADDRESS)
-
+class Test_08_ClaimDeny(FixtureTestCase):       
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig1          = newMultisig()
+        cls.msig2          = newMultisig()
+        cls.domain_net     = newDomain(name="net",     owner=cls.msig1)
+        cls.domain_net_kek = newDomain(name="net/kek", owner=cls.msig2)
+    
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
         print("Running:", self.__class__.__name__)
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain_net.ADDRESS,     EVER * 2)
-        giverGive(getClient(), self.domain_net_kek.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig1.ADDRESS,          EVER * 2)
-        giverGive(getClient(), self.msig2.ADDRESS,          EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain_net.ADDRESS,     EVER * 2),
+            (self.domain_net_kek.ADDRESS, EVER * 2),
+            (self.msig1.ADDRESS,          EVER * 2),
+            (self.msig2.ADDRESS,          EVER * 2)
+        ])
 
     # 2. Deploy multisig
     def test_2(self):
@@ -563,19 +651,23 @@ class Test_08_ClaimDeny(unittest.TestCase):
 
 # ==============================================================================
 # 
-class Test_09_RegisterWithNoParent(unittest.TestCase):
-
-    msig   = Multisig(everClient=getClient())
-    domain = DnsRecordTEST(everClient=getClient(), name="net/some/shit", ownerAddress=msig.ADDRESS)
+class Test_09_RegisterWithNoParent(FixtureTestCase):
 
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="net/some/shit", owner=cls.msig)
+    
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
         print("Running:", self.__class__.__name__)
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig.ADDRESS,   EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
 
     # 2. Deploy multisig
     def test_2(self):
@@ -612,12 +704,14 @@ class Test_09_RegisterWithNoParent(unittest.TestCase):
 
 # ==============================================================================
 # 
-class Test_10_CheckWhoisStatistics(unittest.TestCase):       
-
-    msig1              = Multisig(everClient=getClient())
-    msig2              = Multisig(everClient=getClient())
-    domain_domaino     = DnsRecordTEST(everClient=getClient(), name="domaino",     ownerAddress=msig1.ADDRESS)
-    domain_domaino_kek = DnsRecordTEST(everClient=getClient(), name="domaino/kek", ownerAddress=msig2.ADDRESS)
+class Test_10_CheckWhoisStatistics(FixtureTestCase):       
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig1              = newMultisig()
+        cls.msig2              = newMultisig()
+        cls.domain_domaino     = newDomain(name="domaino",     owner=cls.msig1)
+        cls.domain_domaino_kek = newDomain(name="domaino/kek", owner=cls.msig2)
     
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
@@ -625,10 +719,12 @@ class Test_10_CheckWhoisStatistics(unittest.TestCase):
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain_domaino.ADDRESS,     EVER * 2)
-        giverGive(getClient(), self.domain_domaino_kek.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig1.ADDRESS,              EVER * 2)
-        giverGive(getClient(), self.msig2.ADDRESS,              EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain_domaino.ADDRESS,     EVER * 2),
+            (self.domain_domaino_kek.ADDRESS, EVER * 2),
+            (self.msig1.ADDRESS,              EVER * 2),
+            (self.msig2.ADDRESS,              EVER * 2)
+        ])
         
     # 2. Deploy multisig
     def test_2(self):
@@ -730,10 +826,12 @@ class Test_10_CheckWhoisStatistics(unittest.TestCase):
 
 # ==============================================================================
 # 
-class Test_11_ChangeWhois(unittest.TestCase):   
+class Test_11_ChangeWhois(FixtureTestCase):   
     
-    msig   = Multisig(everClient=getClient())
-    domain = DnsRecordTEST(everClient=getClient(), name="domaino",ownerAddress=msig.ADDRESS)
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="domaino",owner=cls.msig)
     
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
@@ -741,8 +839,10 @@ class Test_11_ChangeWhois(unittest.TestCase):
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig.ADDRESS,   EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
         
     # 2. Deploy multisig
     def test_2(self):
@@ -777,10 +877,12 @@ class Test_11_ChangeWhois(unittest.TestCase):
 
 # ==============================================================================
 # 
-class Test_12_ReleaseDomain(unittest.TestCase): 
+class Test_12_ReleaseDomain(FixtureTestCase): 
     
-    msig   = Multisig(everClient=getClient())
-    domain = DnsRecordTEST(everClient=getClient(), name="dominos", ownerAddress=msig.ADDRESS)
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="dominos", owner=cls.msig)
     
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
@@ -788,8 +890,10 @@ class Test_12_ReleaseDomain(unittest.TestCase):
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig.ADDRESS,   EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
         
     # 2. Deploy multisig
     def test_2(self):
@@ -822,11 +926,13 @@ class Test_12_ReleaseDomain(unittest.TestCase):
 
 # ==============================================================================
 # 
-class Test_13_ClaimAlreadyClaimed(unittest.TestCase):       
+class Test_13_ClaimAlreadyClaimed(FixtureTestCase):       
 
-    msig1  = Multisig(everClient=getClient())
-    msig2  = Multisig(everClient=getClient())
-    domain = DnsRecordTEST(everClient=getClient(), name="domaino", ownerAddress=msig1.ADDRESS)
+    @classmethod
+    def createFixtures(cls):
+        cls.msig1  = newMultisig()
+        cls.msig2  = newMultisig()
+        cls.domain = newDomain(name="domaino", owner=cls.msig1)
     
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
@@ -834,9 +940,11 @@ class Test_13_ClaimAlreadyClaimed(unittest.TestCase):
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig1.ADDRESS,  EVER * 2)
-        giverGive(getClient(), self.msig2.ADDRESS,  EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig1.ADDRESS,  EVER * 2),
+            (self.msig2.ADDRESS,  EVER * 2)
+        ])
         
     # 2. Deploy multisig
     def test_2(self):
@@ -874,31 +982,35 @@ class Test_13_ClaimAlreadyClaimed(unittest.TestCase):
 
 # ==============================================================================
 #
-class Test_14_LongestName(unittest.TestCase):
+class Test_14_LongestName(FixtureTestCase):
+    
+    @classmethod
+    def createFixtures(cls):
+        cls.msig1        = newMultisig()
+        cls.msig2        = newMultisig()
+        cls.msig3        = newMultisig()
+        cls.msig4        = newMultisig()
+        cls.domain_1     = newDomain(owner=cls.msig1, name="1234567890123456789012345678901")
+        cls.domain_2     = newDomain(owner=cls.msig2, name="1234567890123456789012345678901/1234567890123456789012345678901")
+        cls.domain_3     = newDomain(owner=cls.msig3, name="1234567890123456789012345678901/1234567890123456789012345678901/1234567890123456789012345678901")
+        cls.domain_4     = newDomain(owner=cls.msig4, name="1234567890123456789012345678901/1234567890123456789012345678901/1234567890123456789012345678901/1234567890123456789012345678901")
     
-    msig1        = Multisig(everClient=getClient())
-    msig2        = Multisig(everClient=getClient())
-    msig3        = Multisig(everClient=getClient())
-    msig4        = Multisig(everClient=getClient())
-    domain_1     = DnsRecordTEST(everClient=getClient(), ownerAddress=msig1.ADDRESS, name="1234567890123456789012345678901")
-    domain_2     = DnsRecordTEST(everClient=getClient(), ownerAddress=msig2.ADDRESS, name="1234567890123456789012345678901/1234567890123456789012345678901")
-    domain_3     = DnsRecordTEST(everClient=getClient(), ownerAddress=msig3.ADDRESS, name="1234567890123456789012345678901/1234567890123456789012345678901/1234567890123456789012345678901")
-    domain_4     = DnsRecordTEST(everClient=getClient(), ownerAddress=msig4.ADDRESS, name="1234567890123456789012345678901/1234567890123456789012345678901/1234567890123456789012345678901/1234567890123456789012345678901")
-
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
         print("Running:", self.__class__.__name__)
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain_1.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.domain_2.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.domain_3.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.domain_4.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig1.ADDRESS,    EVER * 2)
-        giverGive(getClient(), self.msig2.ADDRESS,    EVER * 2)
-        giverGive(getClient(), self.msig3.ADDRESS,    EVER * 2)
-        giverGive(getClient(), self.msig4.ADDRESS,    EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain_1.ADDRESS, EVER * 2),
+            (self.domain_2.ADDRESS, EVER * 2),
+            (self.domain_3.ADDRESS, EVER * 2),
+            (self.domain_4.ADDRESS, EVER * 2),
+            (self.msig1.ADDRESS,    EVER * 2),
+            (self.msig2.ADDRESS,    EVER * 2),
+            (self.msig3.ADDRESS,    EVER * 2),
+            (self.msig4.ADDRESS,    EVER * 2)
+        ])
 
     # 2. Deploy multisig
     def test_2(self):
@@ -990,19 +1102,23 @@ class Test_14_LongestName(unittest.TestCase):
 
 # ==============================================================================
 #
-class Test_15_ClaimInvalid(unittest.TestCase):
+class Test_15_ClaimInvalid(FixtureTestCase):
+    
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name = "netOVKA", owner=cls.msig)
     
-    msig   = Multisig(everClient=getClient())
-    domain = DnsRecordTEST(everClient=getClient(), name = "netOVKA", ownerAddress=msig.ADDRESS)
-
     def test_0(self):
         print("\n\n----------------------------------------------------------------------")
         print("Running:", self.__class__.__name__)
 
     # 1. Giver
     def test_1(self):
-        giverGive(getClient(), self.domain.ADDRESS, EVER * 2)
-        giverGive(getClient(), self.msig.ADDRESS,   EVER * 2)
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
 
     # 2. Deploy multisig
     def test_2(self):
@@ -1027,8 +1143,1104 @@ class Test_15_ClaimInvalid(unittest.TestCase):
         result = self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
         self.assertEqual(result["exception"]["errorCode"], 0)
 
+# ==============================================================================
+# Client-side helpers checked against the contracts they stand in for
+class Test_16_ClientSide(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="client-side", owner=cls.msig)
+
+    def _assertWhoisFromData(self):
+        data  = getAccountGraphQL(getClient(), self.domain.ADDRESS, "data")["data"]
+        whois = self.domain.getWhois()
+        self.assertEqual(decodeWhoisFromData(data), whois)
+        return whois
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Local address calculation is the same as "getAddress", also for names longer than 127 bytes (more than one cell)
+    def test_1(self):
+        names = ["org", "net/kek", "a", "", "one/two/three/four", "x" * 127, "y" * 128, "z" * 300, "домен" * 40]
+        for contractName in ["DnsRecord", "DnsRecordTEST"]:
+            tvcPath   = "../bin/" + contractName + ".tvc"
+            addresses = calculateDomainAddresses(names, contractName=contractName)
+            for (name, address) in zip(names, addresses):
+                initialData = {"_domainName":stringToHex(name), "_domainCode":getCodeFromTvc(tvcPath)}
+                self.assertEqual(address, getAddressZeroPubkey(abiPath=contractName, tvcPath=tvcPath, initialData=initialData), name)
+
+    # 2. Name validation gives the same results as the contract, invalid names are refused before sending anything
+    def test_2(self):
+        for (name, code) in DOMAIN_NAME_CODES:
+            self.assertEqual(validateDomainName(name), code == 0, name)
+            if code != 0:
+                result = DnsRecord(everClient=getClient(), name=name, ownerAddress=ZERO_ADDRESS).deploy()
+                self.assertEqual(result["exception"]["errorCode"], code, name)
+
+    # 3. Giver
+    def test_3(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
+
+    # 4. Deploy multisig and "client-side"
+    def test_4(self):
+        result = self.msig.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 5. Whois decoded from account data is the same as "getWhois" after every change
+    def test_5(self):
+        self._assertWhoisFromData()
+
+        result = self.domain.changeComment(msig=self.msig, newComment="Комментарий / comment")
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        whois  = self._assertWhoisFromData()
+        self.assertEqual(hexToString(whois["comment"]), "Комментарий / comment")
+
+        result = self.domain.changeRegistrationPrice(msig=self.msig, newPrice=DIME*3)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        whois  = self._assertWhoisFromData()
+        self.assertEqual(whois["registrationPrice"], str(DIME*3))
+
+        result = self.domain.changeRegistrationType(msig=self.msig, newType=1)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        whois  = self._assertWhoisFromData()
+        self.assertEqual(whois["registrationType"], "1")
+
+    # 6. DnsWhois and DnsWhoisArray give back the same whois
+    def test_6(self):
+        whois = self.domain.getWhois()
+        self.assertEqual(DnsWhois.fromDict(whois).toDict(), whois)
+        self.assertEqual(self.domain.getWhoisRecord(), DnsWhois.fromDict(whois))
+
+        missing = calculateDomainAddresses(["client-side-missing"], contractName="DnsRecordTEST")[0]
+        records = getWhoisRecords(everClient=getClient(), addresses=[self.domain.ADDRESS, missing], contractName="DnsRecordTEST")
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records.get(self.domain.ADDRESS).toDict(), whois)
+        self.assertEqual(records.get(missing), "")
+
+    # 7. Cleanup
+    def test_7(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+# ==============================================================================
+#
+class Test_17_UnwrapMessages(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="unwrap-messages", owner=cls.msig)
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Giver
+    def test_1(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
+
+    # 2. Deploy multisig and "unwrap-messages"
+    def test_2(self):
+        result = self.msig.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 3. Multisig -> "changeComment" -> change back to Multisig is unwrapped in tree order with decoded bodies
+    def test_3(self):
+        result = self.domain.changeComment(msig=self.msig, newComment="unwrap")
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        msgArray = unwrapMessages(result, getClient())
+        self.assertEqual(len(msgArray), 2)
+        self.assertEqual(msgArray[0]["MESSAGE_ID:"],     result["result"].transaction["out_msgs"][0])
+        self.assertEqual(msgArray[0]["SOURCE"],          self.msig.ADDRESS)
+        self.assertEqual(msgArray[0]["DEST"],            self.domain.ADDRESS)
+        self.assertEqual(msgArray[0]["FUNCTION_NAME"],   "changeComment")
+        self.assertEqual(msgArray[0]["FUNCTION_PARAMS"], {"newComment": stringToHex("unwrap")})
+        self.assertEqual(msgArray[0]["TX_DETAILS"]["compute"]["exit_code"], 0)
+        self.assertEqual(msgArray[0]["OUT_MSGS"], [msgArray[1]["MESSAGE_ID:"]])
+        self.assertEqual(msgArray[1]["SOURCE"],          self.domain.ADDRESS)
+        self.assertEqual(msgArray[1]["DEST"],            self.msig.ADDRESS)
+
+        # Batched lookups give the same messages and transactions as one query per message
+        for msg in msgArray:
+            self.assertEqual(msg["TX_DETAILS"]["id"], getTransactionGraphQL(getClient(), msg["MESSAGE_ID:"], "id")["id"])
+            self.assertEqual(msg["VALUE"],            getMessageGraphQL(getClient(), msg["MESSAGE_ID:"], "value(format:DEC)")["value"])
+        self.assertEqual(getExitCode(msgIdArray=result["result"].transaction["out_msgs"], everClient=getClient()), 0)
+
+    # 4. Cleanup
+    def test_4(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+# ==============================================================================
+# Bodies are decoded by their function ID, ABIs that don't have it are not tried
+class Test_18_DecodeMessageBody(FixtureTestCase):
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Every body goes to the ABI and function it was encoded with
+    def test_1(self):
+        abiArray = ["SetcodeMultisigWallet", "DnsRecord"]
+        calls    = [
+            ("DnsRecord",             "claimExpired",           {"newOwnerAddress": ZERO_ADDRESS, "forceFeeReturnToOwner": False}),
+            ("DnsRecord",             "changeComment",          {"newComment": stringToHex("decode")}),
+            ("DnsRecord",             "changeRegistrationType", {"newType": 1}),
+            ("DnsRecord",             "prolongate",             {}),
+            ("SetcodeMultisigWallet", "sendTransaction",        {"dest": ZERO_ADDRESS, "value": EVER, "bounce": False, "flags": 1, "payload": ""}),
+        ]
+        for (abiName, functionName, functionParams) in calls:
+            body     = prepareMessageBoc(abiPath=abiName, functionName=functionName, functionParams=functionParams)
+            abiJson  = ABI_REGISTRY.getJson(abiName)
+            function = next(function for function in abiJson["functions"] if function["name"] == functionName)
+            self.assertEqual(getBodySelector(body), calcFunctionId(abiJson, function))
+            self.assertEqual(MESSAGE_DECODER.getCandidates(body, abiArray), [(abiName, True)])
+
+            (abi, decoded) = decodeMessageBody(body, abiArray)
+            self.assertEqual(abi,                 abiName)
+            self.assertEqual(decoded.body_type,   MessageBodyType.INPUT)
+            self.assertEqual(decoded.name,        functionName)
+            self.assertEqual(decoded.value.get("newComment"), functionParams.get("newComment"))
+
+    # 2. Bodies none of the ABIs know are not decoded
+    def test_2(self):
+        body = prepareMessageBoc(abiPath="DnsRecord", functionName="prolongate", functionParams={})
+        self.assertEqual(MESSAGE_DECODER.getCandidates(body, ["SetcodeMultisigWallet"]), [])
+        self.assertEqual(decodeMessageBody(body, ["SetcodeMultisigWallet"]), ("", ""))
+        self.assertEqual(decodeMessageBody("",   ["DnsRecord"]),             ("", ""))
+
+    # 3. Index is kept until an ABI file changes
+    def test_3(self):
+        index = MESSAGE_DECODER.getIndex(["DnsRecord"])
+        self.assertIs(MESSAGE_DECODER.getIndex(["DnsRecord"]), index)
+
+        path = "../bin/DnsRecord.abi.json"
+        stat = os.stat(path)
+        try:
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+            self.assertIsNot(MESSAGE_DECODER.getIndex(["DnsRecord"]), index)
+            self.assertEqual(MESSAGE_DECODER.getIndex(["DnsRecord"]), index)
+        finally:
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+# ==============================================================================
+#
+class Test_19_BulkAccounts(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig    = newMultisig()
+        cls.domain  = newDomain(name="bulk-accounts", owner=cls.msig)
+        cls.missing = calculateDomainAddresses(["bulk-accounts-missing"], contractName="DnsRecordTEST")[0]
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Giver
+    def test_1(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
+
+    # 2. Deploy multisig only, "bulk-accounts" stays uninit
+    def test_2(self):
+        result = self.msig.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        accTypes = getAccTypes([self.msig, self.domain, self.missing])
+        self.assertEqual(accTypes, {self.msig.ADDRESS: 1, self.domain.ADDRESS: 0, self.missing: 0})
+
+    # 3. One query gives the same balances as one getter per account, missing accounts are 0
+    def test_3(self):
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        balances = getBalances([self.msig, self.domain, self.missing])
+        self.assertEqual(balances, {self.msig.ADDRESS: self.msig.getBalance(), self.domain.ADDRESS: self.domain.getBalance(), self.missing: 0})
+        self.assertEqual(getAccTypes([self.domain.ADDRESS, self.domain.ADDRESS], everClient=getClient()), {self.domain.ADDRESS: 1})
+
+        accounts = fetchAccounts([self.msig.ADDRESS, self.missing], "balance(format:DEC)", everClient=getClient())
+        self.assertEqual(list(accounts.keys()), [self.msig.ADDRESS])
+
+    # 4. Plain addresses need a client
+    def test_4(self):
+        with self.assertRaises(ValueError):
+            getBalances([self.msig.ADDRESS])
+        with self.assertRaises(ValueError):
+            getAccTypes([])
+
+    # 5. Cleanup
+    def test_5(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+# ==============================================================================
+# A separate BocCache is aged by hand, so BOC_CACHE_TTL and the shared BOC_CACHE stay as they are
+class Test_20_BocCache(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="boc-cache", owner=cls.msig)
+
+    def _getFreshBoc(self):
+        return getAccountGraphQL(getClient(), self.domain.ADDRESS, "boc")["boc"]
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Giver
+    def test_1(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
+
+    # 2. Deploy multisig and "boc-cache"
+    def test_2(self):
+        result = self.msig.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 3. Within TTL the cached BOC is used, after it only a changed "last_trans_lt" downloads the BOC again
+    def test_3(self):
+        cache   = BocCache()
+        fetches = []
+        fetch   = cache._fetch
+        cache._fetch = lambda everClient, address: fetches.append(address) or fetch(everClient, address)
+
+        boc = cache.getBoc(getClient(), self.domain.ADDRESS)
+        self.assertEqual(boc, self._getFreshBoc())
+        self.assertEqual(cache.getBoc(getClient(), self.domain.ADDRESS), boc)
+        self.assertEqual(len(fetches), 1)
+
+        cache.ENTRIES[self.domain.ADDRESS]["TIME"] -= ever_utils.BOC_CACHE_TTL
+        self.assertEqual(cache.getBoc(getClient(), self.domain.ADDRESS), boc)
+        self.assertEqual(len(fetches), 1)
+
+        result = self.domain.changeComment(msig=self.msig, newComment="boc-cache")
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        self.assertEqual(cache.getBoc(getClient(), self.domain.ADDRESS), boc)
+
+        cache.ENTRIES[self.domain.ADDRESS]["TIME"] -= ever_utils.BOC_CACHE_TTL
+        self.assertEqual(cache.getBoc(getClient(), self.domain.ADDRESS), self._getFreshBoc())
+        self.assertEqual(len(fetches), 2)
+
+        self.assertEqual(cache.getBoc(getClient(), calculateDomainAddresses(["boc-cache-missing"], contractName="DnsRecordTEST")[0]), "")
+
+    # 4. Invalidation drops given addresses or everything
+    def test_4(self):
+        cache = BocCache()
+        cache.getBoc(getClient(), self.domain.ADDRESS)
+        cache.getBoc(getClient(), self.msig.ADDRESS)
+        cache.invalidate([self.domain.ADDRESS])
+        self.assertEqual(list(cache.ENTRIES.keys()), [self.msig.ADDRESS])
+        cache.invalidate()
+        self.assertEqual(cache.ENTRIES, {})
+
+    # 5. Sending through the shared cache drops the accounts involved, getters see the change right away
+    def test_5(self):
+        self.domain.getWhois()
+        result = self.domain.changeComment(msig=self.msig, newComment="boc-cache-2")
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        self.assertNotIn(self.domain.ADDRESS, BOC_CACHE.ENTRIES)
+        self.assertEqual(hexToString(self.domain.getWhois()["comment"]), "boc-cache-2")
+
+    # 6. Cleanup
+    def test_6(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+# ==============================================================================
+#
+class Test_21_RunMany(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="run-many", owner=cls.msig)
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. No account yet: no account state, no results
+    def test_1(self):
+        self.assertEqual(self.domain.getSnapshot(), {})
+
+    # 2. Giver
+    def test_2(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
+
+    # 3. Deploy multisig and "run-many"
+    def test_3(self):
+        result = self.msig.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 4. Getters run on one account state give the same results as one by one
+    def test_4(self):
+        result = self.domain.changeComment(msig=self.msig, newComment="run-many")
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        snapshot = self.domain.getSnapshot()
+        self.assertEqual(list(snapshot.keys()),         ["getWhois", "getEndpointAddress", "isExpired", "canProlongate"])
+        self.assertEqual(snapshot["getWhois"],           self.domain.getWhois())
+        self.assertEqual(snapshot["getEndpointAddress"], self.domain.getEndpointAddress())
+        self.assertEqual(snapshot["isExpired"],          self.domain.isExpired())
+        self.assertEqual(snapshot["canProlongate"],      self.domain.canProlongate())
+        self.assertEqual(hexToString(snapshot["getWhois"]["comment"]), "run-many")
+
+    # 5. Results are keyed by function name, the same getter twice is refused
+    def test_5(self):
+        with self.assertRaises(ValueError):
+            self.domain.runMany(functionsArray=[("getWhois", {}), ("isExpired", {}), ("getWhois", {})])
+
+    # 6. Cleanup
+    def test_6(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+# ==============================================================================
+# Every step is one event loop; results are compared with the synchronous API on the same accounts
+class Test_22_AsyncApi(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = AsyncMultisig(everClient=getAsyncClient())
+        cls.domain = AsyncDnsRecordTEST(everClient=cls.msig.EVERCLIENT, name="async-api", ownerAddress=cls.msig.ADDRESS)
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Giver
+    def test_1(self):
+        results = asyncio.run(giverGiveManyAsync(self.msig.EVERCLIENT, [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ]))
+        self.assertEqual([result["exception"]["errorCode"] for result in results], [0, 0])
+
+    # 2. Deploy multisig and "async-api" at the same time
+    def test_2(self):
+        async def deploy():
+            return await asyncio.gather(self.msig.deploy(), self.domain.deploy())
+        for result in asyncio.run(deploy()):
+            self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 3. Calls and getters give the same results as the synchronous API
+    def test_3(self):
+        async def change():
+            result = await self.domain.changeComment(msig=self.msig, newComment="async-api")
+            return (result, await unwrapMessagesAsync(result, self.domain.EVERCLIENT), await self.domain.getWhois(), await self.domain.runMany([("getWhois", {}), ("isExpired", {})]), await self.msig.getBalance())
+        (result, msgArray, whois, snapshot, balance) = asyncio.run(change())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        domain = DnsRecordTEST(everClient=getClient(), name="async-api", ownerAddress=self.msig.ADDRESS)
+        self.assertEqual(hexToString(whois["comment"]), "async-api")
+        self.assertEqual(whois,    domain.getWhois())
+        self.assertEqual(snapshot, domain.runMany([("getWhois", {}), ("isExpired", {})]))
+        self.assertEqual(balance,  getBalances([self.msig.ADDRESS], everClient=getClient())[self.msig.ADDRESS])
+        self.assertEqual(msgArray, unwrapMessages(result, getClient()))
+
+    # 4. Calls of one Multisig sent together are all accepted
+    def test_4(self):
+        async def send():
+            handles = []
+            for _ in range(3):
+                handles.append(await sendFunctionAsync(everClient=self.msig.EVERCLIENT, abiPath=self.msig.ABI, contractAddress=self.msig.ADDRESS, functionName="sendTransaction",
+                                                       functionParams={"dest":self.domain.ADDRESS, "value":DIME, "bounce":False, "flags":1, "payload":""}, signer=self.msig.SIGNER))
+            return await waitAllAsync(everClient=self.msig.EVERCLIENT, handles=handles)
+        self.assertEqual([result["exception"]["errorCode"] for result in asyncio.run(send())], [0, 0, 0])
+
+    # 5. Duplicate getters are refused like in "runMany"
+    def test_5(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(self.domain.runMany([("getWhois", {}), ("getWhois", {})]))
+
+    # 6. Cleanup
+    def test_6(self):
+        async def cleanup():
+            result = await self.domain.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+            self.assertEqual(result["exception"]["errorCode"], 0)
+            result = await self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+            self.assertEqual(result["exception"]["errorCode"], 0)
+        asyncio.run(cleanup())
+
+# ==============================================================================
+#
+class Test_23_Pipeline(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="pipeline", owner=cls.msig)
+
+    def _getHeaderTime(self, message: str):
+        params = ParamsOfDecodeMessage(abi=getAbi(self.msig.ABI), message=message)
+        return int(getClient().abi.decode_message(params=params).header.time)
+
+    def _encodeTransfer(self, value: int):
+        return encodeCallMessage(everClient=getClient(), abiPath=self.msig.ABI, contractAddress=self.msig.ADDRESS, functionName="sendTransaction",
+                                 functionParams={"dest":self.domain.ADDRESS, "value":value, "bounce":False, "flags":1, "payload":""}, signer=self.msig.SIGNER)
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Giver
+    def test_1(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
+
+    # 2. Deploy multisig and "pipeline"
+    def test_2(self):
+        result = self.msig.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 3. Messages of one key get growing "time" headers even when encoded in the same millisecond
+    def test_3(self):
+        times = [self._getHeaderTime(self._encodeTransfer(DIME)) for _ in range(5)]
+        self.assertEqual(times, sorted(set(times)))
+
+    # 4. Multisig calls sent together are all accepted, in call order
+    def test_4(self):
+        self.msig.beginPipeline()
+        self.domain.changeComment(msig=self.msig, newComment="pipeline")
+        self.domain.changeRegistrationPrice(msig=self.msig, newPrice=DIME*2)
+        self.domain.changeRegistrationType(msig=self.msig, newType=1)
+        results = self.msig.waitPipeline()
+        self.assertEqual([result["exception"]["errorCode"] for result in results], [0, 0, 0])
+
+        whois = self.domain.getWhois()
+        self.assertEqual(hexToString(whois["comment"]),  "pipeline")
+        self.assertEqual(whois["registrationPrice"],     str(DIME*2))
+        self.assertEqual(whois["registrationType"],      "1")
+        self.assertEqual(self.msig.waitPipeline(),       [])
+
+    # 5. A call that lands after a newer one of the same key fails replay protection, "waitAll" signs it again and resends it
+    def test_5(self):
+        older  = self._encodeTransfer(DIME)
+        result = waitFunction(everClient=getClient(), handle=sendFunction(everClient=getClient(), abiPath=self.msig.ABI, contractAddress=self.msig.ADDRESS, functionName="sendTransaction",
+                                                                            functionParams={"dest":self.domain.ADDRESS, "value":DIME, "bounce":False, "flags":1, "payload":""}, signer=self.msig.SIGNER))
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        handle         = sendMessage(everClient=getClient(), abiPath=self.msig.ABI, contractAddress=self.msig.ADDRESS, message=older)
+        handle["CALL"] = {"abiPath": self.msig.ABI, "contractAddress": self.msig.ADDRESS, "functionName": "sendTransaction",
+                          "functionParams": {"dest":self.domain.ADDRESS, "value":DIME, "bounce":False, "flags":1, "payload":""}, "signer": self.msig.SIGNER}
+        self.assertEqual(waitFunction(everClient=getClient(), handle=handle)["exception"]["errorCode"], REPLAY_PROTECTION_EXIT_CODE)
+
+        balance = self.domain.getBalance()
+        results = waitAll(everClient=getClient(), handles=[handle])
+        self.assertEqual(results[0]["exception"]["errorCode"], 0)
+        self.assertGreater(self.domain.getBalance(), balance)
+
+    # 6. Cleanup
+    def test_6(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+# ==============================================================================
+# Chains are resolved in one account query and the parent decision is predicted before the claim is sent
+class Test_24_ResolveChain(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig1              = newMultisig()
+        cls.msig2              = newMultisig()
+        cls.domain_resolvo     = newDomain(name="resolvo",     owner=cls.msig1)
+        cls.domain_resolvo_kek = newDomain(name="resolvo/kek", owner=cls.msig2)
+
+    def _predict(self, ownerAddress: str, value: int):
+        chain = resolveDomainChain(everClient=getClient(), name="resolvo/kek", contractName="DnsRecordTEST")
+        return predictRegistration(chain=chain, ownerAddress=ownerAddress, value=value)
+
+    def _claim(self, value: int):
+        result = self.domain_resolvo_kek.claimExpired(msig=self.msig2, newOwnerAddress=self.msig2.ADDRESS, value=value)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        return REG_RESULT(int(self.domain_resolvo_kek.getWhois()["lastRegResult"]))
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Nothing is deployed, the registration request would bounce
+    def test_1(self):
+        chains = resolveDomainChains(everClient=getClient(), names=["resolvo/kek", "resolvo"], contractName="DnsRecordTEST")
+        self.assertEqual([item["NAME"] for item in chains["resolvo/kek"]], ["resolvo", "resolvo/kek"])
+        self.assertEqual([item["ADDRESS"] for item in chains["resolvo/kek"]], [self.domain_resolvo.ADDRESS, self.domain_resolvo_kek.ADDRESS])
+        self.assertEqual(chains["resolvo"], chains["resolvo/kek"][:1])
+        self.assertEqual([item["WHOIS"] for item in chains["resolvo/kek"]], ["", ""])
+
+        self.assertEqual(self._predict(self.msig2.ADDRESS, EVER), REG_RESULT.NONE)
+        self.assertEqual(predictRegistration(chain=chains["resolvo"], ownerAddress=self.msig2.ADDRESS, value=0), REG_RESULT.APPROVED)
+
+    # 2. Giver
+    def test_2(self):
+        giverGiveMany(getClient(), [
+            (self.domain_resolvo.ADDRESS,     EVER * 2),
+            (self.domain_resolvo_kek.ADDRESS, EVER * 2),
+            (self.msig1.ADDRESS,              EVER * 2),
+            (self.msig2.ADDRESS,              EVER * 2)
+        ])
+
+    # 3. Deploy multisig, "resolvo" and "resolvo/kek"
+    def test_3(self):
+        result = self.msig1.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig2.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain_resolvo.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain_resolvo_kek.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        chain = resolveDomainChain(everClient=getClient(), name="resolvo/kek", contractName="DnsRecordTEST")
+        self.assertEqual(chain[0]["WHOIS"], self.domain_resolvo.getWhois())
+        self.assertEqual(chain[1]["WHOIS"], self.domain_resolvo_kek.getWhois())
+
+    # 4. OWNER and DENY parents
+    def test_4(self):
+        result = self.domain_resolvo.changeRegistrationType(msig=self.msig1, newType=2)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        self.assertEqual(self._predict(self.msig1.ADDRESS, EVER), REG_RESULT.APPROVED)
+        self.assertEqual(self._predict(self.msig2.ADDRESS, EVER), REG_RESULT.DENIED)
+        self.assertEqual(self._claim(EVER),                       REG_RESULT.DENIED)
+
+        result = self.domain_resolvo.changeRegistrationType(msig=self.msig1, newType=3)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        self.assertEqual(self._predict(self.msig1.ADDRESS, EVER), REG_RESULT.DENIED)
+
+    # 5. MONEY parent: prediction matches the parent decision on both sides of the price
+    def test_5(self):
+        regPrice = DIME*2
+        result   = self.domain_resolvo.changeRegistrationType(msig=self.msig1, newType=1)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result   = self.domain_resolvo.changeRegistrationPrice(msig=self.msig1, newPrice=regPrice)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        self.assertEqual(self._predict(self.msig2.ADDRESS, DIME), REG_RESULT.NOT_ENOUGH_MONEY)
+        self.assertEqual(self._claim(DIME),                       REG_RESULT.NOT_ENOUGH_MONEY)
+
+        self.assertEqual(self._predict(self.msig2.ADDRESS, EVER), REG_RESULT.APPROVED)
+        self.assertEqual(self._claim(EVER),                       REG_RESULT.APPROVED)
+        self.assertEqual(self.domain_resolvo_kek.getWhois()["ownerAddress"], self.msig2.ADDRESS)
+
+    # 6. Cleanup
+    def test_6(self):
+        result = self.domain_resolvo.TEST_selfdestruct(msig=self.msig1, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain_resolvo_kek.TEST_selfdestruct(msig=self.msig2, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        result = self.msig1.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig2.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+# ==============================================================================
+# Events are indexed from history, resumed from the same database and streamed from the subscription
+class Test_25_EventIndexer(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig1   = newMultisig()
+        cls.msig2   = newMultisig()
+        cls.domain  = newDomain(name="indexo", owner=cls.msig1)
+        cls.tempDir = tempfile.TemporaryDirectory()
+        cls.dbPath  = os.path.join(cls.tempDir.name, "events.db")
+
+    def _newIndexer(self):
+        indexer = EventIndexer(everClient=getClient(), dbPath=self.dbPath, contractName="DnsRecordTEST")
+        self.addCleanup(indexer.close)
+        return indexer
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Giver
+    def test_1(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig1.ADDRESS,  EVER * 2),
+            (self.msig2.ADDRESS,  EVER * 2)
+        ])
+
+    # 2. Deploy multisig and "indexo", claim it
+    def test_2(self):
+        result = self.msig1.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig2.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.claimExpired(msig=self.msig1, newOwnerAddress=self.msig1.ADDRESS)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 3. Catch-up indexes the claim
+    def test_3(self):
+        indexer = self._newIndexer()
+        indexer.addDomains(["indexo"])
+        self.assertEqual(indexer.poll(), 1)
+
+        events = indexer.getEvents(domain="indexo")
+        self.assertEqual([event["EVENT"] for event in events], ["registrationResult"])
+        self.assertEqual(events[0]["ADDRESS"],          self.domain.ADDRESS)
+        self.assertEqual(events[0]["OWNER"],            self.msig1.ADDRESS)
+        self.assertEqual(events[0]["PARAMS"]["result"], "1")
+        self.assertEqual(indexer.poll(),                0)
+
+    # 4. Reopened database resumes where indexing stopped
+    def test_4(self):
+        indexer = self._newIndexer()
+        self.assertEqual(len(indexer.getEvents(domain="indexo")), 1)
+        self.assertEqual(indexer.poll(), 0)
+
+        # Events since the last run are caught up once
+        result = self.domain.changeOwner(msig=self.msig1, newOwnerAddress=self.msig2.ADDRESS)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        self.assertEqual(indexer.poll(), 1)
+        self.assertEqual(indexer.poll(), 0)
+
+    # 5. Subscription streams new events
+    def test_5(self):
+        indexer = self._newIndexer()
+        indexer.subscribe()
+
+        result = self.domain.changeOwner(msig=self.msig2, newOwnerAddress=self.msig1.ADDRESS)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        self.assertEqual(indexer.processPending(), 1)
+        self.assertEqual(indexer.poll(),           0)
+
+        events = indexer.getEvents(domain="indexo", event="ownerChanged")
+        self.assertEqual([(event["PARAMS"]["oldOwner"], event["OWNER"]) for event in events],
+                         [(self.msig1.ADDRESS, self.msig2.ADDRESS), (self.msig2.ADDRESS, self.msig1.ADDRESS)])
+        self.assertEqual(len(indexer.getEvents(owner=self.msig1.ADDRESS)), 2)
+
+    # 6. Cleanup
+    def test_6(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig1, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        result = self.msig1.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig2.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        self.tempDir.cleanup()
+
+# ==============================================================================
+# Scheduled "prolongate" is sent once its window opens and only once per domain
+class Test_26_ExpiryScheduler(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig      = newMultisig()
+        cls.domain    = newDomain(name="scheduleo",  owner=cls.msig)
+        cls.unclaimed = newDomain(name="scheduleo2", owner=cls.msig)
+        cls.scheduler = ExpiryScheduler(everClient=getClient(), contractName="DnsRecordTEST")
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Giver
+    def test_1(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
+
+    # 2. Deploy multisig and "scheduleo", claim it
+    def test_2(self):
+        result = self.msig.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.claimExpired(msig=self.msig, newOwnerAddress=self.msig.ADDRESS)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 3. Tracking twice keeps one entry, domains that can not be prolongated are skipped
+    def test_3(self):
+        expires = int(self.domain.getWhois()["dtExpires"])
+        self.assertEqual(self.scheduler.track([(self.domain, self.msig), (self.unclaimed, self.msig)]), [self.unclaimed.ADDRESS])
+        self.assertEqual(self.scheduler.track([(self.domain, self.msig)]), [])
+        self.assertEqual(len(self.scheduler.HEAP), 1)
+        self.assertEqual(self.scheduler.getNextTime(), expires - TEN_DAYS + PROLONGATE_MARGIN)
+
+        # Window is not open yet
+        self.assertEqual(self.scheduler.runPending(), {})
+
+    # 4. Window opens, "prolongate" is sent once
+    def test_4(self):
+        expires = getNowTimestamp() + TEN_DAYS // 2
+        result  = self.domain.TEST_changeDtExpires(msig=self.msig, newDate=expires)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        self.assertEqual(self.scheduler.track([(self.domain, self.msig)]), [])
+        self.assertLessEqual(self.scheduler.getNextTime(), getNowTimestamp())
+
+        now     = getNowTimestamp()
+        results = self.scheduler.runPending(now)
+        self.assertEqual(list(results.keys()), [self.domain.ADDRESS])
+        self.assertEqual(results[self.domain.ADDRESS]["exception"]["errorCode"], 0)
+        self.assertEqual(int(self.domain.getWhois()["dtExpires"]), expires + NINETY_DAYS)
+
+        # Nothing is due until the retry, which picks up the new "dtExpires" instead of prolongating again
+        self.assertEqual(self.scheduler.runPending(now), {})
+        self.assertEqual(self.scheduler.runPending(now + RETRY_DELAY), {})
+        self.assertEqual(self.scheduler.getNextTime(), expires + NINETY_DAYS - TEN_DAYS + PROLONGATE_MARGIN)
+
+    # 5. Cleanup
+    def test_5(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+# ==============================================================================
+# Watched domain is claimed as soon as it expires, "dtExpires" changes come from the account subscription
+class Test_27_ExpiredWatcher(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig1   = newMultisig()
+        cls.msig2   = newMultisig()
+        cls.domain  = newDomain(name="watcho", owner=cls.msig1)
+        cls.watcher = ExpiredWatcher(everClient=getClient(), msig=cls.msig2, contractName="DnsRecordTEST")
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Giver
+    def test_1(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig1.ADDRESS,  EVER * 2),
+            (self.msig2.ADDRESS,  EVER * 2)
+        ])
+
+    # 2. Deploy multisig and "watcho", claim it
+    def test_2(self):
+        result = self.msig1.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig2.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.claimExpired(msig=self.msig1, newOwnerAddress=self.msig1.ADDRESS)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 3. Nothing to do until PREPARE_AHEAD before expiry
+    def test_3(self):
+        self.watcher.watch(["watcho"])
+        self.assertEqual(self.watcher.getNextTime(), int(self.domain.getWhois()["dtExpires"]) - PREPARE_AHEAD)
+        self.assertEqual(self.watcher.runPending(), {})
+
+    # 4. Expiry moves close, the claim is prepared but not sent
+    def test_4(self):
+        expires = getNowTimestamp() + PREPARE_AHEAD // 2
+        result  = self.domain.TEST_changeDtExpires(msig=self.msig1, newDate=expires)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        self.assertEqual(self.watcher.runPending(), {})
+        self.assertEqual(self.watcher.getNextTime(), expires + 1)
+        self.assertNotEqual(self.watcher.DOMAINS[self.domain.ADDRESS]["MESSAGE"], "")
+
+    # 5. Domain expires and is claimed by the watcher
+    def test_5(self):
+        result = self.domain.TEST_changeDtExpires(msig=self.msig1, newDate=getNowTimestamp() - 5)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        results = self.watcher.runPending()
+        self.assertEqual(list(results.keys()), [self.domain.ADDRESS])
+        self.assertEqual(results[self.domain.ADDRESS]["exception"]["errorCode"], 0)
+        self.assertEqual(self.domain.getWhois()["ownerAddress"], self.msig2.ADDRESS)
+
+        # Claimed domain is not claimed again
+        self.assertEqual(self.watcher.runPending(), {})
+        self.assertEqual(self.watcher.getNextTime(), None)
+        self.watcher.close()
+
+    # 6. Cleanup
+    def test_6(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig2, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        result = self.msig1.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig2.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+# ==============================================================================
+# Internal message bodies are encoded once per ABI, function and parameters
+class Test_28_BodyCache(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig   = newMultisig()
+        cls.domain = newDomain(name="bodyo", owner=cls.msig)
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Same call hits, whatever order parameters come in and however the ABI is given
+    def test_1(self):
+        cache = BodyCache()
+        body  = cache.getBody("DnsRecordTEST", "claimExpired", {"newOwnerAddress": self.msig.ADDRESS, "forceFeeReturnToOwner": False})
+        self.assertEqual((cache.HITS, cache.MISSES), (0, 1))
+        self.assertEqual(body, cache._encode("DnsRecordTEST", "claimExpired", {"newOwnerAddress": self.msig.ADDRESS, "forceFeeReturnToOwner": False}))
+
+        self.assertEqual(cache.getBody("DnsRecordTEST",         "claimExpired", {"forceFeeReturnToOwner": False, "newOwnerAddress": self.msig.ADDRESS}), body)
+        self.assertEqual(cache.getBody(getAbi("DnsRecordTEST"), "claimExpired", {"newOwnerAddress": self.msig.ADDRESS, "forceFeeReturnToOwner": False}), body)
+        self.assertEqual((cache.HITS, cache.MISSES), (2, 1))
+
+        # Other parameters or another function miss
+        self.assertNotEqual(cache.getBody("DnsRecordTEST", "claimExpired", {"newOwnerAddress": self.msig.ADDRESS, "forceFeeReturnToOwner": True}), body)
+        cache.getBody("DnsRecordTEST", "prolongate", {})
+        cache.getBody("DnsRecordTEST", "prolongate", {})
+        self.assertEqual((cache.HITS, cache.MISSES), (3, 3))
+
+        cache.clear()
+        self.assertEqual((cache.HITS, cache.MISSES, len(cache.ENTRIES)), (0, 0, 0))
+
+    # 2. Least recently used body is dropped first
+    def test_2(self):
+        cache = BodyCache()
+        cache.getBody("DnsRecordTEST", "prolongate", {})
+        for i in range(ever_utils.BODY_CACHE_SIZE):
+            cache.getBody("DnsRecordTEST", "changeComment", {"newComment": stringToHex(i)})
+        self.assertEqual(len(cache.ENTRIES), ever_utils.BODY_CACHE_SIZE)
+
+        cache.getBody("DnsRecordTEST", "changeComment", {"newComment": stringToHex(1)})
+        self.assertEqual(cache.HITS, 1)
+        cache.getBody("DnsRecordTEST", "prolongate", {})
+        self.assertEqual(cache.HITS, 1)
+
+    # 3. Giver
+    def test_3(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,   EVER * 2)
+        ])
+
+    # 4. Deploy multisig and "bodyo"
+    def test_4(self):
+        result = self.msig.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 5. Multisig calls send cached bodies
+    def test_5(self):
+        result = self.domain.changeComment(msig=self.msig, newComment="body cache")
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+        hits   = BODY_CACHE.HITS
+        result = self.domain.changeComment(msig=self.msig, newComment="body cache")
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        self.assertGreater(BODY_CACHE.HITS, hits)
+
+        key = BODY_CACHE._getKey("DnsRecordTEST", "changeComment", {"newComment": stringToHex("body cache")})
+        self.assertIn(key, BODY_CACHE.ENTRIES)
+        self.assertEqual(hexToString(self.domain.getWhois()["comment"]), "body cache")
+
+    # 6. Cleanup
+    def test_6(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+# ==============================================================================
+# Whois is exported in input order with typed columns, names that are not deployed are counted
+class Test_29_WhoisExporter(FixtureTestCase):
+
+    @classmethod
+    def createFixtures(cls):
+        cls.msig        = newMultisig()
+        cls.domain      = newDomain(name="exporto",     owner=cls.msig)
+        cls.domain_kek  = newDomain(name="exporto/kek", owner=cls.msig)
+        cls.names       = ["exporto/kek", "exporto-missing", "exporto"]
+        cls.tempDir     = tempfile.TemporaryDirectory()
+
+    def _export(self, fileName: str, **kwargs):
+        path   = os.path.join(self.tempDir.name, fileName)
+        result = exportWhois(everClient=getClient(), names=(name for name in self.names), path=path, contractName="DnsRecordTEST", chunkSize=2, **kwargs)
+        self.assertEqual(result, {"ROWS": 2, "MISSING": 1})
+        return path
+
+    def _getExpectedRows(self):
+        rows = []
+        for (name, domain) in [("exporto/kek", self.domain_kek), ("exporto", self.domain)]:
+            whois = domain.getWhois()
+            row   = {"name": name, "address": domain.ADDRESS}
+            for (column, columnType) in WHOIS_COLUMNS[2:]:
+                row[column] = int(whois[column]) if columnType == "int" else hexToString(whois[column]) if columnType == "bytes" else whois[column]
+            rows.append(row)
+        return rows
+
+    def test_0(self):
+        print("\n\n----------------------------------------------------------------------")
+        print("Running:", self.__class__.__name__)
+
+    # 1. Giver
+    def test_1(self):
+        giverGiveMany(getClient(), [
+            (self.domain.ADDRESS,     EVER * 2),
+            (self.domain_kek.ADDRESS, EVER * 2),
+            (self.msig.ADDRESS,       EVER * 2)
+        ])
+
+    # 2. Deploy multisig, "exporto" and "exporto/kek"
+    def test_2(self):
+        result = self.msig.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain_kek.deploy()
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain.changeComment(msig=self.msig, newComment="exported, \"quoted\"")
+        self.assertEqual(result["exception"]["errorCode"], 0)
+
+    # 3. CSV
+    def test_3(self):
+        with open(self._export("whois.csv"), newline="", encoding="utf8") as fp:
+            reader = csv.reader(fp)
+            header = next(reader)
+            rows   = [dict(zip(header, row)) for row in reader]
+
+        self.assertEqual(header, [column for (column, _) in WHOIS_COLUMNS])
+        expected = [{column: str(value) for (column, value) in row.items()} for row in self._getExpectedRows()]
+        self.assertEqual(rows, expected)
+        self.assertEqual(rows[1]["comment"], "exported, \"quoted\"")
+
+        with self.assertRaises(ValueError):
+            exportWhois(everClient=getClient(), names=self.names, path=os.path.join(self.tempDir.name, "whois.txt"), contractName="DnsRecordTEST")
+
+    # 4. Parquet
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow") is not None, "pyarrow is not installed")
+    def test_4(self):
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(self._export("whois.bin", fileFormat="parquet"))
+        self.assertEqual(table.column_names, [column for (column, _) in WHOIS_COLUMNS])
+        self.assertEqual(table.to_pylist(), self._getExpectedRows())
+
+    # 5. Cleanup
+    def test_5(self):
+        result = self.domain.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.domain_kek.TEST_selfdestruct(msig=self.msig, dest=ever_utils.giverGetAddress())
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        result = self.msig.sendTransaction(addressDest=ever_utils.giverGetAddress(), value=0, flags=128)
+        self.assertEqual(result["exception"]["errorCode"], 0)
+        self.tempDir.cleanup()
+
 # TODO: add deploying from debot
 
+# ==============================================================================
+# PARALLEL RUNNER
+# TestCase classes are run in PARALLEL worker threads against the same node, steps inside a class
+# stay in order. Classes that use the same contract address (e.g. several suites deploy "net" or
+# "domaino") are put into one group and run one after another in the same worker.
+def _getClassAddresses(testClass):
+    testClass.setUpClass()
+    addresses = set()
+    for value in vars(testClass).values():
+        values = value if isinstance(value, list) else [value]
+        for item in values:
+            items = item.values() if isinstance(item, dict) else [item]
+            addresses.update(contract.ADDRESS for contract in items if isinstance(contract, BaseContract))
+    return addresses
+
+def _groupTestClasses(testClasses):
+    groups = [] # [(addresses, [classes])]
+    for testClass in testClasses:
+        addresses = _getClassAddresses(testClass)
+        merged    = [group for group in groups if group[0] & addresses]
+        groups    = [group for group in groups if not group[0] & addresses]
+        for group in merged:
+            addresses |= group[0]
+        groups.append((addresses, [cls for group in merged for cls in group[1]] + [testClass]))
+    return [sorted(group[1], key=lambda cls: cls.__name__) for group in groups]
+
+def _runTestGroup(testClasses):
+    suite  = unittest.TestSuite([unittest.defaultTestLoader.loadTestsFromTestCase(testClass) for testClass in testClasses])
+    result = unittest.TestResult()
+    suite.run(result)
+    return result
+
+def runParallel(workers: int, names):
+    testClasses = [obj for (name, obj) in sorted(globals().items()) if isinstance(obj, type) and issubclass(obj, FixtureTestCase) and obj is not FixtureTestCase and (len(names) == 0 or name in names)]
+    groups      = _groupTestClasses(testClasses)
+
+    timeStart = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_runTestGroup, groups))
+    timeTaken = time.time() - timeStart
+
+    testsRun = sum(result.testsRun      for result in results)
+    failures = [failure for result in results for failure in result.failures]
+    errors   = [error   for result in results for error   in result.errors]
+    skipped  = sum(len(result.skipped)  for result in results)
+
+    output = io.StringIO()
+    for (flavour, problems) in (("ERROR", errors), ("FAIL", failures)):
+        for (test, traceback) in problems:
+            output.write("=" * 70 + "\n{}: {}\n".format(flavour, test) + "-" * 70 + "\n{}\n".format(traceback))
+    output.write("-" * 70 + "\nRan {} tests in {:.3f}s ({} groups, {} workers)\n\n".format(testsRun, timeTaken, len(groups), workers))
+
+    details = ["failures={}".format(len(failures))] if len(failures) > 0 else []
+    details = details + (["errors={}".format(len(errors))] if len(errors) > 0 else [])
+    details = details + (["skipped={}".format(skipped)]    if skipped     > 0 else [])
+    status  = "OK" if len(failures) + len(errors) == 0 else "FAILED"
+    output.write(status + (" ({})".format(", ".join(details)) if len(details) > 0 else "") + "\n")
+    sys.stderr.write(output.getvalue())
+    sys.exit(0 if status == "OK" else 1)
+
 # ==============================================================================
 # 
-unittest.main()
+if PARALLEL > 0:
+    runParallel(PARALLEL, sys.argv[1:])
+else:
+    unittest.main()
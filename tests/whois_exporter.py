@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+# ==============================================================================
+# WHOIS EXPORTER
+# Writes whois of many domains to CSV or Parquet with typed columns. Names are read in chunks of
+# GRAPHQL_CHUNK, every chunk is one "id in" account query plus local whois decoding, done in a thread pool.
+# At most "workers * 2" chunks are in flight and rows are written in input order, so memory stays flat
+# however many names there are. Parquet needs "pyarrow"; CSV has no extra dependencies.
+#
+# Usage:
+#   with open("names.txt") as fp:
+#       exportWhois(everClient=getEverClient(testnet=False), names=(line.strip() for line in fp), path="whois.parquet")
+import csv
+import itertools
+import collections
+import ever_utils
+from   ever_utils import *
+from   contract_DnsRecord import *
+
+# ==============================================================================
+# (column, type); "int" columns are written as integers, "bytes" are decoded to text
+WHOIS_COLUMNS = [
+    ("name",                 "str"),
+    ("address",              "str"),
+    ("endpointAddress",      "str"),
+    ("segmentsCount",        "int"),
+    ("domainName",           "bytes"),
+    ("parentDomainName",     "bytes"),
+    ("parentDomainAddress",  "str"),
+    ("ownerAddress",         "str"),
+    ("dtLastProlongation",   "int"),
+    ("dtExpires",            "int"),
+    ("registrationPrice",    "int"),
+    ("registrationType",     "int"),
+    ("lastRegResult",        "int"),
+    ("comment",              "bytes"),
+    ("dtCreated",            "int"),
+    ("totalOwnersNum",       "int"),
+    ("subdomainRegAccepted", "int"),
+    ("subdomainRegDenied",   "int"),
+    ("totalFeesCollected",   "int"),
+]
+
+def _getWhoisRow(name: str, address: str, whois):
+    row = [name, address]
+    for (column, columnType) in WHOIS_COLUMNS[2:]:
+        value = whois[column]
+        if columnType == "int":
+            value = int(value)
+        elif columnType == "bytes":
+            value = bytes.fromhex(value).decode("utf-8", errors="replace")
+        row.append(value)
+    return row
+
+# Rows of deployed domains and number of names that are not deployed
+def _getChunkRows(everClient: TonClient, names, contractName: str):
+    addresses = calculateDomainAddresses(names, contractName)
+    whois     = getWhoisMany(everClient=everClient, addresses=addresses, contractName=contractName, cacheBocs=False)
+
+    rows = [_getWhoisRow(name, address, whois[address]) for (name, address) in zip(names, addresses) if whois[address] != ""]
+    return (rows, len(names) - len(rows))
+
+# Yields (rows, missing) per chunk of "names" in input order; "names" can be any iterable
+def iterWhoisRows(everClient: TonClient, names, contractName: str = "DnsRecord", workers: int = 8, chunkSize: int = 0):
+    chunkSize = ever_utils.GRAPHQL_CHUNK if chunkSize <= 0 else chunkSize
+    names     = iter(names)
+    pending   = collections.deque()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(itertools.islice(names, chunkSize))
+                if len(chunk) == 0:
+                    break
+                pending.append(executor.submit(_getChunkRows, everClient, chunk, contractName))
+            if len(pending) == 0:
+                return
+            yield pending.popleft().result()
+
+# ==============================================================================
+#
+class CsvWhoisWriter(object):
+    def __init__(self, path: str):
+        self.FILE   = open(path, "w", newline="", encoding="utf8")
+        self.WRITER = csv.writer(self.FILE)
+        self.WRITER.writerow([column for (column, _) in WHOIS_COLUMNS])
+
+    def write(self, rows):
+        self.WRITER.writerows(rows)
+
+    def close(self):
+        self.FILE.close()
+
+# uint128 columns are stored as uint64, values above that fail the write instead of being truncated
+class ParquetWhoisWriter(object):
+    def __init__(self, path: str):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.PYARROW = pyarrow
+        types        = {"str": pyarrow.string(), "bytes": pyarrow.string(), "int": pyarrow.uint64()}
+        self.SCHEMA  = pyarrow.schema([(column, types[columnType]) for (column, columnType) in WHOIS_COLUMNS])
+        self.WRITER  = pyarrow.parquet.ParquetWriter(path, self.SCHEMA)
+
+    def write(self, rows):
+        if len(rows) == 0:
+            return
+        columns = [self.PYARROW.array([row[i] for row in rows], type=self.SCHEMA.field(i).type) for i in range(len(WHOIS_COLUMNS))]
+        self.WRITER.write_table(self.PYARROW.Table.from_arrays(columns, schema=self.SCHEMA))
+
+    def close(self):
+        self.WRITER.close()
+
+WHOIS_WRITERS = {"csv": CsvWhoisWriter, "parquet": ParquetWhoisWriter}
+
+# ==============================================================================
+# "fileFormat" is "csv" or "parquet", taken from the file extension if not set; returns {"ROWS", "MISSING"}
+def exportWhois(everClient: TonClient, names, path: str, fileFormat: str = None, contractName: str = "DnsRecord", workers: int = 8, chunkSize: int = 0):
+    fileFormat = os.path.splitext(path)[1][1:].lower() if fileFormat is None else fileFormat
+    if fileFormat not in WHOIS_WRITERS:
+        raise ValueError("Unknown whois export format: {}".format(fileFormat))
+
+    writer = WHOIS_WRITERS[fileFormat](path)
+    result = {"ROWS": 0, "MISSING": 0}
+    try:
+        for (rows, missing) in iterWhoisRows(everClient=everClient, names=names, contractName=contractName, workers=workers, chunkSize=chunkSize):
+            writer.write(rows)
+            result["ROWS"]    += len(rows)
+            result["MISSING"] += missing
+    finally:
+        writer.close()
+    return result
+
+# ==============================================================================
+#